@@ -0,0 +1,144 @@
+"""
+DAG file parse-time benchmark, as the scheduler's DAG processor sees it.
+
+    python -m benchmarks.bench_dag_parse dags/scrape_listings.py dags/dbt_transformation.py --repeat 5
+    python -m benchmarks.bench_dag_parse --dag-folder dags
+
+Every parse runs in a fresh interpreter with airflow already imported, and reports the parse time,
+the number of Variable.get calls (each one a metadata DB query) and which heavy modules got imported.
+With --dag-folder, the folder is loaded through a DagBag instead, with the scheduler's safe mode
+heuristic and .airflowignore, and the files parsed and the DAGs found in each are reported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Modules a DAG file should only import when its tasks run.
+HEAVY_MODULES = (
+    "bs4", "lxml", "requests", "pyarrow", "google.cloud.storage", "google.cloud.bigquery", "dags.scripts.house_scrapper",
+)
+
+PARSE_SCRIPT = """
+import json, runpy, sys, time
+from airflow import DAG
+from airflow.models import Variable
+
+calls = []
+get = Variable.get
+
+def counting_get(key, *args, **kwargs):
+    calls.append(key)
+    try:
+        return get(key, *args, **kwargs)
+    except Exception:
+        # no metadata DB here, a value of the right shape is enough to build the DAG
+        return "gs://bucket/schema.json" if "schema" in key else "1"
+
+Variable.get = staticmethod(counting_get)
+heavy = {heavy!r}
+started = time.perf_counter()
+namespace = runpy.run_path({path!r}, run_name="bench_dag_parse")
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "parse_sec": elapsed,
+    "dags": sum(isinstance(value, DAG) for value in namespace.values()),
+    "variable_gets": len(calls),
+    "heavy_modules": [module for module in heavy if module in sys.modules],
+}}))
+"""
+
+DAGBAG_SCRIPT = """
+import json, time
+from airflow.models.dagbag import DagBag
+
+started = time.perf_counter()
+dagbag = DagBag(dag_folder={folder!r}, safe_mode=True)
+elapsed = time.perf_counter() - started
+files = sorted({{dag.fileloc for dag in dagbag.dags.values()}} | set(dagbag.import_errors))
+print(json.dumps({{
+    "parse_sec": elapsed,
+    "files": [
+        {{
+            "file": path,
+            "dags": sorted(dag_id for dag_id, dag in dagbag.dags.items() if dag.fileloc == path),
+            "import_error": (dagbag.import_errors.get(path) or "").strip().splitlines()[-1:],
+        }}
+        for path in files
+    ],
+}}))
+"""
+
+
+def parse_once(path: str) -> Dict:
+    """Parse a DAG file in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-c", PARSE_SCRIPT.format(heavy=HEAVY_MODULES, path=path)],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Failed to parse {path}:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def discover_folder(folder: str) -> Dict:
+    """Load a DAG folder through a DagBag in a fresh interpreter, as the scheduler discovers it."""
+    completed = subprocess.run(
+        [sys.executable, "-c", DAGBAG_SCRIPT.format(folder=folder)],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "AIRFLOW__CORE__LOAD_EXAMPLES": "False"},
+    )
+    if completed.returncode != 0:
+        raise SystemExit(f"Failed to load {folder}:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_file(path: str, repeat: int) -> Dict:
+    runs: List[Dict] = [parse_once(path) for _ in range(repeat)]
+    times = [run["parse_sec"] for run in runs]
+    return {
+        "file": path,
+        "dags": runs[-1]["dags"],
+        "parse_sec_median": statistics.median(times),
+        "parse_sec_min": min(times),
+        "variable_gets": runs[-1]["variable_gets"],
+        "heavy_modules": ",".join(runs[-1]["heavy_modules"]) or "-",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark how long the scheduler takes to parse DAG files.")
+    parser.add_argument("paths", nargs="*", help="DAG files to parse.")
+    parser.add_argument("--dag-folder", type=str, help="Load this folder through a DagBag instead.")
+    parser.add_argument("--repeat", type=int, default=5, help="Parses per file, each in a fresh interpreter.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    if args.dag_folder:
+        discovered = discover_folder(args.dag_folder)
+        if args.json:
+            print(json.dumps(discovered, indent=2))
+            return
+        print(f"parse_sec={discovered['parse_sec']:.3f}  files={len(discovered['files'])}")
+        for result in discovered["files"]:
+            error = " ".join(result["import_error"]) or "-"
+            print(f"file={result['file']}  dags={','.join(result['dags']) or '-'}  import_error={error}")
+        return
+    if not args.paths:
+        parser.error("give DAG files to parse or --dag-folder")
+
+    results = [bench_file(path, max(1, args.repeat)) for path in args.paths]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print("  ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Offline throughput benchmark of the scraper against the local fake listing site.
+
+    python -m benchmarks.bench_scraper --pages 20 --latency 0.05 --max-workers 8
+
+Reports pages/sec, listings/sec, parse microseconds per listing, time per stage and peak memory
+for process_chunk (in-memory CSV) and write_chunk (Parquet streamed to a local file).
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+
+from benchmarks.fake_site import FakeListingSite
+from dags.scripts.chunk_writer import ParquetChunkWriter
+from dags.scripts.fetcher import ListingFetcher
+from dags.scripts.house_scrapper import HEADERS, create_session, fetch_page, process_chunk, write_chunk
+from dags.scripts.listing_parser import parse_listing
+from dags.scripts.metrics import PipelineMetrics
+from dags.scripts.parse_pool import ParsePool
+from dags.scripts.rate_limiter import AdaptiveRateLimiter
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def bench_parse(site: FakeListingSite, listings: int) -> Dict[str, float]:
+    """Time parse_listing alone over synthetic detail pages."""
+    pages = [site.detail_page(listing_id).encode("utf-8") for listing_id in range(1, listings + 1)]
+    started = time.perf_counter()
+    for page in pages:
+        parse_listing(page)
+    elapsed = time.perf_counter() - started
+    return {"listings": listings, "parse_us_per_listing": elapsed / listings * 1e6}
+
+
+def bench_chunk(site: FakeListingSite, args: argparse.Namespace, output_format: str) -> Dict[str, float]:
+    """Scrape every page of the fake site once and measure throughput and memory."""
+    session = create_session(pool_maxsize=max(args.max_workers, args.per_host_limit))
+    headers = dict(HEADERS)
+    rate_limiter = AdaptiveRateLimiter(rate=args.max_rate, max_rate=args.max_rate, burst=args.max_workers)
+    metrics = PipelineMetrics()
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers else None
+    requests_before = site.requests
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ListingFetcher(
+        fetch_page, session, headers, max_workers=args.max_workers, per_host_limit=args.per_host_limit,
+        rate_limiter=rate_limiter, metrics=metrics,
+    ) as fetcher:
+        if output_format == "csv":
+            content = process_chunk(
+                session, headers, site.base_url, args.category, args.city, 1, args.pages, fetcher, parse_pool=parse_pool
+            )
+            rows = content.count("\n") - 1
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                with open(os.path.join(tmp, "chunk.parquet"), "wb") as output:
+                    chunk_writer = ParquetChunkWriter(output)
+                    rows = write_chunk(
+                        chunk_writer, session, headers, site.base_url, args.category, args.city, 1, args.pages, fetcher,
+                        parse_pool=parse_pool,
+                    )
+                    chunk_writer.close()
+    elapsed = time.perf_counter() - started
+    if parse_pool is not None:
+        parse_pool.close()
+    traced_peak = 0
+    if args.trace_memory:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stage_seconds = {f"{stage}_sec": values["sum"] for stage, values in metrics.summary()["stages"].items()}
+    return {
+        "format": output_format,
+        "seconds": elapsed,
+        "pages_per_sec": args.pages / elapsed,
+        "listings_per_sec": rows / elapsed,
+        "rows": rows,
+        "requests": site.requests - requests_before,
+        **({"python_peak_mb": traced_peak / (1024 * 1024)} if args.trace_memory else {}),
+        "peak_rss_mb": peak_rss_mb(),
+        **stage_seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local fake listing site.")
+    parser.add_argument("--pages", type=int, default=10, help="Number of index pages to scrape.")
+    parser.add_argument("--listings-per-page", type=int, default=20, help="Listings on every index page.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses answered with a 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of responses answered with a 429.")
+    parser.add_argument("--max-workers", type=int, default=8, help="Detail page fetch threads.")
+    parser.add_argument("--per-host-limit", type=int, default=8, help="In-flight requests per host.")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Parser processes, 0 parses inline.")
+    parser.add_argument("--max-rate", type=float, default=1000.0, help="Request rate cap in requests per second.")
+    parser.add_argument("--category", type=str, default="for-sale", help="Category path of the index pages.")
+    parser.add_argument("--city", type=str, default="lagos", help="City path of the index pages.")
+    parser.add_argument("--formats", type=str, default="csv,parquet", help="Comma separated output formats.")
+    parser.add_argument("--trace-memory", action="store_true", help="Report the peak of Python allocations (slow).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    with FakeListingSite(
+        pages=args.pages,
+        listings_per_page=args.listings_per_page,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+    ) as site:
+        results.append(bench_parse(site, args.pages * args.listings_per_page))
+        for output_format in args.formats.split(","):
+            results.append(bench_chunk(site, args, output_format.strip()))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print("  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Local fake listing site serving synthetic index and detail pages in the real site's markup
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+LOCATIONS = [
+    "Lekki Phase 1, Lekki, Lagos",
+    "Ikoyi, Lagos",
+    "Ajah, Lagos",
+    "Ikeja GRA, Ikeja, Lagos",
+    "Yaba, Lagos",
+    "Gbagada, Lagos",
+    "Surulere, Lagos",
+    "Magodo, Kosofe, Lagos",
+]
+PROPERTY_TYPES = [
+    "Flat / Apartment",
+    "Detached Duplex",
+    "Semi-detached Duplex",
+    "Terraced Duplex",
+    "Mini Flat (Room and Parlour)",
+    "Self Contain (Single Rooms)",
+]
+
+INDEX_LISTING = """<div class="row property-list">
+<div class="col-sm-4"><a href="/{listing_id}-listing"><img src="/img/{listing_id}.jpg"></a></div>
+<div class="description hidden-xs">
+<h4 class="content-title">{title}</h4>
+<address>{location}</address>
+<a href="/{listing_id}-listing">More details</a>
+</div>
+</div>
+"""
+
+DETAIL_PAGE = """<html><head><title>{title}</title></head><body>
+<h4><address><i class="fa fa-map-marker"></i> {location}</address></h4>
+<span class="pull-sale price" itemprop="priceCurrency" content="NGN">&#8358;</span>
+<span class="price" itemprop="price" content="{price}">{price_text}</span>
+<table class="table table-bordered table-striped">
+<tr><td><strong>Property Ref:</strong> {listing_id}</td><td><strong>Added On:</strong> 01 Sep 2024</td></tr>
+<tr><td><strong>Market Status:</strong> Available</td><td><strong>Type:</strong> {property_type}</td></tr>
+<tr><td><strong>Bedrooms:</strong> {bedrooms}</td><td><strong>Bathrooms:</strong> {bathrooms}</td></tr>
+<tr><td><strong>Toilets:</strong> {toilets}</td>{extras}</tr>
+<tr><td><strong>Total Area:</strong> {total_area} sqm</td><td><strong>Covered Area:</strong> {covered_area} sqm</td></tr>
+</table>
+<p>{description}</p>
+</body></html>
+"""
+
+
+class FakeListingSite:
+    """
+    Threaded HTTP server imitating the listing site, with configurable latency and error injection.
+
+    Index pages live at /{category}/{city}?page=N and link to detail pages at /{id}-listing.
+    Content is generated from the listing id, so every run serves identical pages.
+    """
+
+    def __init__(
+        self,
+        pages: int = 10,
+        listings_per_page: int = 20,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        Initialize the FakeListingSite class.
+
+        Args:
+            pages (int, optional): The number of index pages with listings. Defaults to 10.
+            listings_per_page (int, optional): The number of listings per index page. Defaults to 20.
+            latency (float, optional): Seconds added to every response. Defaults to 0.
+            error_rate (float, optional): The share of responses answered with a 500. Defaults to 0.
+            throttle_rate (float, optional): The share of responses answered with a 429 and Retry-After. Defaults to 0.
+            seed (int, optional): Seed of the error injection. Defaults to 0.
+        """
+        self.pages = pages
+        self.listings_per_page = listings_per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_served = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def __enter__(self) -> "FakeListingSite":
+        self.start()
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+    def start(self) -> None:
+        """
+        Start serving on a free localhost port in a background thread.
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are written separately; without this, delayed ACKs add ~40ms per response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                site._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+    def _inject(self) -> Optional[int]:
+        with self._random_lock:
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.requests += 1
+
+        status = self._inject()
+        headers = {}
+        if status == 429:
+            body, headers = "Too Many Requests", {"Retry-After": "1"}
+        elif status == 500:
+            body = "Internal Server Error"
+        else:
+            url = urlsplit(request.path)
+            if url.path.endswith("-listing"):
+                status, body = 200, self.detail_page(int(url.path.strip("/").split("-")[0]))
+            elif url.path.count("/") == 2:
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                status, body = 200, self.index_page(url.path, page)
+            else:
+                status, body = 404, "Not Found"
+
+        data = body.encode("utf-8")
+        self.bytes_served += len(data)
+        request.send_response(status)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+
+    def index_page(self, path: str, page: int) -> str:
+        """
+        Render index page `page`, empty past the last page.
+        """
+        listings = []
+        if 1 <= page <= self.pages:
+            first_id = (page - 1) * self.listings_per_page + 1
+            for listing_id in range(first_id, first_id + self.listings_per_page):
+                listings.append(
+                    INDEX_LISTING.format(
+                        listing_id=listing_id,
+                        title=f"{self._bedrooms(listing_id)} bedroom {self._property_type(listing_id)}",
+                        location=LOCATIONS[listing_id % len(LOCATIONS)],
+                    )
+                )
+        pagination = "".join(
+            f'<li><a href="{path}?page={number}">{number}</a></li>'
+            for number in sorted({1, 2, 3, self.pages})
+            if number <= self.pages
+        )
+        return (
+            "<html><body><div class=\"container\">"
+            + "".join(listings)
+            + f'<ul class="pagination">{pagination}</ul>'
+            + "</div></body></html>"
+        )
+
+
+    def detail_page(self, listing_id: int) -> str:
+        """
+        Render the detail page of a listing.
+        """
+        price = 500000 + (listing_id * 7919) % 200 * 250000
+        extras = ""
+        if listing_id % 3 == 0:
+            extras += "<td><strong>Servicing:</strong> Serviced</td>"
+        if listing_id % 4 == 0:
+            extras += "<td><strong>Furnishing:</strong> Furnished</td>"
+        return DETAIL_PAGE.format(
+            listing_id=listing_id,
+            title=f"Listing {listing_id}",
+            location=LOCATIONS[listing_id % len(LOCATIONS)],
+            price=price,
+            price_text=f"{price:,}",
+            property_type=self._property_type(listing_id),
+            bedrooms=self._bedrooms(listing_id),
+            bathrooms=self._bedrooms(listing_id),
+            toilets=self._bedrooms(listing_id) + 1,
+            extras=extras,
+            total_area=f"{300 + listing_id % 50 * 20:,}",
+            covered_area=f"{200 + listing_id % 30 * 10:,}",
+            description="Spacious and well finished. " * 40,
+        )
+
+
+    @staticmethod
+    def _bedrooms(listing_id: int) -> int:
+        return 1 + listing_id % 5
+
+
+    @staticmethod
+    def _property_type(listing_id: int) -> str:
+        return PROPERTY_TYPES[listing_id % len(PROPERTY_TYPES)]
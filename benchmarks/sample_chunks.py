@@ -0,0 +1,64 @@
+"""
+Scrape the local fake listing site into sample chunk files, laid out for the local (duckdb) dbt target.
+
+    python -m benchmarks.sample_chunks lag_house_dbt/chunks --pages 5
+
+Writes <out>/{city}_{category}_listings_raw/*.parquet and <out>/{city}_{category}_price_quantiles_raw/*.json
+for every category, so the dbt models can be built without a warehouse or real scraped data.
+"""
+
+import argparse
+import json
+import os
+from datetime import date
+
+from benchmarks.fake_site import FakeListingSite
+from dags.scripts import config
+from dags.scripts.chunk_writer import ParquetChunkWriter
+from dags.scripts.fetcher import ListingFetcher
+from dags.scripts.house_scrapper import HEADERS, create_session, fetch_page, price_quantile_rows, write_chunk
+from dags.scripts.quantile_sketch import PriceSketches
+
+
+def write_sample_chunks(site: FakeListingSite, out_dir: str, category: str, city: str, pages: int, scrape_date: str) -> int:
+    """Scrape pages 1..pages of the fake site into one parquet chunk and its price quantiles, returning the rows written."""
+    listings_dir = os.path.join(out_dir, f"{city}_{category}_listings_raw")
+    quantiles_dir = os.path.join(out_dir, f"{city}_{category}_price_quantiles_raw")
+    os.makedirs(listings_dir, exist_ok=True)
+    os.makedirs(quantiles_dir, exist_ok=True)
+    file_name = f"{city}_{category}_listings{scrape_date.replace('-', '')}"
+
+    session = create_session()
+    sketches = PriceSketches()
+    with open(os.path.join(listings_dir, f"{file_name}_1_{pages}.parquet"), "wb") as raw:
+        chunk_writer = ParquetChunkWriter(raw)
+        with ListingFetcher(fetch_page, session, HEADERS, max_workers=4) as fetcher:
+            rows = write_chunk(
+                chunk_writer, session, HEADERS, site.base_url, category.replace("_", "-"), city, 1, pages, fetcher,
+                max_empty_pages=1, scrape_date=scrape_date, sketches=sketches,
+            )
+        chunk_writer.close()
+
+    with open(os.path.join(quantiles_dir, f"{file_name}_price_quantiles.json"), "w") as output:
+        for row in price_quantile_rows(sketches, category, scrape_date):
+            output.write(json.dumps(row) + "\n")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write sample chunk files for the local dbt target.")
+    parser.add_argument("out_dir", type=str, help="Directory of the chunk files, LAG_HOUSE_CHUNK_DIR of the dbt target.")
+    parser.add_argument("--pages", type=int, default=5, help="Index pages scraped per category.")
+    parser.add_argument("--listings-per-page", type=int, default=20, help="Listings on every index page.")
+    parser.add_argument("--scrape-date", type=str, default=date.today().isoformat(), help="Scrape date of the rows.")
+    args = parser.parse_args()
+
+    with FakeListingSite(pages=args.pages, listings_per_page=args.listings_per_page) as site:
+        for city in config.SCRAPE_CITIES:
+            for category in config.SCRAPE_CATEGORIES:
+                rows = write_sample_chunks(site, args.out_dir, category, city, args.pages, args.scrape_date)
+                print(f"{city}_{category}: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,8 @@ from airflow.utils.dates import days_ago
 from airflow.operators.empty import EmptyOperator
 from airflow.operators.bash import BashOperator
 from airflow.sensors.external_task import ExternalTaskSensor
-from airflow.models import Variable
-
-# Get the city variable
-city = Variable.get("city")
+from dags.scripts import config
+from dags.scripts.dag_factory import scrape_dag_id
 
 
 # dag args
@@ -34,30 +32,31 @@ dag = DAG(
     start_date=days_ago(1),
     catchup=False,
     tags=tags,
+    # trigger with {"full_refresh": true} to rebuild the incremental models from scratch, e.g. after their
+    # columns change; needed once on the first deploy of the incremental models over the old tables
+    params={"full_refresh": False},
 )
 
 start = EmptyOperator(dag=dag, task_id="start")
 
-wait_for_sale_houses = ExternalTaskSensor(
-    task_id='wait_for_sale_houses',
-    external_dag_id=f"{city}_for_sale_listings_full_load",
-    external_task_id=None,
-    mode='reschedule',
-    dag=dag
-)
-
-wait_for_rental_houses = ExternalTaskSensor(
-    task_id='wait_for_rental_houses',
-    external_dag_id=f"{city}_for_rent_listings_full_load",
-    external_task_id=None,
-    mode='reschedule',
-    dag=dag
-)
+# wait for the scrape DAG of every category and city
+wait_for_scrapes = [
+    ExternalTaskSensor(
+        task_id=f'wait_for_{scrape_dag_id(category, city)}',
+        external_dag_id=scrape_dag_id(category, city),
+        external_task_id=None,
+        mode='reschedule',
+        dag=dag
+    )
+    for city in config.SCRAPE_CITIES
+    for category in config.SCRAPE_CATEGORIES
+]
 
 run_dbt_models = BashOperator(
     task_id='run_dbt_models',
-    bash_command= 'dbt run --profiles-dir /home/airflow/gcs/data/dbt/lag_house_dbt --project-dir /home/airflow/gcs/data/dbt/lag_house_dbt',
+    bash_command= 'dbt run --profiles-dir /home/airflow/gcs/data/dbt/lag_house_dbt --project-dir /home/airflow/gcs/data/dbt/lag_house_dbt'
+                  "{{ ' --full-refresh' if params.full_refresh else '' }}",
     dag=dag
 )
 
-start >> [wait_for_sale_houses, wait_for_rental_houses] >> run_dbt_models
\ No newline at end of file
+start >> wait_for_scrapes >> run_dbt_models
\ No newline at end of file
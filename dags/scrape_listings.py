@@ -0,0 +1,11 @@
+from typing import Dict
+
+# airflow's safe mode only parses files mentioning both "airflow" and "dag", this import keeps the file discoverable
+from airflow import DAG
+
+from dags.scripts.dag_factory import create_scrape_dags
+
+# one scrape DAG per category and city in dags/scripts/config.py, e.g. lagos_for_sale_listings_full_load;
+# the scheduler picks up DAGs bound to module globals
+scrape_dags: Dict[str, DAG] = create_scrape_dags()
+globals().update(scrape_dags)
@@ -1,32 +1,99 @@
+import hashlib
 import json
-from google.cloud import bigquery, storage
+import os
+import tempfile
+import threading
+import time
+from google.cloud import bigquery
 
+SCHEMA_CACHE_DIR = os.environ.get(
+    "LAG_HOUSE_SCHEMA_CACHE", os.path.join(tempfile.gettempdir(), "lag_house_schema_cache")
+)
+SCHEMA_CACHE_TTL = 3600  # seconds a cached schema is used without asking GCS whether it changed
 
+_schemas = {}  # in-process memo: schema_path -> {"schema", "generation", "checked_at"}
+_schemas_lock = threading.Lock()
 
-def load_schema(schema_path):
-    if schema_path.startswith("gs://"):
-        # If the path is a GCS URI, use the Google Cloud Storage client to fetch the file
-        storage_client = storage.Client()
 
-        # Extract the bucket name and the blob (file) name from the GCS URI
-        bucket_name = schema_path.split("/")[2]
-        blob_name = "/".join(schema_path.split("/")[3:])
+def split_gcs_uri(uri):
+    # gs://bucket/path/to/blob -> ("bucket", "path/to/blob")
+    bucket_name, _, blob_name = uri[len("gs://"):].partition("/")
+    return bucket_name, blob_name
 
-        # Get the bucket and the blob
-        bucket = storage_client.get_bucket(bucket_name)
-        blob = bucket.blob(blob_name)
 
-        # Download the contents of the blob as a string and parse it as JSON
-        schema_json = blob.download_as_text()
-        schema = json.loads(schema_json)
-    else:
+def _cache_file(schema_path):
+    return os.path.join(SCHEMA_CACHE_DIR, hashlib.sha1(schema_path.encode("utf-8")).hexdigest() + ".json")
+
+
+def _read_cache_file(schema_path):
+    try:
+        with open(_cache_file(schema_path), "r") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache_file(schema_path, entry):
+    # write then rename, so concurrent readers never see a partial file
+    os.makedirs(SCHEMA_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=SCHEMA_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as tmp:
+        json.dump(entry, tmp)
+    os.replace(tmp_path, _cache_file(schema_path))
+
+
+def _fetch_gcs_schema(schema_path, cached):
+    # imported here, gcp_manager imports this module
+    from dags.scripts import config
+    from dags.scripts.gcp_manager import GCSManager
+
+    bucket_name, blob_name = split_gcs_uri(schema_path)
+    blob = GCSManager(project_id=config.PROJECT_ID).get_bucket(bucket_name).blob(blob_name)
+    if cached is not None:
+        # a metadata request is cheaper than downloading the schema again
+        blob.reload()
+        if blob.generation == cached["generation"]:
+            return dict(cached, checked_at=time.time())
+    schema = json.loads(blob.download_as_text())
+    return {"schema": schema, "generation": blob.generation, "checked_at": time.time()}
+
+
+def load_schema(schema_path, ttl=SCHEMA_CACHE_TTL):
+    if not schema_path.startswith("gs://"):
         # If the path is a local file path, load it directly
         with open(schema_path, 'r') as schema_file:
-            schema = json.load(schema_file)
-    return schema
+            return json.load(schema_file)
+
+    # GCS schemas are memoized in process and cached on local disk for ttl seconds;
+    # after that, the blob generation tells whether the cached copy is still current.
+    with _schemas_lock:
+        cached = _schemas.get(schema_path) or _read_cache_file(schema_path)
+        if cached is not None and time.time() - cached["checked_at"] < ttl:
+            _schemas[schema_path] = cached
+            return cached["schema"]
+
+        entry = _fetch_gcs_schema(schema_path, cached)
+        _schemas[schema_path] = entry
+        try:
+            _write_cache_file(schema_path, entry)
+        except OSError:
+            pass  # the in-process memo still works on a read-only disk
+        return entry["schema"]
+
+
+def clear_schema_cache():
+    with _schemas_lock:
+        _schemas.clear()
+
+
+def time_partitioning(partition_field=None, partition_type="DAY"):
+    if partition_field is None:
+        return None
+    return bigquery.TimePartitioning(type_=partition_type, field=partition_field)
 
 
-def fetch_job_config(file_format, schema, field_delimiter, create_disposition='CREATE_IF_NEEDED', write_disposition='WRITE_APPEND'):
+def fetch_job_config(file_format, schema, field_delimiter, create_disposition='CREATE_IF_NEEDED', write_disposition='WRITE_APPEND',
+                     partitioning=None, clustering_fields=None):
     # write_disposition='WRITE_TRUNCATE'
     config_dict = {
     "json" : bigquery.LoadJobConfig(
@@ -61,4 +128,10 @@ def fetch_job_config(file_format, schema, field_delimiter, create_disposition='C
        write_disposition = write_disposition
     )
     }
-    return config_dict[file_format]
\ No newline at end of file
+    job_config = config_dict[file_format]
+    # only applied when the load creates the table
+    if partitioning is not None:
+        job_config.time_partitioning = partitioning
+    if clustering_fields:
+        job_config.clustering_fields = clustering_fields
+    return job_config
\ No newline at end of file
@@ -0,0 +1,288 @@
+"""
+Appending typed rows to BigQuery tables through the Storage Write API
+"""
+
+import logging
+from collections import deque
+from datetime import date
+from typing import Any, Deque, Dict, Iterable, List, Sequence, Tuple
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+from dags.scripts.chunk_writer import COLUMNS, DATE_COLUMNS, FLOAT_COLUMNS, INT_COLUMNS, ListingRecord, Row, typed_value
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# (column, BigQuery type) of the raw listing tables, in the order of the chunk files
+LISTING_COLUMNS: List[Tuple[str, str]] = [
+    (
+        column,
+        "INT64" if column in INT_COLUMNS
+        else "FLOAT64" if column in FLOAT_COLUMNS
+        else "DATE" if column in DATE_COLUMNS
+        else "STRING",
+    )
+    for column in COLUMNS
+]
+
+PROTO_TYPES = {
+    "INT64": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "FLOAT64": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "STRING": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "BOOL": descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+    # the Storage Write API takes DATE values as days since the epoch
+    "DATE": descriptor_pb2.FieldDescriptorProto.TYPE_INT32,
+}
+
+_EPOCH = date(1970, 1, 1)
+
+STREAM_MODES = ("committed", "pending")
+
+# AppendRows requests are limited to 10 MB; leave room for the request envelope.
+MAX_REQUEST_BYTES = 9 * 1024 * 1024
+
+
+def row_message_class(columns: Sequence[Tuple[str, str]], name: str = "ListingRow") -> Tuple[type, Any]:
+    """
+    Build a protobuf message class with one optional field per column.
+
+    Returns:
+        Tuple[type, descriptor_pb2.DescriptorProto]: The message class, and its descriptor for the writer schema.
+    """
+    file_proto = descriptor_pb2.FileDescriptorProto(name=f"{name}.proto", package="lag_house", syntax="proto2")
+    message_proto = file_proto.message_type.add(name=name)
+    for number, (column, column_type) in enumerate(columns, start=1):
+        message_proto.field.add(
+            name=column,
+            number=number,
+            type=PROTO_TYPES[column_type],
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+        )
+
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    descriptor = pool.FindMessageTypeByName(f"lag_house.{name}")
+    descriptor_proto = descriptor_pb2.DescriptorProto()
+    descriptor.CopyToProto(descriptor_proto)
+    return message_factory.GetMessageClass(descriptor), descriptor_proto
+
+
+class StorageWriteTransport:
+    """
+    The Storage Write API calls made by BigQueryAppendStream, over google-cloud-bigquery-storage.
+
+    Tests substitute an object with the same methods that keeps rows in memory.
+    """
+
+    def __init__(self, client=None):
+        """
+        Initialize the StorageWriteTransport class.
+
+        Args:
+            client (BigQueryWriteClient, optional): The write client. Defaults to a new client.
+        """
+        # Optional dependency, only needed when rows are streamed to BigQuery.
+        from google.cloud import bigquery_storage_v1
+
+        self._types = bigquery_storage_v1.types
+        self._writer = bigquery_storage_v1.writer
+        self.client = client or bigquery_storage_v1.BigQueryWriteClient()
+        self._connections: Dict[str, Any] = {}
+
+
+    def create_stream(self, table_path: str, mode: str) -> str:
+        """
+        Create a write stream on a table, returning its name.
+        """
+        stream_types = self._types.WriteStream.Type
+        stream_type = stream_types.PENDING if mode == "pending" else stream_types.COMMITTED
+        write_stream = self.client.create_write_stream(
+            parent=table_path, write_stream=self._types.WriteStream(type_=stream_type)
+        )
+        return write_stream.name
+
+
+    def append(self, stream_name: str, descriptor_proto, serialized_rows: List[bytes], offset: int):
+        """
+        Send serialized rows at offset, returning a future that resolves once they are written.
+        """
+        connection = self._connections.get(stream_name)
+        if connection is None:
+            # The writer schema is sent once, with the first request of the connection.
+            template = self._types.AppendRowsRequest(
+                write_stream=stream_name,
+                proto_rows=self._types.AppendRowsRequest.ProtoData(
+                    writer_schema=self._types.ProtoSchema(proto_descriptor=descriptor_proto)
+                ),
+            )
+            connection = self._connections[stream_name] = self._writer.AppendRowsStream(self.client, template)
+
+        request = self._types.AppendRowsRequest(
+            offset=offset,
+            proto_rows=self._types.AppendRowsRequest.ProtoData(
+                rows=self._types.ProtoRows(serialized_rows=serialized_rows)
+            ),
+        )
+        return connection.send(request)
+
+
+    def finalize(self, stream_name: str) -> int:
+        """
+        Close the connection of a stream and finalize it, returning the number of rows it holds.
+        """
+        connection = self._connections.pop(stream_name, None)
+        if connection is not None:
+            connection.close()
+        return self.client.finalize_write_stream(name=stream_name).row_count
+
+
+    def commit(self, table_path: str, stream_names: List[str]) -> None:
+        """
+        Atomically make the rows of finalized pending streams visible in the table.
+        """
+        response = self.client.batch_commit_write_streams(
+            request=self._types.BatchCommitWriteStreamsRequest(parent=table_path, write_streams=stream_names)
+        )
+        if response.stream_errors:
+            raise RuntimeError(f"Failed to commit write streams to {table_path}: {list(response.stream_errors)}")
+
+
+class BigQueryAppendStream:
+    """
+    Append typed rows to a BigQuery table through one Storage Write API stream.
+
+    Rows are converted to the column types, serialized and sent in batches with explicit
+    offsets, so a retried request can never write a batch twice. In "committed" mode rows
+    are queryable as soon as each batch is written; in "pending" mode they become visible
+    all at once on close(), and are discarded if the stream is aborted.
+
+    It has the write_rows/rows_written/close interface of the chunk writers.
+    """
+
+    def __init__(
+        self,
+        transport,
+        table_path: str,
+        columns: Sequence[Tuple[str, str]] = LISTING_COLUMNS,
+        mode: str = "committed",
+        max_batch_rows: int = 500,
+        max_inflight: int = 4,
+    ):
+        """
+        Initialize the BigQueryAppendStream class and create its write stream.
+
+        Args:
+            transport (StorageWriteTransport): The Storage Write API calls, or a fake of them.
+            table_path (str): The table, as projects/{project}/datasets/{dataset}/tables/{table}.
+            columns (Sequence[Tuple[str, str]], optional): (column, BigQuery type) pairs. Defaults to LISTING_COLUMNS.
+            mode (str, optional): "committed" or "pending". Defaults to "committed".
+            max_batch_rows (int, optional): The number of rows sent per request. Defaults to 500.
+            max_inflight (int, optional): The number of requests awaiting a response at once. Defaults to 4.
+        """
+        if mode not in STREAM_MODES:
+            raise ValueError(f"Unknown stream mode {mode!r}, expected one of {STREAM_MODES}")
+        self.transport = transport
+        self.table_path = table_path
+        self.columns = list(columns)
+        self.mode = mode
+        self.max_batch_rows = max_batch_rows
+        self.max_inflight = max(1, max_inflight)
+        self.message_class, self.descriptor_proto = row_message_class(self.columns)
+        self.stream_name = transport.create_stream(table_path, mode)
+        self._batch: List[bytes] = []
+        self._batch_bytes = 0
+        self._inflight: Deque = deque()
+        self.offset = 0
+        self.rows_written = 0
+        self.closed = False
+
+
+    def __enter__(self) -> "BigQueryAppendStream":
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        """
+        Queue listing records, or rows converted to the column types, sending a batch whenever one is full.
+        """
+        for row in rows:
+            if isinstance(row, ListingRecord):
+                fields = {column: getattr(row, column, None) for column, _ in self.columns}
+            else:
+                fields = {column: typed_value(column, row.get(column)) for column, _ in self.columns}
+            for column, value in fields.items():
+                if isinstance(value, date):
+                    fields[column] = (value - _EPOCH).days
+            data = self.message_class(**{column: value for column, value in fields.items() if value is not None})
+            serialized = data.SerializeToString()
+            if self._batch and (
+                len(self._batch) >= self.max_batch_rows or self._batch_bytes + len(serialized) > MAX_REQUEST_BYTES
+            ):
+                self.flush()
+            self._batch.append(serialized)
+            self._batch_bytes += len(serialized)
+            self.rows_written += 1
+
+
+    def flush(self) -> None:
+        """
+        Send the queued rows, waiting for the oldest request while too many are in flight.
+        """
+        if not self._batch:
+            return
+        self._inflight.append(
+            self.transport.append(self.stream_name, self.descriptor_proto, self._batch, self.offset)
+        )
+        self.offset += len(self._batch)
+        self._batch, self._batch_bytes = list(), 0
+        while len(self._inflight) > self.max_inflight:
+            self._inflight.popleft().result()
+
+
+    def _drain(self) -> None:
+        while self._inflight:
+            self._inflight.popleft().result()
+
+
+    def close(self) -> int:
+        """
+        Send the remaining rows, finalize the stream and, in pending mode, commit it.
+
+        Returns:
+            int: The number of rows in the stream.
+        """
+        if self.closed:
+            return self.offset
+        self.flush()
+        self._drain()
+        row_count = self.transport.finalize(self.stream_name)
+        if self.mode == "pending":
+            self.transport.commit(self.table_path, [self.stream_name])
+        self.closed = True
+        logging.info(f"Appended {row_count} rows to {self.table_path} through {self.mode} stream {self.stream_name}")
+        return row_count
+
+
+    def abort(self) -> None:
+        """
+        Stop the stream without committing it; rows of a pending stream are discarded.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._batch = list()
+        try:
+            self._drain()
+            self.transport.finalize(self.stream_name)
+        except Exception as e:
+            logging.warning(f"Failed to finalize aborted stream {self.stream_name}: {e}")
+        logging.warning(f"Aborted {self.mode} stream {self.stream_name} on {self.table_path}")
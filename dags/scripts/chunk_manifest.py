@@ -0,0 +1,144 @@
+"""
+Checkpoint manifest recording which chunks of a scrape run are already in GCS
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from google.api_core.exceptions import PreconditionFailed
+from google.cloud.exceptions import NotFound
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _chunk_key(chunk_start: int, chunk_end: int) -> str:
+    return f"{chunk_start}_{chunk_end}"
+
+
+class ChunkManifest:
+    """
+    JSON manifest of completed chunks and in-progress page offsets for one scrape run.
+
+    The manifest looks like:
+        {"completed": {"1_20": {"object": ..., "completed_at": ...}},
+         "in_progress": {"21_40": {"page": 27, "updated_at": ...}}}
+
+    Shards of the same run share the manifest, so every write is a read-modify-write
+    guarded by the blob generation and retried when another shard got there first.
+    """
+
+    def __init__(self, gcs_client, bucket_name: str, blob_name: str, progress_interval: float = 30.0):
+        """
+        Initialize the ChunkManifest class.
+
+        Args:
+            gcs_client (GCSManager): The GCS manager used to read and write the manifest.
+            bucket_name (str): The Google Cloud Storage bucket holding the run's chunks.
+            blob_name (str): The name of the manifest blob.
+            progress_interval (float, optional): The minimum number of seconds between page offset writes. Defaults to 30.
+        """
+        self.gcs_client = gcs_client
+        self.bucket_name = bucket_name
+        self.blob_name = blob_name
+        self.progress_interval = progress_interval
+        self.completed: Dict[str, Dict] = {}
+        self.in_progress: Dict[str, Dict] = {}
+        self._last_progress_write = 0.0
+
+
+    def _blob(self):
+        return self.gcs_client.get_bucket(self.bucket_name).blob(self.blob_name)
+
+
+    def _read(self):
+        blob = self._blob()
+        try:
+            state = json.loads(blob.download_as_bytes())
+        except NotFound:
+            return {"completed": {}, "in_progress": {}}, 0
+        return state, blob.generation
+
+
+    def load(self) -> "ChunkManifest":
+        """
+        Read the manifest from Google Cloud Storage, starting empty if it does not exist yet.
+        """
+        state, _ = self._read()
+        self.completed = state.get("completed", {})
+        self.in_progress = state.get("in_progress", {})
+        logging.info(f"Loaded manifest {self.blob_name} with {len(self.completed)} completed chunks")
+        return self
+
+
+    def _update(self, apply: Callable[[Dict], None], attempts: int = 10) -> None:
+        for attempt in range(attempts):
+            state, generation = self._read()
+            state.setdefault("completed", {})
+            state.setdefault("in_progress", {})
+            apply(state)
+            try:
+                self._blob().upload_from_string(
+                    json.dumps(state, indent=1),
+                    content_type="application/json",
+                    if_generation_match=generation,
+                )
+            except PreconditionFailed:
+                time.sleep(0.1 * (attempt + 1))
+                continue
+            self.completed = state["completed"]
+            self.in_progress = state["in_progress"]
+            return
+        raise RuntimeError(f"Could not update manifest {self.blob_name} after {attempts} attempts")
+
+
+    def is_complete(self, chunk_start: int, chunk_end: int) -> bool:
+        """
+        Check whether a chunk has already been uploaded in this run.
+        """
+        return _chunk_key(chunk_start, chunk_end) in self.completed
+
+
+    def completed_object(self, chunk_start: int, chunk_end: int) -> Optional[str]:
+        """
+        Get the object name recorded for a completed chunk.
+        """
+        entry = self.completed.get(_chunk_key(chunk_start, chunk_end))
+        return entry["object"] if entry else None
+
+
+    def mark_page(self, chunk_start: int, chunk_end: int, page: int, force: bool = False) -> None:
+        """
+        Record the last page scraped in an in-progress chunk, at most once per progress_interval.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_progress_write < self.progress_interval:
+            return
+        self._last_progress_write = now
+
+        def apply(state):
+            state["in_progress"][_chunk_key(chunk_start, chunk_end)] = {"page": page, "updated_at": _now()}
+
+        self._update(apply)
+
+
+    def mark_complete(self, chunk_start: int, chunk_end: int, object_name: str) -> None:
+        """
+        Record that a chunk has been uploaded.
+        """
+        key = _chunk_key(chunk_start, chunk_end)
+
+        def apply(state):
+            state["in_progress"].pop(key, None)
+            state["completed"][key] = {"object": object_name, "completed_at": _now()}
+
+        self._update(apply)
+        logging.info(f"Marked chunk {key} complete in manifest {self.blob_name}")
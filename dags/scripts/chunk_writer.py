@@ -0,0 +1,243 @@
+"""
+Writers serializing scraped listings into chunk files
+"""
+
+import csv
+import gzip
+import io
+import re
+from contextlib import contextmanager
+from datetime import date
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+COLUMNS = [
+    "location", "status", "bedrooms", "bathrooms", "toilets", "property_type",
+    "is_furnished", "is_serviced", "is_shared", "total_area", "covered_area",
+    "price", "currency", "lga", "neighborhood", "gazetteer_version", "listing_url", "scrape_date",
+]
+
+
+class CsvChunkWriter:
+    """
+    Write listing rows as CSV to a text stream, one page at a time.
+    """
+
+    extension = "csv"
+    content_type = "text/csv"
+
+    def __init__(self, stream: TextIO):
+        """
+        Initialize the CsvChunkWriter class and write the header row.
+
+        Args:
+            stream (TextIO): The text stream receiving the CSV content.
+        """
+        self.csv_writer = csv.writer(stream)
+        self.csv_writer.writerow(COLUMNS)
+        self.rows_written = 0
+
+
+    def write_rows(self, rows: Iterable["Row"]) -> None:
+        """
+        Write listing rows or records, leaving missing fields empty.
+        """
+        for row in rows:
+            if isinstance(row, ListingRecord):
+                self.csv_writer.writerow(["" if value is None else value for value in row.values()])
+            else:
+                self.csv_writer.writerow([row.get(key, "") for key in COLUMNS])
+            self.rows_written += 1
+
+
+    def close(self) -> None:
+        pass
+
+
+INT_COLUMNS = ("bedrooms", "bathrooms", "toilets")
+FLOAT_COLUMNS = ("total_area", "covered_area", "price")
+DATE_COLUMNS = ("scrape_date",)
+DICTIONARY_COLUMNS = ("location", "property_type", "lga", "neighborhood", "gazetteer_version")
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def to_float(value: Optional[str]) -> Optional[float]:
+    """Parse the leading number of a scraped value such as "1,200 sqm", or None if there is none."""
+    if not value:
+        return None
+    match = _NUMBER.search(value.replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def to_int(value: Optional[str]) -> Optional[int]:
+    """Parse a scraped whole number such as a room count, or None if there is none."""
+    number = to_float(value)
+    return int(number) if number is not None else None
+
+
+def typed_value(column: str, value: Optional[str]) -> Union[int, float, str, date, None]:
+    """Convert a scraped value to the type of its column, with None for missing or unparseable values."""
+    if column in INT_COLUMNS:
+        return to_int(value)
+    if column in FLOAT_COLUMNS:
+        return to_float(value)
+    if column in DATE_COLUMNS:
+        return date.fromisoformat(value) if value else None
+    return value if value != "" else None
+
+
+class ListingRecord:
+    """
+    One listing with every column of COLUMNS converted to its type once, as an attribute.
+
+    Slots instead of a per-row dict keep rows small, and the writers take the typed values
+    as they are instead of parsing strings again.
+    """
+
+    __slots__ = tuple(COLUMNS)
+
+    def __init__(self, **values):
+        for column in COLUMNS:
+            setattr(self, column, values.get(column))
+
+
+    @classmethod
+    def from_row(cls, row: Dict[str, str], **extra: Optional[str]) -> "ListingRecord":
+        """
+        Convert a scraped row, plus the extra columns given as keywords, to their column types.
+        """
+        record = cls.__new__(cls)
+        for column in COLUMNS:
+            setattr(record, column, typed_value(column, extra[column] if column in extra else row.get(column)))
+        return record
+
+
+    def get(self, column: str, default=None):
+        value = getattr(self, column, None)
+        return default if value is None else value
+
+
+    def values(self) -> Tuple:
+        """
+        The typed values, in the order of COLUMNS.
+        """
+        return tuple(getattr(self, column) for column in COLUMNS)
+
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ListingRecord) and self.values() == other.values()
+
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{column}={getattr(self, column)!r}" for column in COLUMNS if getattr(self, column) is not None)
+        return f"ListingRecord({fields})"
+
+
+Row = Union[Dict[str, str], ListingRecord]
+
+
+class ParquetChunkWriter:
+    """
+    Write listing rows as Parquet with typed numeric columns to a binary stream.
+
+    Rows are buffered until row_group_size of them are collected, so memory stays
+    bounded by one row group whatever the chunk size.
+    """
+
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+
+    def __init__(self, stream: BinaryIO, row_group_size: int = 5000):
+        """
+        Initialize the ParquetChunkWriter class.
+
+        Args:
+            stream (BinaryIO): The binary stream receiving the Parquet file. It is not closed by close().
+            row_group_size (int, optional): The number of rows per row group. Defaults to 5000.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.schema = pa.schema(
+            [
+                (column, self._arrow_type(pa, column))
+                for column in COLUMNS
+            ]
+        )
+        self.row_group_size = row_group_size
+        self.parquet_writer = pq.ParquetWriter(
+            stream, self.schema, compression="zstd", use_dictionary=list(DICTIONARY_COLUMNS)
+        )
+        self._columns: Dict[str, List] = {column: [] for column in COLUMNS}
+        self._buffered = 0
+        self.rows_written = 0
+
+
+    @staticmethod
+    def _arrow_type(pa, column: str):
+        if column in INT_COLUMNS:
+            return pa.int64()
+        if column in FLOAT_COLUMNS:
+            return pa.float64()
+        if column in DATE_COLUMNS:
+            return pa.date32()
+        return pa.string()
+
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        """
+        Append listing records, or rows converted to typed columns, leaving missing or unparseable fields null.
+        """
+        columns = list(self._columns.values())
+        for row in rows:
+            typed = row.values() if isinstance(row, ListingRecord) else [typed_value(column, row.get(column)) for column in COLUMNS]
+            for values, value in zip(columns, typed):
+                values.append(value)
+            self._buffered += 1
+            self.rows_written += 1
+            if self._buffered >= self.row_group_size:
+                self._flush()
+
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+        table = self._pa.Table.from_pydict(self._columns, schema=self.schema)
+        self.parquet_writer.write_table(table)
+        for values in self._columns.values():
+            values.clear()
+        self._buffered = 0
+
+
+    def close(self) -> None:
+        """
+        Write the buffered rows and the Parquet footer.
+        """
+        self._flush()
+        self.parquet_writer.close()
+
+
+ChunkWriter = Union[CsvChunkWriter, ParquetChunkWriter]
+
+
+@contextmanager
+def open_text_stream(raw: BinaryIO, compress: bool = False) -> Iterator[TextIO]:
+    """
+    Layer an (optionally gzip-compressed) UTF-8 text stream over a binary stream.
+
+    The binary stream is flushed but not closed, so the caller stays in charge of finalizing it.
+
+    Args:
+        raw (BinaryIO): The binary stream, e.g. a GCS blob writer.
+        compress (bool, optional): Gzip the bytes before they reach raw. Defaults to False.
+    """
+    binary = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+    text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    try:
+        yield text
+    finally:
+        # Detach (which flushes) so closing the wrapper does not close raw before the caller finalizes it.
+        text.detach()
+        if compress:
+            binary.close()
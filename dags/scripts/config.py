@@ -1,4 +1,42 @@
 PROJECT_ID = "vee-de"
+
+# dags/scrape_listings.py generates one scrape DAG per category and city
+SCRAPE_CATEGORIES = ["for_sale", "for_rent"]
+SCRAPE_CITIES = ["lagos"]
+SCRAPE_SCHEDULE = "0 0 31 * *" # the 31st day of every month
+SCRAPE_OUTPUT_FORMAT = "parquet" # "csv" chunks are loaded with the lag_house_schema schema instead
+SCRAPE_OPTIONS = {
+    'discover_pages': True,
+    'max_empty_pages': 3,
+    'max_workers': 8,
+    'per_host_limit': 4,
+    'max_request_rate': 5.0, # per shard, the limiter backs off below this on 429/5xx
+    'parse_workers': 2, # parser processes per shard, parsing overlaps with fetching the next page
+    'chunk_size': 20,
+    'incremental': True,
+    'resume': True,
+    'stream': True,
+    'compress': True,
+    'sketch_prices': True, # price quantile sketches per chunk, merged into the price_quantiles tables
+}
+
+# raw listing tables keep one partition per scrape month, loaded through a partition decorator
+RAW_PARTITION_FIELD = "scrape_date"
+RAW_PARTITION_TYPE = "MONTH"
+RAW_CLUSTERING_FIELDS = ["lga", "property_type"]
+# strftime format of the partition decorator (table$partition) for each partitioning type
+PARTITION_DECORATOR_FORMATS = {"HOUR": "%Y%m%d%H", "DAY": "%Y%m%d", "MONTH": "%Y%m", "YEAR": "%Y"}
+
+# rows written by house_scrapper.merge_price_sketches, loaded into the {city}_{category}_price_quantiles_raw tables
+PRICE_QUANTILES_SCHEMA = [
+    {"name": "scrape_date", "type": "DATE", "mode": "REQUIRED"},
+    {"name": "lga", "type": "STRING", "mode": "NULLABLE"},
+    {"name": "property_type", "type": "STRING", "mode": "NULLABLE"},
+    {"name": "listing_type", "type": "STRING", "mode": "REQUIRED"},
+    {"name": "listing_count", "type": "INTEGER", "mode": "REQUIRED"},
+    {"name": "price_p50", "type": "FLOAT", "mode": "NULLABLE"},
+    {"name": "price_p90", "type": "FLOAT", "mode": "NULLABLE"},
+]
 # BASE_URL = 'https://nigeriapropertycentre.com/'
 # SEARCH_MODE = 'for-sale'
 # CITY = 'lagos'
@@ -0,0 +1,208 @@
+"""
+Generation of the scrape DAGs, one per listing category and city
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+from airflow.providers.google.cloud.transfers.gcs_to_bigquery import GCSToBigQueryOperator
+from airflow.utils.dates import days_ago
+
+from dags.scripts import config
+
+# Airflow Variables are rendered when a task runs, so parsing a DAG file never queries the metadata DB.
+BASE_URL = "{{ var.value.base_url }}"
+START_PAGE = "{{ var.value.start_page }}"
+END_PAGE = "{{ var.value.end_page }}" # only a hint, the real last page is discovered at runtime
+GCS_BUCKET_NAME = "{{ var.value.bucket_name }}"
+# the day the run was scheduled for; the same on every retry of the run
+SCRAPE_DATE = "{{ data_interval_end | ds }}"
+# the raw table partition holding that day, e.g. $202410 for MONTH partitioning
+SCRAPE_PARTITION = f"${{{{ data_interval_end.strftime('{config.PARTITION_DECORATOR_FORMATS[config.RAW_PARTITION_TYPE]}') }}}}"
+BQ_DATASET = "{{ var.value.project_id }}.{{ var.value.dataset_id }}"
+# lag_house_schema is a gs://bucket/path URI
+SCHEMA_BUCKET_NAME = "{{ var.value.lag_house_schema.split('/')[2] }}"
+SCHEMA_OBJECT = "{{ var.value.lag_house_schema.split('/', 3)[3] }}"
+
+default_args = {
+    "owner": "VEE",
+    "depends_on_past": False,
+    "start_date": datetime(2024, 1, 1),
+    "email_on_failure": False,
+    "email_on_retry": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=4),
+}
+
+
+# The scraper pulls in requests, lxml, pyarrow and the google-cloud clients; these callables
+# import it when a task runs instead of every time the scheduler parses the DAG file.
+def plan_shards(**kwargs):
+    """Plan the shards of a scrape, see house_scrapper.plan_chunks."""
+    from dags.scripts.house_scrapper import plan_chunks
+    return plan_chunks(**kwargs)
+
+
+def scrape_shard(**kwargs):
+    """Scrape and upload one shard, see house_scrapper.scrape_chunk_and_upload."""
+    from dags.scripts.house_scrapper import scrape_chunk_and_upload
+    return scrape_chunk_and_upload(**kwargs)
+
+
+def merge_index(**kwargs):
+    """Merge the listing index parts of the shards, see house_scrapper.merge_listing_index."""
+    from dags.scripts.house_scrapper import merge_listing_index
+    return merge_listing_index(**kwargs)
+
+
+def merge_sketches(**kwargs):
+    """Merge the price sketches of the shards, see house_scrapper.merge_price_sketches."""
+    from dags.scripts.house_scrapper import merge_price_sketches
+    return merge_price_sketches(**kwargs)
+
+
+def scrape_dag_id(category: str, city: str) -> str:
+    return f"{city}_{category}_listings_full_load"
+
+
+def create_scrape_dag(
+    category: str,
+    city: str,
+    schedule_interval: str = config.SCRAPE_SCHEDULE,
+    output_format: str = config.SCRAPE_OUTPUT_FORMAT,
+    scrape_options: Optional[Dict] = None,
+) -> DAG:
+    """
+    Build the DAG scraping the listings of one category and city into GCS and loading them into BigQuery.
+
+    Args:
+        category (str): The listing category, e.g. "for_sale".
+        city (str): The city whose listings are scraped.
+        schedule_interval (str, optional): The schedule of the DAG. Defaults to config.SCRAPE_SCHEDULE.
+        output_format (str, optional): "parquet" or "csv". Defaults to config.SCRAPE_OUTPUT_FORMAT.
+        scrape_options (Optional[Dict], optional): Options passed on to plan_chunks. Defaults to config.SCRAPE_OPTIONS.
+
+    Returns:
+        DAG: The scrape DAG.
+    """
+    scrape_options = config.SCRAPE_OPTIONS if scrape_options is None else scrape_options
+    file_name = f"{city}_{category}_listings{{{{ ds_nodash }}}}"
+    chunk_extension = "parquet" if output_format == "parquet" else "csv.gz"
+
+    dag = DAG(
+        dag_id=scrape_dag_id(category, city),
+        default_args=default_args,
+        description=f"ELT DAG for scraping {category} listings in {city}, loading them to GCS and then to BigQuery",
+        schedule_interval=schedule_interval,
+        start_date=days_ago(1),
+        catchup=False,
+        tags=[f"{category}", city, "scrape", "raw", "full load"],
+    )
+
+    start = EmptyOperator(dag=dag, task_id="start")
+
+    plan = PythonOperator(
+        task_id='plan_shards',
+        python_callable=plan_shards,
+        op_kwargs={
+            **scrape_options,
+            'bucket_name': GCS_BUCKET_NAME,
+            'file_name': file_name,
+            'base_url': BASE_URL,
+            'category': category,
+            'city': city,
+            'start_page': START_PAGE,
+            'end_page': END_PAGE,
+            'output_format': output_format,
+            'scrape_date': SCRAPE_DATE,
+        },
+        dag=dag,
+    )
+
+    # one mapped task instance per chunk, each uploading its own _{start}_{end} file
+    scrape_to_gcs = PythonOperator.partial(
+        task_id='scrape_to_gcs',
+        python_callable=scrape_shard,
+        max_active_tis_per_dag=8,
+        dag=dag,
+    ).expand(op_kwargs=plan.output)
+
+    # fold the index entries written by each shard into the listing index, even if some shards failed
+    merge = PythonOperator(
+        task_id='merge_listing_index',
+        python_callable=merge_index,
+        op_kwargs={
+            'bucket_name': GCS_BUCKET_NAME,
+            'category': category,
+            'city': city,
+        },
+        trigger_rule='all_done',
+        dag=dag,
+    )
+
+    gcs_to_bigquery = GCSToBigQueryOperator(
+        task_id=f'gcs_{category}_bigquery',
+        bucket=GCS_BUCKET_NAME,
+        source_objects=[f"{file_name}*.{chunk_extension}"],
+        source_format=output_format.upper(),
+        # WRITE_TRUNCATE through the partition decorator only replaces this run's snapshot, earlier ones are kept
+        destination_project_dataset_table=f"{BQ_DATASET}.{city}_{category}_listings_raw{SCRAPE_PARTITION}",
+        # the operator downloads the schema when the task runs, so parsing the DAG does no GCS I/O
+        schema_object=SCHEMA_OBJECT if output_format == "csv" else None, # parquet chunks carry typed columns
+        schema_object_bucket=SCHEMA_BUCKET_NAME,
+        time_partitioning={"type": config.RAW_PARTITION_TYPE, "field": config.RAW_PARTITION_FIELD},
+        cluster_fields=config.RAW_CLUSTERING_FIELDS,
+        create_disposition="CREATE_IF_NEEDED",
+        write_disposition="WRITE_TRUNCATE",
+        dag=dag,
+    )
+
+    start >> plan >> scrape_to_gcs >> [gcs_to_bigquery, merge]
+
+    if scrape_options.get('sketch_prices'):
+        # median and p90 price per lga and property type, from the sketches uploaded next to each chunk
+        quantiles = PythonOperator(
+            task_id='merge_price_sketches',
+            python_callable=merge_sketches,
+            op_kwargs={
+                'bucket_name': GCS_BUCKET_NAME,
+                'file_name': file_name,
+                'category': category,
+                'scrape_date': SCRAPE_DATE,
+            },
+            dag=dag,
+        )
+
+        quantiles_to_bigquery = GCSToBigQueryOperator(
+            task_id=f'gcs_{category}_price_quantiles_bigquery',
+            bucket=GCS_BUCKET_NAME,
+            source_objects=[f"{file_name}_price_quantiles.json"],
+            source_format="NEWLINE_DELIMITED_JSON",
+            destination_project_dataset_table=f"{BQ_DATASET}.{city}_{category}_price_quantiles_raw{SCRAPE_PARTITION}",
+            schema_fields=config.PRICE_QUANTILES_SCHEMA,
+            time_partitioning={"type": config.RAW_PARTITION_TYPE, "field": config.RAW_PARTITION_FIELD},
+            create_disposition="CREATE_IF_NEEDED",
+            write_disposition="WRITE_TRUNCATE",
+            dag=dag,
+        )
+
+        scrape_to_gcs >> quantiles >> quantiles_to_bigquery
+    return dag
+
+
+def create_scrape_dags(
+    categories: Iterable[str] = config.SCRAPE_CATEGORIES,
+    cities: Iterable[str] = config.SCRAPE_CITIES,
+) -> Dict[str, DAG]:
+    """
+    Build a scrape DAG for every category and city, keyed by dag_id.
+    """
+    dags = dict()
+    for city in cities:
+        for category in categories:
+            dag = create_scrape_dag(category, city)
+            dags[dag.dag_id] = dag
+    return dags
@@ -0,0 +1,126 @@
+"""
+Deduplication of listings seen more than once in a crawl
+"""
+
+import hashlib
+import math
+import re
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+# Detail page paths end in "{numeric id}-{slug}", e.g. /for-sale/flats/lagos/lekki/2076519-3-bedroom-flat
+_LISTING_ID = re.compile(r"^(\d+)(?:-|$)")
+
+
+def listing_key(url: str) -> str:
+    """Identity of a listing: its numeric ID when the url has one, else the url without query, fragment or trailing slash."""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    match = _LISTING_ID.match(path.rsplit("/", 1)[-1])
+    if match:
+        return match.group(1)
+    return f"{parts.netloc}{path}"
+
+
+class BloomFilter:
+    """
+    Set membership in a fixed amount of memory, with false positives but no false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize the BloomFilter class, sized for capacity keys at error_rate.
+
+        Args:
+            capacity (int): The number of keys the filter is sized for.
+            error_rate (float, optional): The false positive rate once capacity keys are added. Defaults to 0.001.
+        """
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # two independent 64 bit hashes combined into as many positions as needed (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+    def add(self, key: str) -> bool:
+        """
+        Add a key, returning whether it may have been added before.
+        """
+        present = True
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                present = False
+                self.bits[position >> 3] |= mask
+        return present
+
+
+class SeenListings:
+    """
+    Remember the listings of a run, so each one is fetched and written once.
+
+    Listings are keyed by listing_key. Without a capacity every key is kept in a set; with one,
+    memory is bounded by a Bloom filter, and a listing is wrongly taken as seen (and skipped)
+    with probability error_rate.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, error_rate: float = 0.001):
+        """
+        Initialize the SeenListings class.
+
+        Args:
+            capacity (Optional[int], optional): The number of listings the Bloom filter is sized for.
+                Defaults to None, keeping an exact set instead.
+            error_rate (float, optional): The false positive rate of the Bloom filter. Defaults to 0.001.
+        """
+        self._exact: Optional[Set[str]] = set() if capacity is None else None
+        self._bloom = BloomFilter(capacity, error_rate) if capacity is not None else None
+        self.duplicates = 0
+
+
+    def _has(self, key: str) -> bool:
+        return key in self._exact if self._exact is not None else key in self._bloom
+
+
+    def __contains__(self, url: str) -> bool:
+        return self._has(listing_key(url))
+
+
+    def filter_new(self, urls: Iterable[str]) -> List[str]:
+        """
+        Keep the urls of listings not recorded before, once each and in order, without recording them.
+
+        Record the ones that were fetched with record, so a listing whose fetch failed is tried
+        again when it shows up on a later page.
+        """
+        new, keys = list(), set()
+        for url in urls:
+            key = listing_key(url)
+            if key in keys or self._has(key):
+                self.duplicates += 1
+                continue
+            keys.add(key)
+            new.append(url)
+        return new
+
+
+    def record(self, urls: Iterable[str]) -> None:
+        """
+        Record listing urls as seen.
+        """
+        for url in urls:
+            key = listing_key(url)
+            if self._exact is not None:
+                self._exact.add(key)
+            else:
+                self._bloom.add(key)
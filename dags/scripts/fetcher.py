@@ -0,0 +1,132 @@
+"""
+Concurrent fetching of listing detail pages
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class ListingFetcher:
+    """
+    Fetch many pages concurrently over a shared, pooled requests session.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., Optional[requests.Response]],
+        session: requests.Session,
+        headers: Dict[str, str],
+        max_workers: int = 8,
+        per_host_limit: int = 4,
+        rate_limiter=None,
+        metrics=None,
+    ):
+        """
+        Initialize the ListingFetcher class.
+
+        Args:
+            fetch (Callable): The function used to fetch a single url, called as fetch(session, url, headers).
+            session (requests.Session): The session whose connection pool is shared by every worker.
+            headers (Dict[str, str]): The headers sent with every request.
+            max_workers (int, optional): The number of worker threads. Defaults to 8.
+            per_host_limit (int, optional): The maximum number of in-flight requests per host. Defaults to 4.
+            rate_limiter (AdaptiveRateLimiter, optional): The limiter shared by every request,
+                passed on to fetch as rate_limiter. Defaults to None.
+            metrics (PipelineMetrics, optional): The metrics of the scrape, passed on to fetch as metrics
+                and used to time the other stages. Defaults to None.
+        """
+        self.session = session
+        self.headers = headers
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.fetch = fetch
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+
+    def __enter__(self) -> "ListingFetcher":
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Shut down the worker threads.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """
+        Get the semaphore limiting concurrent requests to the host of a url.
+        """
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+
+    def fetch_one(self, url: str, extra_headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """
+        Fetch a single url, waiting for a free slot on its host first.
+        """
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        options = dict()
+        if self.rate_limiter is not None:
+            options["rate_limiter"] = self.rate_limiter
+        if self.metrics is not None:
+            options["metrics"] = self.metrics
+        with self._host_slot(url):
+            return self.fetch(self.session, url, headers, **options)
+
+
+    def fetch_all(
+        self,
+        urls: Iterable[str],
+        headers_for: Optional[Callable[[str], Dict[str, str]]] = None,
+    ) -> List[Optional[requests.Response]]:
+        """
+        Fetch urls concurrently.
+
+        Args:
+            urls (Iterable[str]): The urls to fetch.
+            headers_for (Optional[Callable[[str], Dict[str, str]]], optional): Returns extra headers
+                for a url, e.g. conditional request headers. Defaults to None.
+
+        Returns:
+            List[Optional[requests.Response]]: The responses in the same order as urls,
+                with None for every url that could not be fetched.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        extra_headers = [headers_for(url) for url in urls] if headers_for else [None] * len(urls)
+        if self.max_workers == 1:
+            return [self.fetch_one(url, extra) for url, extra in zip(urls, extra_headers)]
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="listing-fetcher"
+            )
+        # Executor.map yields results in submission order, so rows keep the page order.
+        return list(self._executor.map(self.fetch_one, urls, extra_headers))
@@ -4,10 +4,18 @@ Manage sone GCP resources
 
 from google.cloud import storage
 from google.cloud import bigquery
+from google.cloud.storage import transfer_manager
 from google.cloud.exceptions import Conflict, NotFound, GoogleCloudError
-from typing import Optional, List
-from dags.scripts.bq_utils import fetch_job_config
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, Optional, List, Sequence, Tuple
+from dags.scripts.bq_utils import fetch_job_config, time_partitioning
+from dags.scripts.bq_write_stream import LISTING_COLUMNS, BigQueryAppendStream, StorageWriteTransport
+import hashlib
 import logging
+import os
+import re
+import threading
 from dotenv import load_dotenv
 import time
 # from uuid
@@ -19,6 +27,56 @@ logging.basicConfig(
 )
 
 
+class _StorageHandles:
+    """
+    A storage client and the bucket handles created from it, shared by every GCSManager of a process.
+    """
+
+    def __init__(self, client: storage.Client):
+        self.client = client
+        self.buckets: Dict[str, storage.Bucket] = {}
+        self.lock = threading.Lock()
+
+
+    def bucket(self, bucket_name: str) -> storage.Bucket:
+        with self.lock:
+            bucket = self.buckets.get(bucket_name)
+            if bucket is None:
+                bucket = self.buckets[bucket_name] = self.client.bucket(bucket_name)
+            return bucket
+
+
+_storage_handles: Dict[Tuple[int, str, Optional[str]], _StorageHandles] = {}
+_storage_handles_lock = threading.Lock()
+
+
+def _shared_storage_handles(project_id: str, credentials: Optional[str] = None) -> _StorageHandles:
+    """
+    Get the process-wide storage client of a project and credentials file, creating it on first use.
+
+    One authenticated client, and so one token refresh and one pooled HTTP session, serves every
+    upload of the process. Entries are keyed by pid because a client must not be shared across a fork.
+    """
+    key = (os.getpid(), project_id, credentials)
+    with _storage_handles_lock:
+        handles = _storage_handles.get(key)
+        if handles is None:
+            if credentials:
+                client = storage.Client.from_service_account_json(credentials)
+            else:
+                client = storage.Client(project=project_id)
+            handles = _storage_handles[key] = _StorageHandles(client)
+        return handles
+
+
+def clear_storage_clients() -> None:
+    """
+    Forget the shared storage clients, e.g. after credentials have been rotated.
+    """
+    with _storage_handles_lock:
+        _storage_handles.clear()
+
+
 class GCSManager:
     def __init__(self, project_id: str, credentials: Optional[str] = None):
         """
@@ -31,33 +89,23 @@ class GCSManager:
         """
         self.project_id = project_id
         self.credentials = credentials
-        self.storage_client = self._create_storage_client()
+        self._handles = _shared_storage_handles(project_id, credentials)
+        self.storage_client = self._handles.client
 
 
-    def _create_storage_client(self) -> storage.Client:
-        """
-        Create a Google Cloud Storage client.
-
-        Returns:
-            storage.Client: A Google Cloud Storage client instance.
-        """
-        if self.credentials:
-            return storage.Client.from_service_account_json(self.credentials)
-        else:
-            return storage.Client(project=self.project_id)
-        
-
     def get_bucket(self, bucket_name: str) -> storage.Bucket:
         """
         Get a bucket object by name.
 
+        The handle is created without a metadata request and cached for the process.
+
         Args:
             bucket_name (str): The name of the bucket.
 
         Returns:
             storage.Bucket: A Google Cloud Storage bucket instance.
         """
-        return self.storage_client.bucket(bucket_name)
+        return self._handles.bucket(bucket_name)
 
 
     def create_bucket(
@@ -133,7 +181,7 @@ class GCSManager:
             destination_blob_name (str): The name of the destination blob in Google Cloud Storage.
         """
         try:
-            bucket = self.storage_client.get_bucket(bucket_name)
+            bucket = self.get_bucket(bucket_name)
             blob = bucket.blob(destination_blob_name)
             blob.upload_from_filename(source_file_path)
             logging.info(f"File {source_file_path} uploaded to {destination_blob_name} successfully.")        
@@ -155,7 +203,7 @@ class GCSManager:
         Upload a file to Google Cloud Storage.
         """
         try:
-            bucket = self.storage_client.get_bucket(bucket_name)
+            bucket = self.get_bucket(bucket_name)
             blob = bucket.blob(destination_blob_name)
             data_bytes = buffer.encode("utf-8")
             blob.upload_from_string(data_bytes, content_type=content_type)
@@ -186,6 +234,249 @@ class GCSManager:
             f"File {source_blob_name} downloaded to {destination_file_path} successfully."
         )
 
+    def upload_bytes(
+        self,
+        bucket_name: str,
+        data: bytes,
+        destination_blob_name: str,
+        content_type: str = "application/octet-stream",
+    ) -> Optional[str]:
+        """
+        Upload raw bytes to Google Cloud Storage.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to be uploaded to.
+            data (bytes): The content to upload.
+            destination_blob_name (str): The name of the destination blob in Google Cloud Storage.
+            content_type (str, optional): The content type of the blob. Defaults to "application/octet-stream".
+        """
+        blob = self.get_bucket(bucket_name).blob(destination_blob_name)
+        blob.upload_from_string(data, content_type=content_type)
+        logging.info(f"File uploaded to {destination_blob_name} successfully.")
+        return f"gs://{bucket_name}/{destination_blob_name}"
+
+
+    def open_blob_writer(
+        self,
+        bucket_name: str,
+        destination_blob_name: str,
+        content_type: str = "application/octet-stream",
+        chunk_size: int = 4 * 1024 * 1024,
+    ):
+        """
+        Open a binary stream writing to a blob through a resumable upload.
+
+        Only chunk_size bytes are buffered in memory at a time. Used as a context manager,
+        the upload is finalized on a clean exit and abandoned if an exception is raised.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to be uploaded to.
+            destination_blob_name (str): The name of the destination blob in Google Cloud Storage.
+            content_type (str, optional): The content type of the blob. Defaults to "application/octet-stream".
+            chunk_size (int, optional): The size of each uploaded part, a multiple of 256 KiB. Defaults to 4 MiB.
+
+        Returns:
+            google.cloud.storage.fileio.BlobWriter: A writable binary stream.
+        """
+        blob = self.get_bucket(bucket_name).blob(destination_blob_name)
+        return blob.open("wb", chunk_size=chunk_size, content_type=content_type, ignore_flush=True)
+
+
+    def download_as_bytes(self, bucket_name: str, source_blob_name: str) -> Optional[bytes]:
+        """
+        Download the content of a blob, or None if it does not exist.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to be downloaded from.
+            source_blob_name (str): The name of the source blob in Google Cloud Storage.
+        """
+        try:
+            return self.get_bucket(bucket_name).blob(source_blob_name).download_as_bytes()
+        except NotFound:
+            logging.info(f"File {source_blob_name} does not exist in bucket {bucket_name}.")
+            return None
+
+
+    def list_blob_names(self, bucket_name: str, prefix: Optional[str] = None) -> List[str]:
+        """
+        List the names of the blobs under a prefix.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to list.
+            prefix (Optional[str], optional): Only list blobs whose names start with this prefix. Defaults to None.
+        """
+        return list(self.iter_files(bucket_name, prefix=prefix))
+
+
+    def iter_files(self, bucket_name: str, prefix: Optional[str] = None, page_size: int = 1000) -> Iterator[str]:
+        """
+        Stream the names of the blobs under a prefix, fetching one page of the listing at a time.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to list.
+            prefix (Optional[str], optional): Only list blobs whose names start with this prefix. Defaults to None.
+            page_size (int, optional): The number of names fetched per listing request. Defaults to 1000.
+        """
+        for blob in self.storage_client.list_blobs(bucket_name, prefix=prefix, page_size=page_size):
+            yield blob.name
+
+
+    def upload_many(
+        self,
+        bucket_name: str,
+        files: Sequence[Tuple[str, str]],
+        max_workers: int = 8,
+        content_type: Optional[str] = None,
+        large_file_threshold: int = 64 * 1024 * 1024,
+        chunk_size: int = 32 * 1024 * 1024,
+    ) -> List[str]:
+        """
+        Upload many local files concurrently.
+
+        Files of at least large_file_threshold bytes are uploaded one at a time as chunk_size
+        parts sent in parallel, so a single large file also fills the available bandwidth.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to be uploaded to.
+            files (Sequence[Tuple[str, str]]): (local file path, destination blob name) pairs.
+            max_workers (int, optional): The number of concurrent transfers. Defaults to 8.
+            content_type (Optional[str], optional): The content type of every blob. Defaults to None.
+            large_file_threshold (int, optional): The size from which a file is uploaded in parts. Defaults to 64 MiB.
+            chunk_size (int, optional): The size of each part of a large file. Defaults to 32 MiB.
+
+        Returns:
+            List[str]: The URIs of the uploaded blobs, in the order of files.
+        """
+        bucket = self.get_bucket(bucket_name)
+        small, large = list(), list()
+        for source_file_path, destination_blob_name in files:
+            blob = bucket.blob(destination_blob_name)
+            if os.path.getsize(source_file_path) >= large_file_threshold:
+                large.append((source_file_path, blob))
+            else:
+                small.append((source_file_path, blob))
+
+        if small:
+            transfer_manager.upload_many(
+                small,
+                upload_kwargs={"content_type": content_type} if content_type else None,
+                worker_type=transfer_manager.THREAD,
+                max_workers=max_workers,
+                raise_exception=True,
+            )
+        for source_file_path, blob in large:
+            transfer_manager.upload_chunks_concurrently(
+                source_file_path,
+                blob,
+                content_type=content_type,
+                chunk_size=chunk_size,
+                worker_type=transfer_manager.THREAD,
+                max_workers=max_workers,
+            )
+
+        logging.info(f"Uploaded {len(files)} files to bucket {bucket_name} ({len(large)} in parallel parts).")
+        return [f"gs://{bucket_name}/{destination_blob_name}" for _, destination_blob_name in files]
+
+
+    def download_many(
+        self,
+        bucket_name: str,
+        blob_names: Sequence[str],
+        destination_directory: str,
+        max_workers: int = 8,
+        blob_name_prefix: str = "",
+    ) -> List[str]:
+        """
+        Download many blobs concurrently into a local directory, keeping their names as relative paths.
+
+        Args:
+            bucket_name (str): The Google Cloud Storage bucket to be downloaded from.
+            blob_names (Sequence[str]): The names of the blobs, without blob_name_prefix.
+            destination_directory (str): The local directory to download to.
+            max_workers (int, optional): The number of concurrent transfers. Defaults to 8.
+            blob_name_prefix (str, optional): A prefix prepended to every blob name. Defaults to "".
+
+        Returns:
+            List[str]: The local paths of the downloaded files, in the order of blob_names.
+        """
+        transfer_manager.download_many_to_path(
+            self.get_bucket(bucket_name),
+            list(blob_names),
+            destination_directory=destination_directory,
+            blob_name_prefix=blob_name_prefix,
+            worker_type=transfer_manager.THREAD,
+            max_workers=max_workers,
+            raise_exception=True,
+        )
+        logging.info(f"Downloaded {len(blob_names)} files from bucket {bucket_name} to {destination_directory}.")
+        return [os.path.join(destination_directory, blob_name) for blob_name in blob_names]
+
+
+    def copy_prefix(
+        self,
+        source_bucket_name: str,
+        prefix: str,
+        destination_bucket_name: str,
+        destination_prefix: Optional[str] = None,
+        max_workers: int = 8,
+    ) -> int:
+        """
+        Copy every blob under a prefix server-side, with max_workers copies in flight.
+
+        Blobs are listed page by page while earlier ones are being copied, and rewrites are
+        resumed until done, so objects of any size and storage location can be copied.
+
+        Args:
+            source_bucket_name (str): The bucket to copy from.
+            prefix (str): The prefix of the blobs to copy.
+            destination_bucket_name (str): The bucket to copy to.
+            destination_prefix (Optional[str], optional): Replaces prefix in the copied names. Defaults to prefix.
+            max_workers (int, optional): The number of concurrent copies. Defaults to 8.
+
+        Returns:
+            int: The number of blobs copied.
+        """
+        source_bucket = self.get_bucket(source_bucket_name)
+        destination_bucket = self.get_bucket(destination_bucket_name)
+        destination_prefix = prefix if destination_prefix is None else destination_prefix
+
+        def copy(blob_name: str) -> None:
+            destination = destination_bucket.blob(destination_prefix + blob_name[len(prefix):])
+            token, _, _ = destination.rewrite(source_bucket.blob(blob_name))
+            while token is not None:
+                token, _, _ = destination.rewrite(source_bucket.blob(blob_name), token=token)
+
+        copied = 0
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gcs-copy") as executor:
+            for blob_name in self.iter_files(source_bucket_name, prefix=prefix):
+                # Bound the queue so listing a huge prefix does not run ahead of the copies.
+                if len(in_flight) >= 2 * max_workers:
+                    in_flight.popleft().result()
+                    copied += 1
+                in_flight.append(executor.submit(copy, blob_name))
+            for future in in_flight:
+                future.result()
+                copied += 1
+
+        logging.info(
+            f"Copied {copied} files from gs://{source_bucket_name}/{prefix} "
+            f"to gs://{destination_bucket_name}/{destination_prefix}."
+        )
+        return copied
+
+
+    def delete_file(self, bucket_name: str, blob_name: str) -> None:
+        """
+        Delete a blob, ignoring blobs that do not exist.
+        """
+        try:
+            self.get_bucket(bucket_name).blob(blob_name).delete()
+            logging.info(f"File {blob_name} deleted successfully.")
+        except NotFound:
+            logging.warning(f"File {blob_name} does not exist.")
+
+
     def list_files(self, bucket_name: str) -> None:
         """
         List all files in the Google Cloud Storage bucket.
@@ -196,6 +487,34 @@ class GCSManager:
         logging.info(f"Files in bucket: {', '.join(blob_names)}")
 
 
+def load_job_id(table: str, source_uris: List[str], write_disposition: str = "WRITE_APPEND") -> str:
+    """
+    Deterministic ID of the job loading a set of files into a table; the order of the URIs does not matter.
+    """
+    key = "\n".join([table, write_disposition, *sorted(source_uris)])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    # job IDs only allow letters, digits, dashes and underscores; table names may carry a $partition decorator
+    return f"load_{re.sub(r'[^0-9A-Za-z_]', '_', table)}_{digest}"
+
+
+def load_job_stats(job: bigquery.LoadJob, reused: bool = False) -> Dict:
+    """
+    Summarize a finished load job.
+    """
+    duration = (job.ended - job.started).total_seconds() if job.started and job.ended else None
+    return {
+        "job_id": job.job_id,
+        "table": f"{job.destination.project}.{job.destination.dataset_id}.{job.destination.table_id}",
+        "state": job.state,
+        "reused": reused,
+        "output_rows": job.output_rows,
+        "output_bytes": job.output_bytes,
+        "input_bytes": job.input_file_bytes,
+        "duration_seconds": duration,
+        "error": (job.error_result or {}).get("message"),
+    }
+
+
 class BigQueryManager:
     """
     A class to manage BigQuery datasets, tables, and operations.
@@ -210,6 +529,7 @@ class BigQueryManager:
             location (str, optional): The BigQuery location. Defaults to "US".
         """
         self.client = bigquery.Client(project=project_id, location=location)
+        self._write_transport: Optional[StorageWriteTransport] = None
 
     def create_dataset(self, dataset_id: str, data_location: str = "US") -> None:
         """
@@ -235,15 +555,24 @@ class BigQueryManager:
 
 
     def create_table(
-        self, dataset_id: str, table_id: str, schema: List[bigquery.SchemaField]
+        self,
+        dataset_id: str,
+        table_id: str,
+        schema: List[bigquery.SchemaField],
+        partition_field: Optional[str] = None,
+        partition_type: str = "DAY",
+        clustering_fields: Optional[List[str]] = None,
     ) -> None:
         """
-        Create a new BigQuery table.
+        Create a new BigQuery table, optionally partitioned on a date column and clustered.
 
         Args:
             dataset_id (str): The ID of the dataset where the table should be created.
             table_id (str): The ID of the table to create.
             schema (List[bigquery.SchemaField]): The schema of the table.
+            partition_field (Optional[str], optional): The DATE or TIMESTAMP column partitioning the table. Defaults to None.
+            partition_type (str, optional): The partition granularity, "HOUR", "DAY", "MONTH" or "YEAR". Defaults to "DAY".
+            clustering_fields (Optional[List[str]], optional): Up to four columns clustering the table. Defaults to None.
 
         Returns:
             bigquery.Table: The created table.
@@ -251,6 +580,9 @@ class BigQueryManager:
         try:
             table_ref = f"{self.client.project}.{dataset_id}.{table_id}"
             table = bigquery.Table(table_ref, schema=schema)
+            table.time_partitioning = time_partitioning(partition_field, partition_type)
+            if clustering_fields:
+                table.clustering_fields = clustering_fields
             table = self.client.create_table(table, timeout=30)
             logging.info(f"Created table {table.table_id}")
         except Conflict:
@@ -268,11 +600,17 @@ class BigQueryManager:
         schema: List[bigquery.SchemaField] = None,
         field_delimiter: str = ",",
         create_disposition: str = "CREATE_IF_NEEDED",
-        write_disposition: str = "WRITE_APPEND"
-    ) -> None:
+        write_disposition: str = "WRITE_APPEND",
+        partition_field: Optional[str] = None,
+        partition_type: str = "DAY",
+        clustering_fields: Optional[List[str]] = None,
+    ) -> Dict:
         """
         Load data from Google Cloud Storage into a BigQuery table.
 
+        The job ID is derived from the table and source URIs, so retrying a load that
+        already ran reuses its job instead of appending the rows a second time.
+
         Args:
             dataset_id (str): The ID of the dataset where the table resides.
             table_id (str): The ID of the table to load data into.
@@ -281,23 +619,128 @@ class BigQueryManager:
             schema (List[bigquery.SchemaField], optional): The schema of the table. Defaults to None.
             field_delimiter (str, optional): The field delimiter for CSV files. Defaults to ','.
             create_disposition (str, optional): The create disposition for the load job. Defaults to "CREATE_IF_NEEDED".
-            write_disposition (str, optional): The write disposition for the load job. Defaults to "WRITE_TRUNCATE".
+            write_disposition (str, optional): The write disposition for the load job. Defaults to "WRITE_APPEND".
+            partition_field (Optional[str], optional): The column partitioning the table if the load creates it.
+                Defaults to None.
+            partition_type (str, optional): The partition granularity if the load creates the table. Defaults to "DAY".
+            clustering_fields (Optional[List[str]], optional): The columns clustering the table if the load creates it.
+                Defaults to None.
+
+        Returns:
+            Dict: The stats of the load job, as returned by load_many_from_gcs.
+        """
+        return self.load_many_from_gcs(
+            [
+                {
+                    "dataset_id": dataset_id,
+                    "table_id": table_id,
+                    "source_uris": source_uris,
+                    "source_format": source_format,
+                    "schema": schema,
+                    "field_delimiter": field_delimiter,
+                    "create_disposition": create_disposition,
+                    "write_disposition": write_disposition,
+                    "partition_field": partition_field,
+                    "partition_type": partition_type,
+                    "clustering_fields": clustering_fields,
+                }
+            ],
+            raise_on_error=True,
+        )[0]
+
+
+    def load_many_from_gcs(
+        self, loads: List[Dict], poll_interval: float = 2.0, raise_on_error: bool = False
+    ) -> List[Dict]:
+        """
+        Submit many load jobs at once and wait for all of them, so loads of several tables run in parallel.
+
+        Every job ID is derived from its destination table, source URIs and write disposition.
+        Re-submitting a load that already succeeded, or is still running, attaches to the
+        existing job instead of starting a new one. A load whose earlier job failed is
+        retried under the next ID in a deterministic sequence. Source objects are taken to be
+        immutable, so new content must come under new names, as the dated chunk files do.
+        A table_id may carry a partition decorator, e.g. "listings$202410", to load or
+        (with WRITE_TRUNCATE) replace a single partition of a partitioned table.
+
+        Args:
+            loads (List[Dict]): The keyword arguments of load_from_gcs for each job: dataset_id,
+                table_id and source_uris, plus optionally source_format, schema, field_delimiter,
+                create_disposition, write_disposition, partition_field, partition_type and clustering_fields.
+            poll_interval (float, optional): Seconds between two polls of the unfinished jobs. Defaults to 2.
+            raise_on_error (bool, optional): Raise the error of the first failed job once every job is done.
+                Defaults to False.
+
+        Returns:
+            List[Dict]: Per job, in the order of loads: job_id, table, state, reused, output_rows,
+                output_bytes, input_bytes, duration_seconds and error.
+        """
+        jobs = [self._submit_load(**load) for load in loads]
+
+        pending = [job for job, _ in jobs]
+        while pending:
+            pending = [job for job in pending if not job.done()]
+            if pending:
+                logging.info(f"Waiting for {len(pending)} of {len(jobs)} load jobs")
+                time.sleep(poll_interval)
+
+        stats = [load_job_stats(job, reused) for job, reused in jobs]
+        for stat in stats:
+            if stat["error"]:
+                logging.error(f"Load job {stat['job_id']} into {stat['table']} failed: {stat['error']}")
+            else:
+                logging.info(
+                    f"Loaded {stat['output_rows']} rows into {stat['table']} in {stat['duration_seconds']}s "
+                    f"(job {stat['job_id']}{', reused' if stat['reused'] else ''})"
+                )
+        if raise_on_error:
+            for job, _ in jobs:
+                if job.error_result:
+                    job.result()
+        return stats
+
+
+    def _submit_load(
+        self,
+        dataset_id: str,
+        table_id: str,
+        source_uris: List[str],
+        source_format: str = "CSV",
+        schema: List[bigquery.SchemaField] = None,
+        field_delimiter: str = ",",
+        create_disposition: str = "CREATE_IF_NEEDED",
+        write_disposition: str = "WRITE_APPEND",
+        partition_field: Optional[str] = None,
+        partition_type: str = "DAY",
+        clustering_fields: Optional[List[str]] = None,
+        max_attempts: int = 10,
+    ) -> Tuple[bigquery.LoadJob, bool]:
         """
-        # job_id =
-        table_ref = self.client.dataset(dataset_id).table(table_id)
-        job_config = fetch_job_config(
-            source_format,
-            schema,
-            field_delimiter,
-            create_disposition,
-            write_disposition,
-        )
+        Start a load job under its deterministic ID, or attach to the job that already holds it.
 
-        load_job = self.client.load_table_from_uri(
-            source_uris, table_ref, job_config=job_config
+        Returns:
+            Tuple[bigquery.LoadJob, bool]: The job, and whether it was started by an earlier call.
+        """
+        table = f"{self.client.project}.{dataset_id}.{table_id}"
+        job_config = fetch_job_config(
+            source_format.lower(), schema, field_delimiter, create_disposition, write_disposition,
+            time_partitioning(partition_field, partition_type), clustering_fields,
         )
-        load_job.result()
-        logging.info(f"Loaded data into table {table_ref.table_id}")
+        base_job_id = load_job_id(table, source_uris, write_disposition)
+        for attempt in range(max_attempts):
+            job_id = base_job_id if attempt == 0 else f"{base_job_id}_{attempt}"
+            try:
+                job = self.client.load_table_from_uri(
+                    source_uris, bigquery.TableReference.from_string(table), job_id=job_id, job_config=job_config
+                )
+                return job, False
+            except Conflict:
+                job = self.client.get_job(job_id)
+                if job.error_result is None:
+                    logging.info(f"Load job {job_id} into {table} already exists, reusing it")
+                    return job, True
+                logging.warning(f"Load job {job_id} into {table} failed before, retrying under a new ID")
+        raise RuntimeError(f"Every one of {max_attempts} load job IDs for {table} is taken by a failed job")
 
 
     def load_from_local(
@@ -310,10 +753,15 @@ class BigQueryManager:
         field_delimiter: str,
         create_disposition: str = "CREATE_IF_NEEDED",
         write_disposition: str = "WRITE_APPEND",
+        max_attempts: int = 10,
     ) -> None:
         """
         Load data from a local file into a BigQuery table.
 
+        The job ID is derived from the table and the file content, so loading the same file
+        again attaches to the earlier job instead of appending its rows twice. If that job
+        failed, the file is loaded under the next ID, like _submit_load does.
+
         Args:
             dataset_id (str): The ID of the dataset where the table resides.
             table_id (str): The ID of the table to load data into.
@@ -323,15 +771,68 @@ class BigQueryManager:
             field_delimiter (str, optional): The field delimiter for CSV files. Defaults to ','.
             create_disposition (str, optional): The create disposition for the load job. Defaults to "CREATE_IF_NEEDED".
             write_disposition (str, optional): The write disposition for the load job. Defaults to "WRITE_APPEND".
+            max_attempts (int, optional): The number of job IDs tried while earlier jobs under them failed. Defaults to 10.
         """
         table_ref = self.client.dataset(dataset_id).table(table_id)
         job_config = fetch_job_config(
             file_format, schema, field_delimiter, create_disposition, write_disposition
         )
-
+        digest = hashlib.sha256()
         with open(source_file, "rb") as source_file_obj:
-            load_job = self.client.load_table_from_file(
-                source_file_obj, table_ref, job_config=job_config
-            )
+            for block in iter(lambda: source_file_obj.read(1024 * 1024), b""):
+                digest.update(block)
+        base_job_id = load_job_id(
+            f"{self.client.project}.{dataset_id}.{table_id}", [f"sha256:{digest.hexdigest()}"], write_disposition
+        )
+
+        for attempt in range(max_attempts):
+            job_id = base_job_id if attempt == 0 else f"{base_job_id}_{attempt}"
+            with open(source_file, "rb") as source_file_obj:
+                try:
+                    load_job = self.client.load_table_from_file(
+                        source_file_obj, table_ref, job_id=job_id, job_config=job_config
+                    )
+                except Conflict:
+                    load_job = self.client.get_job(job_id)
+                    if load_job.error_result is not None:
+                        logging.warning(f"Load job {job_id} of {source_file} failed before, retrying under a new ID")
+                        continue
+                    logging.info(f"File {source_file} was already loaded into {table_ref.table_id} by job {job_id}")
             load_job.result()
-            logging.info(f"Loaded data into table {table_ref.table_id}")
\ No newline at end of file
+            logging.info(f"Loaded data into table {table_ref.table_id}")
+            return
+        raise RuntimeError(f"Every one of {max_attempts} load job IDs for {source_file} is taken by a failed job")
+
+
+    def open_append_stream(
+        self,
+        dataset_id: str,
+        table_id: str,
+        columns: List[Tuple[str, str]] = LISTING_COLUMNS,
+        mode: str = "committed",
+        max_batch_rows: int = 500,
+        transport=None,
+    ) -> BigQueryAppendStream:
+        """
+        Open a Storage Write API stream appending typed rows to an existing table.
+
+        Args:
+            dataset_id (str): The ID of the dataset where the table resides.
+            table_id (str): The ID of the table to append to.
+            columns (List[Tuple[str, str]], optional): (column, BigQuery type) pairs. Defaults to LISTING_COLUMNS.
+            mode (str, optional): "committed" makes rows queryable as they are written, "pending"
+                makes them visible at once when the stream is closed. Defaults to "committed".
+            max_batch_rows (int, optional): The number of rows sent per request. Defaults to 500.
+            transport (optional): The Storage Write API calls, e.g. a fake in tests. Defaults to
+                a StorageWriteTransport shared by the streams of this manager.
+
+        Returns:
+            BigQueryAppendStream: The stream, usable as a context manager that closes it on success
+                and aborts it on error.
+        """
+        if transport is None:
+            if self._write_transport is None:
+                self._write_transport = StorageWriteTransport()
+            transport = self._write_transport
+        table_path = f"projects/{self.client.project}/datasets/{dataset_id}/tables/{table_id}"
+        return BigQueryAppendStream(transport, table_path, columns, mode=mode, max_batch_rows=max_batch_rows)
@@ -1,13 +1,28 @@
-import csv
 import io
+import json
 import logging
 import time
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Callable, Deque, Iterator, List, Dict, Optional, Tuple
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util import Retry
-from dags.scripts.gcp_manager import GCSManager
+from dags.scripts.gcp_manager import BigQueryManager, GCSManager
+from dags.scripts.chunk_manifest import ChunkManifest
+from dags.scripts.chunk_writer import ChunkWriter, CsvChunkWriter, ListingRecord, ParquetChunkWriter, open_text_stream
+from dags.scripts.dedup import SeenListings
+from dags.scripts.fetcher import ListingFetcher
+from dags.scripts.lga_resolver import GAZETTEER_VERSION, resolve_location
+from dags.scripts.listing_index import ListingIndex
+from dags.scripts.listing_parser import listing_links, parse_listing
+from dags.scripts.metrics import PipelineMetrics
+from dags.scripts.parse_pool import ParsePool
+from dags.scripts.page_discovery import PageProbeError, last_page_from_pagination, search_last_page
+from dags.scripts.quantile_sketch import PriceSketches
+from dags.scripts.rate_limiter import AdaptiveRateLimiter, parse_retry_after
 from dags.scripts import config
 
 # Configure logging
@@ -15,97 +30,205 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:66.0) Gecko/20100101 Firefox/66.0",
+    "Accept-Encoding": "*",
+    "Connection": "keep-alive",
+}
 
-def create_session() -> requests.Session:
-    """Create and configure a requests session with retries."""
+
+def create_session(pool_maxsize: int = 10) -> requests.Session:
+    """Create and configure a requests session with retries and a connection pool sized for concurrent fetches.
+
+    Connection errors and transient gateway errors are retried here; 429 and 503
+    responses are left to the rate limiter so it can back off on them.
+    """
     session = requests.Session()
-    retry = Retry(total=15, connect=15, backoff_factor=0.5)
-    adapter = HTTPAdapter(max_retries=retry)
+    retry = Retry(
+        total=15,
+        connect=15,
+        status=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 504),
+        respect_retry_after_header=False, # Retry-After on 429/503 is honoured by the rate limiter
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
 
 
+THROTTLE_RETRIES = 3
+
+
 def fetch_page(
-    session: requests.Session, url: str, headers: Dict[str, str]
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    metrics: Optional[PipelineMetrics] = None,
 ) -> Optional[requests.Response]:
-    """Fetch a web page and return the raw response."""
+    """Fetch a web page and return the raw response.
+
+    With a rate limiter, the request waits for a slot, its outcome adjusts the rate,
+    and 429/503 responses are retried after the limiter has backed off.
+    With metrics, every attempt records its latency, bytes, retries and failures.
+    """
+    for attempt in range(THROTTLE_RETRIES + 1 if rate_limiter is not None else 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = session.get(url, headers=headers)
+        except requests.exceptions.RequestException as e:
+            if rate_limiter is not None:
+                rate_limiter.record(None, time.monotonic() - started)
+            if metrics is not None:
+                metrics.observe("fetch", time.monotonic() - started)
+                metrics.incr("requests")
+                metrics.incr("fetch_failures")
+            logging.error(f"An error occurred while making the request: {e}")
+            return None
+
+        latency = time.monotonic() - started
+        if metrics is not None:
+            metrics.observe("fetch", latency)
+            metrics.incr("requests")
+            metrics.incr("response_bytes", len(response.content))
+            retries = getattr(response.raw, "retries", None)
+            if isinstance(retries, Retry) and retries.history:
+                metrics.incr("retries", len(retries.history))
+
+        if rate_limiter is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            rate_limiter.record(response.status_code, latency, retry_after)
+            if response.status_code in (429, 503) and attempt < THROTTLE_RETRIES:
+                logging.warning(f"Throttled with status {response.status_code} on {url}, retrying")
+                if metrics is not None:
+                    metrics.incr("retries")
+                continue
+
+        try:
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            if metrics is not None:
+                metrics.incr("fetch_failures")
+            logging.error(f"An error occurred while making the request: {e}")
+            return None
+
+
+def index_page_url(base_url: str, category: str, city: str, page: int) -> str:
+    """Url of one index page of a category."""
+    return f"{base_url}/{category}/{city}?page={page}"
+
+
+def discover_last_page(
+    session: requests.Session,
+    headers: Dict[str, str],
+    base_url: str,
+    category: str,
+    city: str,
+    hint: Optional[int] = None,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+) -> int:
+    """Find the last index page with listings by searching ?page=N, starting from the pagination bar.
+
+    The bar may only show a window of pages, so the highest page it links to is only used as
+    the hint of the search, which confirms it in two probes when it is the last page. If an index
+    page cannot be fetched, the given hint is returned instead, or the bar's last page without one.
+    """
+    fallback = hint
+    response = fetch_page(session, index_page_url(base_url, category, city, 1), headers, rate_limiter)
+    if response is not None:
+        last_linked = last_page_from_pagination(response.content)
+        if last_linked:
+            logging.info(f"Pagination links up to page {last_linked}")
+            hint = last_linked
+
+    def has_listings(page: int) -> bool:
+        page_response = fetch_page(session, index_page_url(base_url, category, city, page), headers, rate_limiter)
+        if page_response is None:
+            raise PageProbeError(f"Could not fetch index page {page}")
+        return bool(listing_links(page_response.content))
+
     try:
-        response = session.get(url, headers=headers)
-        response.raise_for_status()
-        return response
-    except requests.exceptions.RequestException as e:
-        logging.error(f"An error occurred while making the request: {e}")
-        return None
+        return search_last_page(has_listings, hint=hint or 1)
+    except PageProbeError as e:
+        logging.warning(f"{e}, falling back to page {fallback or hint}")
+        return fallback or hint or 0
 
 
-def extract_listing_data(listings: List[BeautifulSoup]) -> List[Dict[str, str]]:
+def extract_listing_data(listings: List[requests.Response]) -> List[Dict[str, str]]:
     """Extract data from multiple property listings."""
-    all_properties = list()
+    return [parse_listing(listing.content) for listing in listings]
 
-    for listing in listings:
-        data = dict()
-        some_soup = BeautifulSoup(listing.content, "lxml")
-       
-        data["location"] = some_soup.find("address").text.strip() if some_soup.find("address") else "N/A"
-        
-        price_element = some_soup.find('span', class_="price", itemprop='price')
-        data['price'] = price_element['content'] if price_element else "N/A"
-        
-        currency_element = some_soup.find('span', class_="price", itemprop="priceCurrency")
-        data['currency'] = currency_element['content'] if currency_element else "N/A"
-
-
-        status = (None,)
-        bedrooms = (None,)
-        bathrooms = (None,)
-        toilets = (None,)
-        property_type = (None,)
-        is_furnished = ("no",)
-        is_serviced = ("no",)
-        is_shared = "no"
-        total_area = None
-        covered_area = None
-
-        other_headers = some_soup.find_all("td")
-        for header in other_headers:
-            text = header.get_text()
-            if "Market Status:" in text:
-                status = text.split(":")[1].strip()
-                data["status"] = status
-            elif "Bedrooms:" in text:
-                bedrooms = text.split(":")[1].strip()
-                data["bedrooms"] = bedrooms
-            elif "Bathrooms:" in text:
-                bathrooms = text.split(":")[1].strip()
-                data["bathrooms"] = bathrooms
-            elif "Toilets:" in text:
-                toilets = text.split(":")[1].strip()
-                data["toilets"] = toilets
-            elif "Type:" in text:
-                property_type = text.split(":")[1].strip()
-                data["property_type"] = property_type
-            elif "Servicing" in text:
-                is_serviced = "yes"
-                data["is_serviced"] = is_serviced
-            elif "Furnishing:" in text:
-                is_furnished = "yes"
-                data["is_furnished"] = is_furnished
-            elif "Sharing:" in text:
-                is_shared = "yes"
-                data["is_shared"] = is_shared
-            elif 'Total Area:' in text:
-                total_area = text.split(':')[1].strip()
-                data['total_area'] = total_area
-            elif 'Covered Area:' in text:
-                covered_area = text.split(':')[1].strip()
-                data['covered_area'] = covered_area
 
+def extract_changed_listing_data(
+    urls: List[str], responses: List[Optional[requests.Response]], listing_index: ListingIndex
+) -> List[Dict[str, str]]:
+    """Extract data from listings, reusing the previous row of every listing that has not changed."""
+    all_properties = list()
+    for url, response in zip(urls, responses):
+        if response is None:
+            continue
+        data = listing_index.unchanged_row(url, response)
+        if data is None:
+            data = parse_listing(response.content)
+            listing_index.record(url, response, data)
         all_properties.append(data)
-
     return all_properties
 
 
+def submit_listing_parse(
+    parse_pool: ParsePool,
+    urls: List[str],
+    responses: List[Optional[requests.Response]],
+    listing_index: Optional[ListingIndex] = None,
+) -> Tuple[Future, Callable[[], List[Dict[str, str]]]]:
+    """Queue the listings of a page for parsing in the pool.
+
+    Returns the pool's future and a function that waits for it and returns the page's rows
+    in listing order, like extract_listing_data or extract_changed_listing_data would.
+    """
+    if listing_index is None:
+        future = parse_pool.submit([response.content for response in responses if response is not None])
+        return future, future.result
+
+    rows = [
+        listing_index.unchanged_row(url, response) if response is not None else None
+        for url, response in zip(urls, responses)
+    ]
+    changed = [i for i, (row, response) in enumerate(zip(rows, responses)) if row is None and response is not None]
+    future = parse_pool.submit([responses[i].content for i in changed])
+
+    def collect() -> List[Dict[str, str]]:
+        for i, data in zip(changed, future.result()):
+            listing_index.record(urls[i], responses[i], data)
+            rows[i] = data
+        return [row for row, response in zip(rows, responses) if response is not None]
+
+    return future, collect
+
+
+def listing_records(properties: List[Dict[str, str]], urls: List[str], scrape_date: str) -> List[ListingRecord]:
+    """Type the scraped rows of a page once, adding the columns derived at scrape time.
+
+    The location columns are resolved here rather than in the parser, so rows reused from the
+    listing index get them too. urls are the listing urls of the rows, in the same order.
+    """
+    url_of = iter(urls)
+    records = list()
+    for row in properties:
+        lga, neighborhood = resolve_location(row.get("location"))
+        records.append(ListingRecord.from_row(
+            row, lga=lga, neighborhood=neighborhood, gazetteer_version=GAZETTEER_VERSION,
+            listing_url=next(url_of, None), scrape_date=scrape_date,
+        ))
+    return records
+
+
 def upload_to_gcs(bucket_name: str, file_name: str, csv_content: str) -> None:
     """Upload CSV content to Google Cloud Storage."""
     gcs_client = GCSManager(project_id=config.PROJECT_ID)
@@ -120,45 +243,340 @@ def upload_to_gcs(bucket_name: str, file_name: str, csv_content: str) -> None:
     logging.info(f"Data uploaded to GCS bucket '{bucket_name}' as '{file_name}'.")
 
 
-def process_chunk(session: requests.Session, headers: Dict[str, str], base_url: str, category: str, city: str, start_page: int, end_page: int) -> str:
-    output = io.StringIO()
-    csv_writer = csv.writer(output)
-    header_row = [
-        "location", "status", "bedrooms", "bathrooms", "toilets", "property_type",
-        "is_furnished", "is_serviced", "is_shared", "total_area", "covered_area",
-        "price", "currency",
-    ]
-    csv_writer.writerow(header_row)
+def write_chunk(
+    chunk_writer: ChunkWriter,
+    session: requests.Session,
+    headers: Dict[str, str],
+    base_url: str,
+    category: str,
+    city: str,
+    start_page: int,
+    end_page: int,
+    fetcher: Optional[ListingFetcher] = None,
+    listing_index: Optional[ListingIndex] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    max_empty_pages: int = 3,
+    parse_pool: Optional[ParsePool] = None,
+    scrape_date: Optional[str] = None,
+    seen: Optional[SeenListings] = None,
+    sketches: Optional[PriceSketches] = None,
+) -> int:
+    """Scrape a range of index pages and write their listings page by page, returning the rows written.
+
+    When a listing index is given, detail pages are requested conditionally and
+    unchanged listings are emitted from the previous snapshot without parsing.
+    on_page is called with (page, listings on the index page) after every page is written.
+    Stops early after max_empty_pages consecutive index pages without listings.
+    With a parse pool, detail pages are parsed in worker processes while the next pages
+    are fetched; pages are still written in order.
+    Every row gets lga and neighborhood columns resolved from its location, the gazetteer_version
+    they were resolved with, its listing_url and the scrape_date (YYYY-MM-DD, defaults to today)
+    of the snapshot.
+    Listings already fetched into seen, e.g. pushed onto a later page while the crawl runs, are not
+    fetched again; pass the same seen to every chunk of a run to keep one row per listing.
+    With sketches, the price of every row written is added to them.
+    Parse and serialize times are recorded in the fetcher's metrics, if it has any.
+    """
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = ListingFetcher(fetch_page, session, headers, rate_limiter=AdaptiveRateLimiter())
+    metrics = fetcher.metrics or PipelineMetrics()
+    scrape_date = scrape_date or date.today().isoformat()
+    seen = seen if seen is not None else SeenListings()
+
+    def write_page(page: int, listings: int, properties: List[Dict[str, str]], urls: List[str]) -> None:
+        metrics.incr("pages")
+        metrics.incr("listings_parsed", len(properties))
+        with metrics.timer("serialize"):
+            records = listing_records(properties, urls, scrape_date)
+            chunk_writer.write_rows(records)
+            if sketches is not None:
+                sketches.add_rows(records)
+        metrics.incr("rows_written", len(properties))
 
+        logging.info(f"Processed {len(properties)} properties on page {page}")
+        if on_page is not None:
+            on_page(page, listings)
+
+    pending: Deque[Tuple[int, int, List[str], Future, Callable[[], List[Dict[str, str]]]]] = deque()
+
+    def write_parsed(keep: int) -> None:
+        # Write finished pages in page order, waiting on the oldest while more than keep are pending.
+        while pending and (len(pending) > keep or pending[0][3].done()):
+            page, listings, urls, _, collect = pending.popleft()
+            with metrics.timer("parse_wait"):
+                properties = collect()
+            write_page(page, listings, properties, urls)
+
+    empty_pages = 0
     for page in range(start_page, end_page + 1):
-        page_url = f"{base_url}/{category}/{city}?page={page}"
+        page_url = index_page_url(base_url, category, city, page)
         logging.info(f"Fetching data from: {page_url}")
-        response = fetch_page(session, page_url, headers)
+        response = fetch_page(session, page_url, headers, rate_limiter=fetcher.rate_limiter, metrics=fetcher.metrics)
         if not response:
             logging.warning(f"Failed to fetch page: {page_url}")
             continue
 
-        soup = BeautifulSoup(response.content, "lxml")
-        raw_links = soup.find_all("div", class_="row property-list")
-        click_links = [
-            link.find("div", class_="description hidden-xs")
-            .find_all("a")[-1]
-            .get("href")
-            for link in raw_links
-        ]
+        with metrics.timer("parse"):
+            click_links = listing_links(response.content)
+        if click_links:
+            empty_pages = 0
+        else:
+            empty_pages += 1
+
+        listing_urls = seen.filter_new(f"{base_url}{link}" for link in click_links)
+        if len(listing_urls) < len(click_links):
+            metrics.incr("duplicates_skipped", len(click_links) - len(listing_urls))
+        responses = fetcher.fetch_all(
+            listing_urls, listing_index.conditional_headers if listing_index is not None else None
+        )
+        failed = sum(response is None for response in responses)
+        if failed:
+            logging.warning(f"Failed to fetch {failed} listings on page {page}")
+        # rows come back for the fetched listings only, in listing order
+        fetched_urls = [url for url, response in zip(listing_urls, responses) if response is not None]
+        # only fetched listings count as seen, a failed one is tried again if it shows up on a later page
+        seen.record(fetched_urls)
+
+        if parse_pool is None:
+            with metrics.timer("parse"):
+                if listing_index is None:
+                    properties = extract_listing_data([response for response in responses if response is not None])
+                else:
+                    properties = extract_changed_listing_data(listing_urls, responses, listing_index)
+            write_page(page, len(click_links), properties, fetched_urls)
+        else:
+            future, collect = submit_listing_parse(parse_pool, listing_urls, responses, listing_index)
+            pending.append((page, len(click_links), fetched_urls, future, collect))
+            write_parsed(keep=parse_pool.max_pending)
+
+        if empty_pages >= max_empty_pages:
+            logging.info(f"Stopping after {empty_pages} empty pages at page {page}")
+            break
+
+    write_parsed(keep=0)
+    if owns_fetcher:
+        fetcher.close()
+
+    return chunk_writer.rows_written
+
+
+def process_chunk(
+    session: requests.Session,
+    headers: Dict[str, str],
+    base_url: str,
+    category: str,
+    city: str,
+    start_page: int,
+    end_page: int,
+    fetcher: Optional[ListingFetcher] = None,
+    listing_index: Optional[ListingIndex] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    max_empty_pages: int = 3,
+    parse_pool: Optional[ParsePool] = None,
+    scrape_date: Optional[str] = None,
+    seen: Optional[SeenListings] = None,
+    sketches: Optional[PriceSketches] = None,
+) -> str:
+    """Scrape a range of index pages and their listings into CSV content held in memory."""
+    output = io.StringIO()
+    write_chunk(
+        CsvChunkWriter(output), session, headers, base_url, category, city, start_page, end_page,
+        fetcher, listing_index, on_page, max_empty_pages, parse_pool, scrape_date, seen, sketches,
+    )
+    return output.getvalue()
 
-        listings = [requests.get(f"{base_url}{link}", timeout=30) for link in click_links]
 
-        properties = extract_listing_data(listings)
+CHUNK_WRITERS = {
+    "csv": CsvChunkWriter,
+    "parquet": ParquetChunkWriter,
+}
 
-        for property_data in properties:
-            csv_writer.writerow([property_data.get(key, "") for key in header_row])
-        
-        logging.info(f"Processed {len(properties)} properties on page {page}")
-        time.sleep(1)  # Add a small delay between pages
 
-    output.seek(0)
-    return output.getvalue()
+@contextmanager
+def stream_to_gcs(
+    bucket_name: str, file_name: str, output_format: str = "csv", compress: bool = False
+) -> Iterator[ChunkWriter]:
+    """Open a chunk writer that uploads rows to Google Cloud Storage as they are written."""
+    writer_class = CHUNK_WRITERS[output_format]
+    gcs_client = GCSManager(project_id=config.PROJECT_ID)
+    with gcs_client.open_blob_writer(bucket_name, file_name, content_type=writer_class.content_type) as raw:
+        if writer_class is CsvChunkWriter:
+            with open_text_stream(raw, compress=compress) as stream:
+                yield CsvChunkWriter(stream)
+        else:
+            # Parquet compresses its own column chunks
+            chunk_writer = writer_class(raw)
+            yield chunk_writer
+            chunk_writer.close()
+
+    logging.info(f"Data streamed to GCS bucket '{bucket_name}' as '{file_name}'.")
+
+
+@contextmanager
+def stream_to_bigquery(
+    dataset_id: str, table_id: str, mode: str = "pending", bq_client: Optional[BigQueryManager] = None
+) -> Iterator[ChunkWriter]:
+    """Open a chunk writer that appends rows to a BigQuery table through the Storage Write API.
+
+    In pending mode the chunk's rows appear in the table at once when it completes, and never if it fails.
+    Pass the same bq_client for every chunk of a run, so they share its clients and write channel.
+    """
+    bq_client = bq_client or BigQueryManager(project_id=config.PROJECT_ID)
+    with bq_client.open_append_stream(dataset_id, table_id, mode=mode) as chunk_writer:
+        yield chunk_writer
+
+    logging.info(f"Data streamed to BigQuery table '{dataset_id}.{table_id}'.")
+
+
+def chunk_ranges(start_page: int, end_page: int, chunk_size: int = 20) -> List[Tuple[int, int]]:
+    """Split a page range into inclusive (chunk_start, chunk_end) ranges of at most chunk_size pages."""
+    return [
+        (chunk_start, min(chunk_start + chunk_size - 1, end_page))
+        for chunk_start in range(start_page, end_page + 1, chunk_size)
+    ]
+
+
+def chunk_file_name(
+    file_name: str, chunk_start: int, chunk_end: int, output_format: str = "csv", compress: bool = False
+) -> str:
+    """Name of the GCS object holding one chunk of a run."""
+    extension = CHUNK_WRITERS[output_format].extension
+    if compress and output_format == "csv":
+        extension += ".gz"
+    return f"{file_name.split('.')[0]}_{chunk_start}_{chunk_end}.{extension}"
+
+
+def manifest_blob(file_name: str) -> str:
+    """Name of the GCS object holding the checkpoint manifest of a run."""
+    return f"{file_name.split('.')[0]}_manifest.json"
+
+
+def price_sketch_blob(file_name: str, chunk_start: int, chunk_end: int) -> str:
+    """Name of the GCS object holding the price sketches of one chunk of a run."""
+    return f"{file_name.split('.')[0]}_{chunk_start}_{chunk_end}_price_sketch.json.gz"
+
+
+def price_quantiles_blob(file_name: str) -> str:
+    """Name of the GCS object holding the price quantiles of a run, as newline delimited JSON."""
+    return f"{file_name.split('.')[0]}_price_quantiles.json"
+
+
+def listing_index_blob(city: str, category: str) -> str:
+    """Name of the GCS object holding the listing index of a city and category."""
+    return f"listing_index/{city}_{category}.json.gz"
+
+
+def listing_index_part_blob(city: str, category: str, chunk_start: int, chunk_end: int) -> str:
+    """Name of the GCS object holding the index entries touched by one shard."""
+    return f"listing_index/{city}_{category}/{chunk_start}_{chunk_end}.json.gz"
+
+
+def scrape_chunk(
+    session: requests.Session,
+    headers: Dict[str, str],
+    fetcher: ListingFetcher,
+    bucket_name: str,
+    file_name: str,
+    base_url: str,
+    category: str,
+    city: str,
+    chunk_start: int,
+    chunk_end: int,
+    listing_index: Optional[ListingIndex] = None,
+    manifest: Optional[ChunkManifest] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    max_empty_pages: int = 3,
+    stream: bool = False,
+    compress: bool = False,
+    output_format: str = "csv",
+    parse_pool: Optional[ParsePool] = None,
+    bq_dataset: Optional[str] = None,
+    bq_table: Optional[str] = None,
+    bq_stream_mode: str = "pending",
+    scrape_date: Optional[str] = None,
+    seen: Optional[SeenListings] = None,
+    sketch_prices: bool = False,
+    bq_client: Optional[BigQueryManager] = None,
+) -> str:
+    """Scrape one chunk of pages and upload it to GCS, returning the object name.
+
+    Chunks the manifest already records as completed are skipped. With stream, rows are
+    uploaded as they are scraped instead of being buffered for the whole chunk.
+    Parquet chunks are always streamed.
+    With bq_dataset and bq_table, rows are appended straight to that BigQuery table instead,
+    and the returned name is "{bq_dataset}.{bq_table}/{chunk_start}_{chunk_end}"; bq_client is then
+    the BigQuery manager to stream through, shared by the chunks of a run.
+    With sketch_prices, quantile sketches of the chunk's prices are uploaded next to it, see price_sketch_blob.
+    """
+    metrics = fetcher.metrics or PipelineMetrics()
+    if manifest is not None and manifest.is_complete(chunk_start, chunk_end):
+        chunk_name = manifest.completed_object(chunk_start, chunk_end)
+        logging.info(f"Skipping chunk {chunk_start} to {chunk_end}, already uploaded as '{chunk_name}'.")
+        metrics.incr("chunks_skipped")
+        return chunk_name
+
+    logging.info(f"Processing chunk: pages {chunk_start} to {chunk_end}")
+
+    def page_done(page: int, listings: int) -> None:
+        if manifest is not None:
+            manifest.mark_page(chunk_start, chunk_end, page)
+        if on_page is not None:
+            on_page(page, listings)
+
+    sketches = PriceSketches() if sketch_prices else None
+    stream = stream or output_format != "csv"
+    chunk_name = chunk_file_name(file_name, chunk_start, chunk_end, output_format, compress=stream and compress)
+    if bq_table:
+        chunk_name = f"{bq_dataset}.{bq_table}/{chunk_start}_{chunk_end}"
+        with stream_to_bigquery(bq_dataset, bq_table, bq_stream_mode, bq_client) as chunk_writer:
+            write_chunk(
+                chunk_writer, session, headers, base_url, category, city, chunk_start, chunk_end,
+                fetcher, listing_index, page_done, max_empty_pages, parse_pool, scrape_date, seen, sketches,
+            )
+            finalize_started = time.perf_counter()
+        metrics.observe("upload", time.perf_counter() - finalize_started)
+    elif stream:
+        with stream_to_gcs(bucket_name, chunk_name, output_format, compress=compress) as chunk_writer:
+            write_chunk(
+                chunk_writer, session, headers, base_url, category, city, chunk_start, chunk_end,
+                fetcher, listing_index, page_done, max_empty_pages, parse_pool, scrape_date, seen, sketches,
+            )
+            # Rows are uploaded while they are written; what is left is flushing the last part and finalizing.
+            finalize_started = time.perf_counter()
+        metrics.observe("upload", time.perf_counter() - finalize_started)
+    else:
+        csv_content = process_chunk(
+            session, headers, base_url, category, city, chunk_start, chunk_end, fetcher, listing_index, page_done,
+            max_empty_pages, parse_pool, scrape_date, seen, sketches,
+        )
+        with metrics.timer("upload"):
+            upload_to_gcs(bucket_name, chunk_name, csv_content)
+
+    # uploaded before the chunk is marked complete, so a resumed run never skips a chunk without its sketches
+    if sketches is not None:
+        gcs_client = GCSManager(project_id=config.PROJECT_ID)
+        gcs_client.upload_bytes(
+            bucket_name, sketches.dumps(), price_sketch_blob(file_name, chunk_start, chunk_end),
+            content_type="application/gzip",
+        )
+
+    if manifest is not None:
+        manifest.mark_complete(chunk_start, chunk_end, chunk_name)
+    metrics.incr("chunks")
+
+    logging.info(f"Chunk {chunk_start} to {chunk_end} uploaded to GCS bucket '{bucket_name}' as '{chunk_name}'.")
+    return chunk_name
+
+
+def record_run_counters(
+    metrics: PipelineMetrics, rate_limiter: AdaptiveRateLimiter, listing_index: Optional[ListingIndex] = None
+) -> None:
+    """Copy the counters kept by the rate limiter and the listing index into the run's metrics."""
+    metrics.incr("throttled", rate_limiter.throttled)
+    if listing_index is not None:
+        metrics.incr("index_hits", listing_index.hits)
+        metrics.incr("index_misses", listing_index.misses)
 
 
 def house_scrapper(
@@ -169,29 +587,95 @@ def house_scrapper(
     city: str,
     start_page: int,
     end_page: int,
-    chunk_size: int = 20
-) -> None:
-    """Scrape house listings and upload data to GCS as a CSV file."""
-    session = create_session()
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:66.0) Gecko/20100101 Firefox/66.0",
-        "Accept-Encoding": "*",
-        "Connection": "keep-alive",
-    }
-
-    for chunk_start in range(start_page, end_page + 1, chunk_size):
-        chunk_end = min(chunk_start + chunk_size - 1, end_page)
-        logging.info(f"Processing chunk: pages {chunk_start} to {chunk_end}")
-        
-        csv_content = process_chunk(session, headers, base_url, category, city, chunk_start, chunk_end)
-        
-        chunk_file_name = f"{file_name.split('.')[0]}_{chunk_start}_{chunk_end}.csv"
-        upload_to_gcs(bucket_name, chunk_file_name, csv_content)
-        
-        logging.info(f"Chunk {chunk_start} to {chunk_end} uploaded to GCS bucket '{bucket_name}' as '{chunk_file_name}'.")
-
-
-def scrape_and_upload(**kwargs):
+    chunk_size: int = 20,
+    max_workers: int = 8,
+    per_host_limit: int = 4,
+    incremental: bool = False,
+    resume: bool = True,
+    discover_pages: bool = False,
+    max_empty_pages: int = 3,
+    stream: bool = False,
+    compress: bool = False,
+    output_format: str = "csv",
+    max_request_rate: float = 10.0,
+    metrics_textfile: Optional[str] = None,
+    statsd_host: Optional[str] = None,
+    statsd_port: int = 8125,
+    parse_workers: int = 0,
+    bq_dataset: Optional[str] = None,
+    bq_table: Optional[str] = None,
+    bq_stream_mode: str = "pending",
+    scrape_date: Optional[str] = None,
+    dedup_capacity: Optional[int] = None,
+    sketch_prices: bool = False,
+) -> Dict[str, Dict]:
+    """Scrape house listings and upload data to GCS as CSV or Parquet files.
+
+    With resume, a re-run of the same file_name skips the chunks its manifest records as uploaded.
+    With discover_pages, end_page is only a hint for finding the real last page.
+    Stops after max_empty_pages consecutive index pages without listings.
+    With stream, chunks are uploaded as they are scraped, gzip-compressed if compress is set.
+    output_format is "csv" or "parquet".
+    Requests are paced by an adaptive rate limiter capped at max_request_rate per second.
+    With parse_workers, detail pages are parsed in that many processes while fetching goes on.
+    With bq_dataset and bq_table, rows are streamed into that table instead of GCS chunk files.
+    Every row carries scrape_date (YYYY-MM-DD), today's date unless given.
+    Each listing is fetched and written once per run; seen listings are kept in a set, or in a
+    Bloom filter sized for dedup_capacity listings when given, to bound memory.
+    With sketch_prices, every chunk gets price quantile sketches next to it, see merge_price_sketches.
+    Returns the summary of the run's metrics, also written to metrics_textfile and sent to statsd_host if given.
+    """
+    session = create_session(pool_maxsize=max(max_workers, per_host_limit))
+    headers = dict(HEADERS)
+    rate_limiter = AdaptiveRateLimiter(max_rate=max_request_rate)
+    metrics = PipelineMetrics(labels={"category": category, "city": city})
+    fetcher = ListingFetcher(
+        fetch_page, session, headers, max_workers=max_workers, per_host_limit=per_host_limit,
+        rate_limiter=rate_limiter, metrics=metrics,
+    )
+    parse_pool = ParsePool(parse_workers) if parse_workers else None
+    seen = SeenListings(dedup_capacity)
+    gcs_client = GCSManager(project_id=config.PROJECT_ID)
+    bq_client = BigQueryManager(project_id=config.PROJECT_ID) if bq_table else None
+    listing_index = None
+    if incremental:
+        listing_index = ListingIndex.load(gcs_client, bucket_name, listing_index_blob(city, category))
+    manifest = None
+    if resume:
+        manifest = ChunkManifest(gcs_client, bucket_name, manifest_blob(file_name)).load()
+    if discover_pages:
+        end_page = discover_last_page(
+            session, headers, base_url, category, city, hint=end_page, rate_limiter=rate_limiter
+        ) or end_page
+
+    empty_pages = 0
+
+    def track_empty_pages(page: int, listings: int) -> None:
+        nonlocal empty_pages
+        empty_pages = 0 if listings else empty_pages + 1
+
+    for chunk_start, chunk_end in chunk_ranges(start_page, end_page, chunk_size):
+        scrape_chunk(
+            session, headers, fetcher, bucket_name, file_name, base_url, category, city,
+            chunk_start, chunk_end, listing_index, manifest, track_empty_pages, max_empty_pages,
+            stream, compress, output_format, parse_pool, bq_dataset, bq_table, bq_stream_mode, scrape_date, seen,
+            sketch_prices, bq_client,
+        )
+        if empty_pages >= max_empty_pages:
+            logging.info(f"No listings on the last {empty_pages} pages, stopping at page {chunk_end}")
+            break
+
+    fetcher.close()
+    if parse_pool is not None:
+        parse_pool.close()
+    if listing_index is not None:
+        listing_index.save(gcs_client, bucket_name, listing_index_blob(city, category))
+    record_run_counters(metrics, rate_limiter, listing_index)
+    return metrics.export(metrics_textfile, statsd_host, statsd_port)
+
+
+def scrape_and_upload(**kwargs) -> Dict[str, Dict]:
+    """Run house_scrapper from the task op_kwargs, returning its metrics summary as the task's XCom."""
     bucket_name = kwargs.get('bucket_name')
     file_name = kwargs.get('file_name')
     base_url = kwargs.get('base_url')
@@ -199,8 +683,211 @@ def scrape_and_upload(**kwargs):
     city = kwargs.get('city')
     start_page = kwargs.get('start_page')
     end_page = kwargs.get('end_page')
+    max_workers = kwargs.get('max_workers', 8)
+    per_host_limit = kwargs.get('per_host_limit', 4)
+    incremental = kwargs.get('incremental', False)
+    resume = kwargs.get('resume', True)
+    discover_pages = kwargs.get('discover_pages', False)
+    max_empty_pages = kwargs.get('max_empty_pages', 3)
+    stream = kwargs.get('stream', False)
+    compress = kwargs.get('compress', False)
+    output_format = kwargs.get('output_format', 'csv')
+    max_request_rate = kwargs.get('max_request_rate', 10.0)
+    metrics_textfile = kwargs.get('metrics_textfile')
+    statsd_host = kwargs.get('statsd_host')
+    statsd_port = int(kwargs.get('statsd_port', 8125))
+    parse_workers = int(kwargs.get('parse_workers', 0))
+    bq_dataset = kwargs.get('bq_dataset')
+    bq_table = kwargs.get('bq_table')
+    bq_stream_mode = kwargs.get('bq_stream_mode', 'pending')
+    scrape_date = kwargs.get('scrape_date')
+    dedup_capacity = kwargs.get('dedup_capacity')
+    sketch_prices = kwargs.get('sketch_prices', False)
+
+    return house_scrapper(
+        bucket_name, file_name, base_url, category, city, int(start_page), int(end_page),
+        max_workers=max_workers, per_host_limit=per_host_limit, incremental=incremental, resume=resume,
+        discover_pages=discover_pages, max_empty_pages=max_empty_pages, stream=stream, compress=compress,
+        output_format=output_format, max_request_rate=max_request_rate, metrics_textfile=metrics_textfile,
+        statsd_host=statsd_host, statsd_port=statsd_port, parse_workers=parse_workers, bq_dataset=bq_dataset,
+        bq_table=bq_table, bq_stream_mode=bq_stream_mode, scrape_date=scrape_date,
+        dedup_capacity=int(dedup_capacity) if dedup_capacity else None, sketch_prices=sketch_prices,
+    )
+
+
+SHARD_KWARGS = (
+    'bucket_name', 'file_name', 'base_url', 'category', 'city', 'max_workers', 'per_host_limit', 'incremental',
+    'resume', 'max_empty_pages', 'stream', 'compress', 'output_format', 'max_request_rate', 'metrics_textfile',
+    'statsd_host', 'statsd_port', 'parse_workers', 'bq_dataset', 'bq_table', 'bq_stream_mode', 'scrape_date',
+    'dedup_capacity', 'sketch_prices',
+)
+
+
+def plan_chunks(**kwargs) -> List[Dict]:
+    """Build one op_kwargs dict per chunk, for mapping scrape_chunk_and_upload over with expand().
+
+    With discover_pages, end_page is only a hint for finding the real last page.
+    """
+    start_page = int(kwargs.get('start_page'))
+    end_page = int(kwargs.get('end_page'))
+    chunk_size = int(kwargs.get('chunk_size', 20))
+
+    if kwargs.get('discover_pages', False):
+        end_page = discover_last_page(
+            create_session(), dict(HEADERS), kwargs.get('base_url'), kwargs.get('category'), kwargs.get('city'),
+            hint=end_page, rate_limiter=AdaptiveRateLimiter(max_rate=kwargs.get('max_request_rate', 10.0)),
+        ) or end_page
+
+    shard_kwargs = {key: kwargs[key] for key in SHARD_KWARGS if key in kwargs}
+    shards = [
+        {**shard_kwargs, 'chunk_start': chunk_start, 'chunk_end': chunk_end}
+        for chunk_start, chunk_end in chunk_ranges(start_page, end_page, chunk_size)
+    ]
+    logging.info(f"Planned {len(shards)} shards for pages {start_page} to {end_page}")
+    return shards
+
+
+def scrape_chunk_and_upload(**kwargs) -> str:
+    """Scrape and upload a single shard planned by plan_chunks.
+
+    The shard's metrics summary is pushed to XCom under the key "metrics" when run as a task.
+    """
+    bucket_name = kwargs.get('bucket_name')
+    category = kwargs.get('category')
+    city = kwargs.get('city')
+    chunk_start = int(kwargs.get('chunk_start'))
+    chunk_end = int(kwargs.get('chunk_end'))
+    max_workers = kwargs.get('max_workers', 8)
+    per_host_limit = kwargs.get('per_host_limit', 4)
+
+    gcs_client = GCSManager(project_id=config.PROJECT_ID)
+    manifest = None
+    if kwargs.get('resume', True):
+        manifest = ChunkManifest(gcs_client, bucket_name, manifest_blob(kwargs.get('file_name'))).load()
+        if manifest.is_complete(chunk_start, chunk_end):
+            return manifest.completed_object(chunk_start, chunk_end)
+
+    listing_index = None
+    if kwargs.get('incremental', False):
+        listing_index = ListingIndex.load(gcs_client, bucket_name, listing_index_blob(city, category))
+
+    session = create_session(pool_maxsize=max(max_workers, per_host_limit))
+    headers = dict(HEADERS)
+    rate_limiter = AdaptiveRateLimiter(max_rate=kwargs.get('max_request_rate', 10.0))
+    metrics = PipelineMetrics(labels={'category': category, 'city': city, 'chunk': f'{chunk_start}_{chunk_end}'})
+    parse_workers = int(kwargs.get('parse_workers', 0))
+    parse_pool = ParsePool(parse_workers) if parse_workers else None
+    # shards run in separate processes; listings repeated across shards are dropped by the int_listings model
+    dedup_capacity = kwargs.get('dedup_capacity')
+    seen = SeenListings(int(dedup_capacity) if dedup_capacity else None)
+    with ListingFetcher(
+        fetch_page, session, headers, max_workers=max_workers, per_host_limit=per_host_limit,
+        rate_limiter=rate_limiter, metrics=metrics,
+    ) as fetcher:
+        chunk_name = scrape_chunk(
+            session,
+            headers,
+            fetcher,
+            bucket_name,
+            kwargs.get('file_name'),
+            kwargs.get('base_url'),
+            category,
+            city,
+            chunk_start,
+            chunk_end,
+            listing_index,
+            manifest,
+            max_empty_pages=kwargs.get('max_empty_pages', 3),
+            stream=kwargs.get('stream', False),
+            compress=kwargs.get('compress', False),
+            output_format=kwargs.get('output_format', 'csv'),
+            parse_pool=parse_pool,
+            bq_dataset=kwargs.get('bq_dataset'),
+            bq_table=kwargs.get('bq_table'),
+            bq_stream_mode=kwargs.get('bq_stream_mode', 'pending'),
+            scrape_date=kwargs.get('scrape_date'),
+            seen=seen,
+            sketch_prices=kwargs.get('sketch_prices', False),
+            bq_client=BigQueryManager(project_id=config.PROJECT_ID) if kwargs.get('bq_table') else None,
+        )
+    if parse_pool is not None:
+        parse_pool.close()
+
+    # Shards only write the entries they touched; merge_listing_index folds them into the index.
+    if listing_index is not None:
+        listing_index.save(
+            gcs_client, bucket_name, listing_index_part_blob(city, category, chunk_start, chunk_end), updated_only=True
+        )
+
+    record_run_counters(metrics, rate_limiter, listing_index)
+    summary = metrics.export(
+        kwargs.get('metrics_textfile'), kwargs.get('statsd_host'), int(kwargs.get('statsd_port', 8125))
+    )
+    if kwargs.get('ti') is not None:
+        kwargs['ti'].xcom_push(key='metrics', value=summary)
+    return chunk_name
+
+
+def merge_listing_index(**kwargs) -> int:
+    """Merge the index entries written by every shard into the listing index and prune stale entries."""
+    bucket_name = kwargs.get('bucket_name')
+    category = kwargs.get('category')
+    city = kwargs.get('city')
+    retention_days = int(kwargs.get('retention_days', 90))
+
+    gcs_client = GCSManager(project_id=config.PROJECT_ID)
+    index_blob = listing_index_blob(city, category)
+    listing_index = ListingIndex.load(gcs_client, bucket_name, index_blob)
+
+    part_blobs = gcs_client.list_blob_names(bucket_name, prefix=index_blob.replace('.json.gz', '/'))
+    for part_blob in part_blobs:
+        listing_index.merge(ListingIndex.loads(gcs_client.download_as_bytes(bucket_name, part_blob)))
+
+    pruned = listing_index.prune((date.today() - timedelta(days=retention_days)).isoformat())
+    listing_index.save(gcs_client, bucket_name, index_blob)
+    for part_blob in part_blobs:
+        gcs_client.delete_file(bucket_name, part_blob)
+
+    logging.info(f"Merged {len(part_blobs)} index parts into {index_blob}, pruned {pruned} stale entries")
+    return len(listing_index)
+
+
+def price_quantile_rows(sketches: PriceSketches, category: str, scrape_date: str) -> List[Dict]:
+    """Rows of the price_quantiles tables for the merged sketches of a category's run."""
+    listing_type = category.replace('for_', '')
+    return [
+        {**row, 'listing_type': listing_type, 'scrape_date': scrape_date} for row in sketches.quantile_rows((0.5, 0.9))
+    ]
+
+
+def merge_price_sketches(**kwargs) -> int:
+    """Merge the price sketches of every chunk of a run into its price quantiles, returning the number of groups.
+
+    One row per lga and property_type, with the listing count and the median and p90 price, is
+    uploaded as newline delimited JSON to price_quantiles_blob(file_name) for loading into BigQuery.
+    """
+    bucket_name = kwargs.get('bucket_name')
+    file_name = kwargs.get('file_name')
+    category = kwargs.get('category')
+    scrape_date = kwargs.get('scrape_date') or date.today().isoformat()
+
+    gcs_client = GCSManager(project_id=config.PROJECT_ID)
+    sketches = PriceSketches()
+    sketch_blobs = [
+        blob_name for blob_name in gcs_client.list_blob_names(bucket_name, prefix=f"{file_name.split('.')[0]}_")
+        if blob_name.endswith("_price_sketch.json.gz")
+    ]
+    for sketch_blob in sketch_blobs:
+        sketches.merge(PriceSketches.loads(gcs_client.download_as_bytes(bucket_name, sketch_blob)))
+
+    rows = price_quantile_rows(sketches, category, scrape_date)
+    gcs_client.upload_bytes(
+        bucket_name, "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8"), price_quantiles_blob(file_name),
+        content_type="application/x-ndjson",
+    )
 
-    house_scrapper(bucket_name, file_name, base_url, category, city, start_page, end_page)
+    logging.info(f"Merged {len(sketch_blobs)} price sketches into {len(rows)} quantile rows")
+    return len(rows)
 
 
 
@@ -0,0 +1,171 @@
+"""
+Resolution of listing locations to Lagos LGAs and neighborhoods
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bump whenever a keyword is added, removed or reordered. Every row carries it in its gazetteer_version
+# column, so rows resolved by different gazetteers can be told apart and re-resolved.
+GAZETTEER_VERSION = "1"
+
+# (keyword, LGA) in priority order: a location containing several keywords resolves to the first one
+# listed, like the CASE ... WHEN lower(location) LIKE '%keyword%' chain the staging models used to run.
+LGA_KEYWORDS: List[Tuple[str, str]] = [
+    ("lekki", "Eti-Osa"),
+    ("ikoyi", "Eti-Osa"),
+    ("ajah", "Eti-Osa"),
+    ("ikeja", "Ikeja"),
+    ("ojodu", "Ikeja"),
+    ("island", "Eti-Osa"),
+    ("alimosho", "Alimosho"),
+    ("gbagada", "Kosofe"),
+    ("ikosi", "Epe"),
+    ("surulere", "Surulere"),
+    ("ikorodu", "Ikorodu"),
+    ("ipaja", "Alimosho"),
+    ("yaba", "Lagos Mainland"),
+    ("igando", "Alimosho"),
+    ("isolo", "Oshodi-Isolo"),
+    ("egba", "Alimosho"),
+    ("ogba", "Ifako-Ijaiye"),
+    ("maryland", "Kosofe"),
+    ("ogudu", "Kosofe"),
+    ("okota", "Oshodi-Isolo"),
+    ("agege", "Agege"),
+    ("oshodi", "Oshodi-Isolo"),
+    ("sangotedo", "Eti-Osa"),
+    ("shomolu", "Shomolu"),
+    ("odofin", "Amuwo-Odofin"),
+    ("ilupeju", "Mushin"),
+    ("ketu", "Kosofe"),
+    ("idimu", "Alimosho"),
+    ("iju", "Ifako-Ijaiye"),
+    ("epe", "Epe"),
+    ("ojota", "Kosofe"),
+    ("ejigbo", "Oshodi-Isolo"),
+    ("bariga", "Shomolu"),
+    ("apapa", "Apapa"),
+    ("ojo", "Ojo"),
+    ("badagry", "Badagry"),
+    ("mushin", "Mushin"),
+    ("orile", "Agege"),
+    ("isheri", "Kosofe"),
+    ("magodo", "Kosofe"),
+    ("ibeju", "Ibeju-Lekki"),
+]
+
+# (keyword, neighborhood) in priority order, more specific keywords before the ones they contain.
+NEIGHBORHOOD_KEYWORDS: List[Tuple[str, str]] = [
+    ("ikate", "Ikate"),
+    ("lekki phase 1", "Lekki Phase 1"),
+    ("ikoyi", "Ikoyi"),
+    ("ikota", "Ikota"),
+    ("ajah", "Ajah"),
+    ("ogba", "Ogba"),
+    ("oshodi", "Oshodi"),
+    ("chevron", "Chevron"),
+    ("agungi", "Agungi"),
+    ("oniru", "Oniru"),
+    ("victoria island", "Victoria Island"),
+    ("banana island", "Banana Island"),
+    ("yaba", "Yaba"),
+    ("sangotedo", "Ajah"),
+    ("ikeja gra", "Ikeja"),
+    ("isheri", "Isheri"),
+    ("osapa", "Osapa"),
+    ("ikeja", "Ikeja"),
+    ("maryland", "Maryland"),
+    ("lafiaji", "Lafiaji"),
+    ("orchid", "Orchid"),
+    ("vgc", "VGC"),
+    ("ologolo", "Ologolo"),
+    ("jakande lekki", "Jakande"),
+    ("gbagada", "Gbagada"),
+    ("conservation", "Conservation"),
+    ("shomolu", "Shomolu"),
+    ("carlton", "Chevron"),
+    ("egbeda", "Egbeda"),
+    ("admiralty", "Lekki Phase 1"),
+    ("lakowe", "Lakowe"),
+    ("magodo", "Magodo"),
+    ("lekki", "Lekki"),
+]
+
+
+class KeywordMatcher:
+    """
+    Find the highest priority keyword contained in a text, in one pass over the text.
+
+    The keywords are compiled once into an Aho-Corasick automaton, so matching costs the
+    same whatever the number of keywords. Matching is case insensitive.
+    """
+
+    def __init__(self, keywords: Sequence[Tuple[str, str]]):
+        """
+        Initialize the KeywordMatcher class and build its automaton.
+
+        Args:
+            keywords (Sequence[Tuple[str, str]]): (keyword, value) pairs, highest priority first.
+        """
+        self.values = [value for _, value in keywords]
+        self._goto: List[Dict[str, int]] = [{}]
+        # Best (lowest) keyword priority ending at each state, following failure links.
+        self._best: List[Optional[int]] = [None]
+
+        for priority, (keyword, _) in enumerate(keywords):
+            state = 0
+            for char in keyword.lower():
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._best.append(None)
+                state = next_state
+            if self._best[state] is None:
+                self._best[state] = priority
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fail_best = self._best[self._fail[state]]
+            if fail_best is not None and (self._best[state] is None or fail_best < self._best[state]):
+                self._best[state] = fail_best
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0) if state else 0
+                queue.append(next_state)
+
+
+    def match(self, text: Optional[str]) -> Optional[str]:
+        """
+        Get the value of the highest priority keyword in text, or None if it contains none.
+        """
+        if not text:
+            return None
+        goto, fail, best_at = self._goto, self._fail, self._best
+        state, best = 0, None
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = best_at[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self.values[best] if best is not None else None
+
+
+_LGAS = KeywordMatcher(LGA_KEYWORDS)
+_NEIGHBORHOODS = KeywordMatcher(NEIGHBORHOOD_KEYWORDS)
+
+
+def resolve_location(location: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Resolve a scraped location to its (LGA, neighborhood), with None for the parts that are not known."""
+    return _LGAS.match(location), _NEIGHBORHOODS.match(location)
+
@@ -0,0 +1,189 @@
+"""
+Persisted listing fingerprint index for incremental crawls
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Dict, Optional
+
+import requests
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def content_hash(content: bytes) -> str:
+    """Fingerprint of a listing detail page body."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class ListingIndex:
+    """
+    Map of listing url -> validators, content hash, last-seen date and the row scraped from it.
+
+    Each entry looks like:
+        {"etag": ..., "last_modified": ..., "hash": ..., "last_seen": "YYYY-MM-DD", "row": {...}}
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict]] = None, today: Optional[str] = None):
+        """
+        Initialize the ListingIndex class.
+
+        Args:
+            entries (Optional[Dict[str, Dict]], optional): Entries from a previous run. Defaults to None.
+            today (Optional[str], optional): The date recorded as last_seen. Defaults to today's date.
+        """
+        self.entries = entries or {}
+        self.today = today or date.today().isoformat()
+        self.updated: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Build the conditional request headers for a url from its previous validators.
+        """
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+    def unchanged_row(self, url: str, response: requests.Response) -> Optional[Dict[str, str]]:
+        """
+        Get the previous row for a url if its page has not changed since the last run.
+
+        Args:
+            url (str): The listing url.
+            response (requests.Response): The response to the conditional request.
+
+        Returns:
+            Optional[Dict[str, str]]: The previous row, or None if the page must be parsed again.
+        """
+        entry = self.entries.get(url)
+        if not entry or "row" not in entry:
+            self.misses += 1
+            return None
+
+        if response.status_code == 304:
+            self._touch(url, entry, response)
+            self.hits += 1
+            return entry["row"]
+
+        if entry.get("hash") == content_hash(response.content):
+            self._touch(url, entry, response)
+            self.hits += 1
+            return entry["row"]
+
+        self.misses += 1
+        return None
+
+
+    def record(self, url: str, response: requests.Response, row: Dict[str, str]) -> None:
+        """
+        Store the validators, fingerprint and row of a freshly parsed listing.
+        """
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": content_hash(response.content),
+            "last_seen": self.today,
+            "row": row,
+        }
+        self.entries[url] = entry
+        self.updated[url] = entry
+
+
+    def _touch(self, url: str, entry: Dict, response: requests.Response) -> None:
+        # A 304 may carry refreshed validators; keep the old ones otherwise.
+        entry["etag"] = response.headers.get("ETag") or entry.get("etag")
+        entry["last_modified"] = response.headers.get("Last-Modified") or entry.get("last_modified")
+        entry["last_seen"] = self.today
+        self.updated[url] = entry
+
+
+    def merge(self, entries: Dict[str, Dict]) -> None:
+        """
+        Merge entries into the index, keeping the most recently seen entry per url.
+        """
+        for url, entry in entries.items():
+            current = self.entries.get(url)
+            if current is None or entry.get("last_seen", "") >= current.get("last_seen", ""):
+                self.entries[url] = entry
+
+
+    def prune(self, before: str) -> int:
+        """
+        Drop entries last seen before a date (YYYY-MM-DD), returning how many were dropped.
+        """
+        stale = [url for url, entry in self.entries.items() if entry.get("last_seen", "") < before]
+        for url in stale:
+            del self.entries[url]
+        return len(stale)
+
+
+    @staticmethod
+    def dumps(entries: Dict[str, Dict]) -> bytes:
+        """
+        Serialize entries to gzip-compressed JSON.
+        """
+        return gzip.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8"))
+
+
+    @staticmethod
+    def loads(data: Optional[bytes]) -> Dict[str, Dict]:
+        """
+        Deserialize entries written by dumps.
+        """
+        if not data:
+            return {}
+        return json.loads(gzip.decompress(data).decode("utf-8"))
+
+
+    @classmethod
+    def load(cls, gcs_client, bucket_name: str, blob_name: str, today: Optional[str] = None) -> "ListingIndex":
+        """
+        Load the index from Google Cloud Storage, starting empty if it does not exist yet.
+
+        Args:
+            gcs_client (GCSManager): The GCS manager used to download the index.
+            bucket_name (str): The Google Cloud Storage bucket holding the index.
+            blob_name (str): The name of the index blob.
+            today (Optional[str], optional): The date recorded as last_seen. Defaults to today's date.
+        """
+        index = cls(cls.loads(gcs_client.download_as_bytes(bucket_name, blob_name)), today=today)
+        logging.info(f"Loaded {len(index)} entries from listing index {blob_name}")
+        return index
+
+
+    def save(self, gcs_client, bucket_name: str, blob_name: str, updated_only: bool = False) -> None:
+        """
+        Upload the index (or only the entries touched in this run) to Google Cloud Storage.
+
+        Args:
+            gcs_client (GCSManager): The GCS manager used to upload the index.
+            bucket_name (str): The Google Cloud Storage bucket holding the index.
+            blob_name (str): The name of the destination blob.
+            updated_only (bool, optional): Upload only the entries touched in this run. Defaults to False.
+        """
+        entries = self.updated if updated_only else self.entries
+        gcs_client.upload_bytes(bucket_name, self.dumps(entries), blob_name, content_type="application/gzip")
+        logging.info(
+            f"Saved {len(entries)} entries to listing index {blob_name} ({self.hits} unchanged, {self.misses} parsed)"
+        )
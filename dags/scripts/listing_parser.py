@@ -0,0 +1,92 @@
+"""
+Single-pass parsing of listing index and detail pages
+"""
+
+from typing import Callable, Dict, List, Tuple, Union
+from lxml import etree, html
+
+# XPath expressions are compiled once and reused for every listing.
+_ADDRESS = etree.XPath("(//address)[1]")
+_PRICE = etree.XPath(
+    "(//span[contains(concat(' ', normalize-space(@class), ' '), ' price ')"
+    " and @itemprop='price'])[1]/@content"
+)
+_CURRENCY = etree.XPath(
+    "(//span[contains(concat(' ', normalize-space(@class), ' '), ' price ')"
+    " and @itemprop='priceCurrency'])[1]/@content"
+)
+_DETAIL_CELLS = etree.XPath("//td")
+_LISTING_CARDS = etree.XPath("//div[@class='row property-list']")
+_CARD_DESCRIPTION = etree.XPath("(.//div[@class='description hidden-xs'])[1]")
+_DESCENDANT_HREFS = etree.XPath(".//a/@href")
+
+
+def _value(text: str) -> str:
+    return text.split(":")[1].strip()
+
+
+def _flag(text: str) -> str:
+    return "yes"
+
+
+# Details table label -> (field, value extractor), looked up once per <td>.
+DETAIL_FIELDS: Dict[str, Tuple[str, Callable[[str], str]]] = {
+    "Market Status": ("status", _value),
+    "Bedrooms": ("bedrooms", _value),
+    "Bathrooms": ("bathrooms", _value),
+    "Toilets": ("toilets", _value),
+    "Type": ("property_type", _value),
+    "Property Type": ("property_type", _value),
+    "Servicing": ("is_serviced", _flag),
+    "Furnishing": ("is_furnished", _flag),
+    "Sharing": ("is_shared", _flag),
+    "Total Area": ("total_area", _value),
+    "Covered Area": ("covered_area", _value),
+}
+
+
+def parse_listing(content: Union[bytes, str]) -> Dict[str, str]:
+    """Extract all fields of one listing detail page in a single pass over its tree."""
+    data = dict()
+    try:
+        tree = html.fromstring(content)
+    except (etree.ParserError, ValueError):
+        tree = None
+
+    address = _ADDRESS(tree) if tree is not None else None
+    data["location"] = address[0].text_content().strip() if address else "N/A"
+
+    price = _PRICE(tree) if tree is not None else None
+    data["price"] = str(price[0]) if price else "N/A"
+
+    currency = _CURRENCY(tree) if tree is not None else None
+    data["currency"] = str(currency[0]) if currency else "N/A"
+
+    if tree is None:
+        return data
+
+    for cell in _DETAIL_CELLS(tree):
+        text = cell.text_content()
+        handler = DETAIL_FIELDS.get(text.partition(":")[0].strip())
+        if handler is None:
+            continue
+        field, extract = handler
+        data[field] = extract(text)
+
+    return data
+
+
+def listing_links(content: Union[bytes, str]) -> List[str]:
+    """Extract the detail page link of every listing card on an index page: the last link of its description."""
+    try:
+        tree = html.fromstring(content)
+    except (etree.ParserError, ValueError):
+        return []
+
+    links = list()
+    for card in _LISTING_CARDS(tree):
+        description = _CARD_DESCRIPTION(card)
+        hrefs = _DESCENDANT_HREFS(description[0]) if description else None
+        if hrefs:
+            links.append(str(hrefs[-1]))
+    return links
@@ -0,0 +1,259 @@
+"""
+Per-stage timings and counters of a scrape, exportable to Prometheus and StatsD
+"""
+
+import bisect
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Prometheus client default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STATSD_MAX_PACKET = 1432
+
+
+def _escape(value) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram of observed values, as exposed by Prometheus.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the Histogram class.
+
+        Args:
+            buckets (Sequence[float], optional): Sorted upper bounds of the buckets. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile by interpolating linearly inside the bucket that holds it.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (self.max,), self.counts):
+            if count and seen + count >= rank:
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.max
+
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class PipelineMetrics:
+    """
+    Thread-safe registry of the counters and stage timings of one scrape.
+
+    Counters count events such as requests, bytes, retries, failures, listings parsed
+    and rows written. Stages are histograms of seconds spent in fetch, parse, serialize
+    and upload, so a slow run can be attributed to one of them.
+    """
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the PipelineMetrics class.
+
+        Args:
+            labels (Optional[Dict[str, str]], optional): Labels attached to every exported metric,
+                e.g. category and city. Defaults to None.
+            buckets (Sequence[float], optional): Bucket bounds of the stage histograms. Defaults to DEFAULT_BUCKETS.
+        """
+        self.labels = dict(labels or {})
+        self.buckets = tuple(buckets)
+        self.counters: Dict[str, float] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """
+        Add value to a counter.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record the duration of one run of a stage.
+        """
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one run of a stage, even if it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        JSON-serializable summary of every counter and stage, small enough for an XCom.
+        """
+        with self._lock:
+            return {
+                "labels": dict(self.labels),
+                "counters": dict(sorted(self.counters.items())),
+                "stages": {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+            }
+
+
+    def _label_text(self, extra: Optional[Dict[str, str]] = None) -> str:
+        labels = {**self.labels, **(extra or {})}
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+    def to_prometheus(self, prefix: str = "lag_house_scrape") -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{self._label_text()} {value}")
+            for stage, histogram in sorted(self.stages.items()):
+                metric = f"{prefix}_{stage}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for upper, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if upper == float("inf") else repr(upper)
+                    lines.append(f"{metric}_bucket{self._label_text({'le': le})} {cumulative}")
+                lines.append(f"{metric}_sum{self._label_text()} {histogram.sum}")
+                lines.append(f"{metric}_count{self._label_text()} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+    def write_textfile(self, path: str, prefix: str = "lag_house_scrape") -> None:
+        """
+        Write the metrics for the node_exporter textfile collector.
+
+        The file is written next to its destination and renamed into place, so the
+        collector never reads a half-written file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                tmp.write(self.to_prometheus(prefix))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logging.info(f"Metrics written to {path}")
+
+
+    def to_statsd(self, prefix: str = "lag_house.scrape") -> List[str]:
+        """
+        Render the metrics as StatsD lines: counters as counts, stages as count, mean, p95 and max gauges in ms.
+        """
+        lines = list()
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{prefix}.{name}:{value}|c")
+            for stage, histogram in sorted(self.stages.items()):
+                summary = histogram.summary()
+                lines.append(f"{prefix}.{stage}.count:{summary['count']}|c")
+                for key in ("mean", "p95", "max"):
+                    lines.append(f"{prefix}.{stage}.{key}_ms:{summary[key] * 1000:.3f}|g")
+        return lines
+
+
+    def send_statsd(self, host: str, port: int = 8125, prefix: str = "lag_house.scrape") -> None:
+        """
+        Send the metrics to a StatsD daemon over UDP, packing lines into as few packets as fit.
+        """
+        packets, packet = list(), ""
+        for line in self.to_statsd(prefix):
+            if packet and len(packet) + 1 + len(line) > STATSD_MAX_PACKET:
+                packets.append(packet)
+                packet = ""
+            packet = f"{packet}\n{line}" if packet else line
+        if packet:
+            packets.append(packet)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for packet in packets:
+                try:
+                    sock.sendto(packet.encode("utf-8"), (host, port))
+                except OSError as e:
+                    logging.warning(f"Failed to send metrics to StatsD at {host}:{port}: {e}")
+                    return
+        logging.info(f"Metrics sent to StatsD at {host}:{port}")
+
+
+    def export(
+        self,
+        textfile: Optional[str] = None,
+        statsd_host: Optional[str] = None,
+        statsd_port: int = 8125,
+    ) -> Dict[str, Dict]:
+        """
+        Export to every configured sink, log a one-line digest and return the summary.
+        """
+        if textfile:
+            self.write_textfile(textfile)
+        if statsd_host:
+            self.send_statsd(statsd_host, statsd_port)
+        summary = self.summary()
+        stages = ", ".join(
+            f"{stage} {values['sum']:.2f}s/{values['count']}" for stage, values in summary["stages"].items()
+        )
+        logging.info(f"Scrape metrics: {summary['counters']}; stage time: {stages}")
+        return summary
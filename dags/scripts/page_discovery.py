@@ -0,0 +1,85 @@
+"""
+Discovery of the last index page of a listings category
+"""
+
+import logging
+import re
+from typing import Callable, Optional, Union
+from lxml import etree, html
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+_PAGINATION_HREFS = etree.XPath("//ul[contains(@class, 'pagination')]//a/@href")
+_PAGE_PARAM = re.compile(r"[?&]page=(\d+)")
+
+
+class PageProbeError(Exception):
+    """
+    Raised by a has_listings probe when the page could not be fetched, as opposed to having no listings.
+    """
+
+
+def last_page_from_pagination(content: Union[bytes, str]) -> Optional[int]:
+    """
+    Read the highest page number linked from the pagination bar of an index page.
+
+    Args:
+        content (Union[bytes, str]): The index page body.
+
+    Returns:
+        Optional[int]: The highest linked page, or None if the page has no pagination links.
+    """
+    try:
+        tree = html.fromstring(content)
+    except (etree.ParserError, ValueError):
+        return None
+    pages = list()
+    for href in _PAGINATION_HREFS(tree):
+        match = _PAGE_PARAM.search(href)
+        if match:
+            pages.append(int(match.group(1)))
+    return max(pages) if pages else None
+
+
+def search_last_page(has_listings: Callable[[int], bool], hint: int = 1, max_page: int = 100000) -> int:
+    """
+    Find the last page with listings by galloping from a hint and then binary searching.
+
+    Assumes pages 1..N have listings and every page after N is empty, which costs
+    O(log N) probes instead of walking the pages. A probe that fails must raise PageProbeError
+    rather than return False, since taking a failed page for an empty one truncates the crawl.
+
+    Args:
+        has_listings (Callable[[int], bool]): Returns whether a page has any listings.
+        hint (int, optional): A guess of the last page, e.g. the previous run's. Defaults to 1.
+        max_page (int, optional): The largest page ever probed. Defaults to 100000.
+
+    Returns:
+        int: The last page with listings, or 0 if there are none.
+
+    Raises:
+        PageProbeError: When a probe fails, leaving the last page unknown.
+    """
+    hint = min(max(1, hint), max_page)
+    if has_listings(hint):
+        # gallop up: lo has listings, hi is the first probe that does not
+        lo, step = hint, 1
+        hi = min(hint + step, max_page + 1)
+        while hi <= max_page and has_listings(hi):
+            lo = hi
+            step *= 2
+            hi = min(hi + step, max_page + 1)
+    else:
+        lo, hi = 0, hint
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if has_listings(mid):
+            lo = mid
+        else:
+            hi = mid
+
+    logging.info(f"Last page with listings is {lo} (hint was {hint})")
+    return lo
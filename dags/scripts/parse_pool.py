@@ -0,0 +1,94 @@
+"""
+Parsing of listing detail pages in a pool of worker processes
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from dags.scripts.listing_parser import parse_listing
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def parse_listings(contents: List[bytes]) -> List[Dict[str, str]]:
+    """Parse a batch of listing detail pages, run inside a worker process."""
+    return [parse_listing(content) for content in contents]
+
+
+class ParsePool:
+    """
+    Parse batches of raw detail pages in worker processes, so parsing uses every core.
+
+    At most max_pending batches are queued or being parsed at once; submit() blocks
+    until one finishes, which holds the fetchers back when the parsers fall behind.
+    With workers=0, batches are parsed inline in the calling thread.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Initialize the ParsePool class.
+
+        Args:
+            workers (Optional[int], optional): The number of parser processes. Defaults to the number of CPUs.
+            max_pending (Optional[int], optional): The number of batches that may be queued or
+                in progress at once. Defaults to twice the number of workers.
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, workers)
+        self.max_pending = max(1, max_pending or 2 * max(1, self.workers))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Wait for the queued batches and shut down the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    def _start(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that runs fetcher threads can copy locks held by them; start clean workers instead.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            logging.info(f"Started {self.workers} parser processes")
+        return self._executor
+
+
+    def submit(self, contents: List[bytes]) -> "Future[List[Dict[str, str]]]":
+        """
+        Queue a batch of detail pages for parsing, waiting for room in the queue first.
+
+        Returns:
+            Future[List[Dict[str, str]]]: The parsed rows, in the order of contents.
+        """
+        if self.workers == 0 or not contents:
+            future: Future = Future()
+            future.set_result(parse_listings(contents))
+            return future
+
+        self._slots.acquire()
+        try:
+            future = self._start().submit(parse_listings, contents)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
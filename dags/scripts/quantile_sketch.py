@@ -0,0 +1,217 @@
+"""
+Mergeable quantile sketches of listing prices
+"""
+
+import gzip
+import json
+import math
+import random
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dags.scripts.chunk_writer import Row
+
+# Sketches are grouped on these columns; the listing type is that of the category a chunk was scraped for.
+SKETCH_COLUMNS = ("lga", "property_type")
+
+
+class KLLSketch:
+    """
+    Approximate quantiles of a stream of numbers in bounded memory (Karnin, Lang and Liberty).
+
+    Values go through a stack of compactors: when a level is full it is sorted and every other
+    value, picked from a random offset, moves up a level with twice the weight. Ranks are off by
+    about 1.7/k of the count, whatever the count, and sketches of disjoint streams merge into a
+    sketch of their union with the same guarantee.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        """
+        Initialize the KLLSketch class.
+
+        Args:
+            k (int, optional): The capacity of the top compactor, trading memory for accuracy. Defaults to 200.
+            seed (Optional[int], optional): Seed of the compaction coin flips. Defaults to None.
+        """
+        self.k = k
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.compactors: List[List[float]] = [[]]
+        self._random = random.Random(seed)
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def _capacity(self, level: int) -> int:
+        # lower levels shrink geometrically, so the sketch keeps O(k) values in total
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+
+    def _compress(self) -> None:
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items.sort()
+            start = len(items) % 2 # an odd value out stays at this level
+            self.compactors[level + 1].extend(items[start + self._random.randint(0, 1)::2])
+            del items[start:]
+
+
+    def add(self, value: float) -> None:
+        """
+        Add a value to the sketch.
+        """
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.compactors[0].append(value)
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Fold another sketch into this one, returning this one.
+        """
+        if not other.count:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+
+    def quantiles(self, fractions: Sequence[float]) -> List[Optional[float]]:
+        """
+        Get the approximate value at each fraction (0 to 1) of the sorted stream, or None for an empty sketch.
+        """
+        if not self.count:
+            return [None for _ in fractions]
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+        )
+        total = sum(weight for _, weight in weighted)
+        results = list()
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+                continue
+            if fraction >= 1:
+                results.append(self.max)
+                continue
+            target, cumulative = fraction * total, 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    break
+            results.append(value)
+        return results
+
+
+    def to_dict(self) -> Dict:
+        return {"k": self.k, "count": self.count, "min": self.min, "max": self.max, "compactors": self.compactors}
+
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KLLSketch":
+        sketch = cls(data["k"])
+        sketch.count, sketch.min, sketch.max = data["count"], data["min"], data["max"]
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        return sketch
+
+
+class PriceSketches:
+    """
+    One KLLSketch of price per (lga, property_type) found in the rows of a chunk.
+    """
+
+    def __init__(self, k: int = 200):
+        """
+        Initialize the PriceSketches class.
+
+        Args:
+            k (int, optional): The k of every sketch. Defaults to 200.
+        """
+        self.k = k
+        self.sketches: Dict[Tuple, KLLSketch] = {}
+
+
+    def __len__(self) -> int:
+        return len(self.sketches)
+
+
+    def add_rows(self, rows: Iterable[Row]) -> None:
+        """
+        Add the price of every row that has one to the sketch of its group.
+        """
+        for row in rows:
+            price = row.get("price")
+            if price is None or isinstance(price, str):
+                continue
+            key = tuple(row.get(column) for column in SKETCH_COLUMNS)
+            sketch = self.sketches.get(key)
+            if sketch is None:
+                sketch = self.sketches[key] = KLLSketch(self.k)
+            sketch.add(price)
+
+
+    def merge(self, other: "PriceSketches") -> "PriceSketches":
+        """
+        Fold the sketches of another chunk into these, group by group, returning self.
+        """
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = KLLSketch.from_dict(sketch.to_dict())
+        return self
+
+
+    def quantile_rows(self, fractions: Sequence[float] = (0.5, 0.9)) -> List[Dict]:
+        """
+        Get one row per group with its listing count and a price_p{percent} column per fraction.
+        """
+        rows = list()
+        for key, sketch in sorted(self.sketches.items(), key=lambda item: tuple(str(part) for part in item[0])):
+            row = dict(zip(SKETCH_COLUMNS, key))
+            row["listing_count"] = sketch.count
+            for fraction, value in zip(fractions, sketch.quantiles(fractions)):
+                row[f"price_p{round(fraction * 100)}"] = value
+            rows.append(row)
+        return rows
+
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the sketches to gzip-compressed JSON.
+        """
+        groups = [
+            {**dict(zip(SKETCH_COLUMNS, key)), "sketch": sketch.to_dict()} for key, sketch in self.sketches.items()
+        ]
+        return gzip.compress(json.dumps({"k": self.k, "groups": groups}, separators=(",", ":")).encode("utf-8"))
+
+
+    @classmethod
+    def loads(cls, data: Optional[bytes]) -> "PriceSketches":
+        """
+        Deserialize sketches written by dumps, empty if there is no data.
+        """
+        if not data:
+            return cls()
+        content = json.loads(gzip.decompress(data).decode("utf-8"))
+        sketches = cls(content["k"])
+        for group in content["groups"]:
+            key = tuple(group.get(column) for column in SKETCH_COLUMNS)
+            sketches.sketches[key] = KLLSketch.from_dict(group["sketch"])
+        return sketches
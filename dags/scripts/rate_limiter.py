@@ -0,0 +1,144 @@
+"""
+Adaptive request rate control shared by every fetch of a scrape
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date, into seconds.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate follows additive-increase / multiplicative-decrease (AIMD).
+
+    Every fast, successful response raises the rate by `increase` requests per second.
+    A 429, a 5xx or a connection error cuts it by `decrease`, at most once per
+    `cooldown` seconds so a burst of concurrent failures counts as one congestion
+    signal. Slow responses cut it gently. A Retry-After header pauses every caller
+    until it has passed.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 20.0,
+        burst: int = 4,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        target_latency: float = 2.0,
+        cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the AdaptiveRateLimiter class.
+
+        Args:
+            rate (float, optional): The starting rate in requests per second, clamped to [min_rate, max_rate]. Defaults to 2.
+            min_rate (float, optional): The lowest rate backoff can reach. Defaults to 0.2.
+            max_rate (float, optional): The highest rate speed-ups can reach. Defaults to 20.
+            burst (int, optional): The number of requests that may start back to back. Defaults to 4.
+            increase (float, optional): The rate added after a fast success. Defaults to 0.1.
+            decrease (float, optional): The factor applied to the rate on an error. Defaults to 0.5.
+            target_latency (float, optional): Responses slower than this many seconds slow the rate down. Defaults to 2.
+            cooldown (float, optional): The minimum number of seconds between two multiplicative decreases. Defaults to 1.
+            clock (Callable[[], float], optional): Monotonic clock, replaceable in tests. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): Sleep function, replaceable in tests. Defaults to time.sleep.
+        """
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = float("-inf")
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+
+    def acquire(self) -> float:
+        """
+        Wait for the next request slot, returning the number of seconds waited.
+        """
+        with self._lock:
+            now = self._clock()
+            interval = 1.0 / self.rate
+            # virtual scheduling: slots are interval apart, up to burst of them may be taken early
+            slot = max(self._next_slot, now - (self.burst - 1) * interval)
+            self._next_slot = slot + interval
+            start_at = max(slot, self._paused_until)
+            self.requests += 1
+        wait = max(0.0, start_at - now)
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+    def record(self, status_code: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        """
+        Adjust the rate from the outcome of a request.
+
+        Args:
+            status_code (Optional[int]): The response status, or None if the request failed to connect.
+            latency (float): The number of seconds the request took.
+            retry_after (Optional[float], optional): Seconds to pause from a Retry-After header. Defaults to None.
+        """
+        with self._lock:
+            now = self._clock()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+            if status_code is None or status_code == 429 or status_code >= 500:
+                if status_code == 429:
+                    self.throttled += 1
+                else:
+                    self.errors += 1
+                if now - self._last_decrease >= self.cooldown:
+                    self._set_rate(self.rate * self.decrease)
+                    self._last_decrease = now
+            elif latency > self.target_latency:
+                self._set_rate(self.rate * (1 - (1 - self.decrease) / 4))
+            else:
+                self._set_rate(self.rate + self.increase)
+
+
+    def _set_rate(self, rate: float) -> None:
+        old_rate = self.rate
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        if self.rate < old_rate * 0.9:
+            logging.info(f"Backing off request rate from {old_rate:.2f}/s to {self.rate:.2f}/s")
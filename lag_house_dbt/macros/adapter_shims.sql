@@ -0,0 +1,81 @@
+{#
+    Shims for the bits of SQL and model config that differ between the BigQuery target (dev)
+    and the DuckDB target (local), so the same models run on both.
+#}
+
+{# The first day of the month of a date column, as a DATE. #}
+{% macro month_of(column) %}
+    {{- return(adapter.dispatch('month_of')(column)) -}}
+{% endmacro %}
+
+{% macro bigquery__month_of(column) -%}
+    date_trunc({{ column }}, month)
+{%- endmacro %}
+
+{% macro default__month_of(column) -%}
+    cast(date_trunc('month', {{ column }}) as date)
+{%- endmacro %}
+
+
+{# Incremental models upsert on their unique_key: merge on BigQuery, delete+insert where merge is not supported. #}
+{% macro upsert_strategy() %}
+    {{- return('merge' if target.type == 'bigquery' else 'delete+insert') -}}
+{% endmacro %}
+
+
+{# Monthly partitioning of a date column on BigQuery; DuckDB tables are not partitioned. #}
+{% macro monthly_partition(column) %}
+    {%- if target.type == 'bigquery' -%}
+        {{- return({'field': column, 'data_type': 'date', 'granularity': 'month'}) -}}
+    {%- endif -%}
+    {{- return(none) -}}
+{% endmacro %}
+
+
+{#
+    Limit the merge to the rows of the destination whose date column falls in the current or previous
+    month, so BigQuery only scans those partitions. Only the BigQuery merge takes predicates on DBT_INTERNAL_DEST.
+#}
+{% macro recent_months_predicates(column) %}
+    {%- if target.type == 'bigquery' -%}
+        {{- return(["DBT_INTERNAL_DEST." ~ column ~ " >= date_sub(date_trunc(current_date(), month), interval 1 month)"]) -}}
+    {%- endif -%}
+    {{- return(none) -}}
+{% endmacro %}
+
+
+{# The approximate value at fraction (0 to 1) of the sorted values of a column, as an aggregate. #}
+{% macro approx_quantile(column, fraction) %}
+    {{- return(adapter.dispatch('approx_quantile')(column, fraction)) -}}
+{% endmacro %}
+
+{% macro bigquery__approx_quantile(column, fraction) -%}
+    APPROX_QUANTILES({{ column }}, 100)[OFFSET({{ (fraction * 100) | round | int }})]
+{%- endmacro %}
+
+{% macro default__approx_quantile(column, fraction) -%}
+    approx_quantile({{ column }}, {{ fraction }})
+{%- endmacro %}
+
+
+{#
+    The identity of a listing from its url, as dags/scripts/dedup.py's listing_key: the numeric ID the
+    last path segment starts with, else the url without scheme, query, fragment or trailing slash.
+#}
+{% macro listing_key(column) %}
+    {{- return(adapter.dispatch('listing_key')(column)) -}}
+{% endmacro %}
+
+{% macro bigquery__listing_key(column) -%}
+    coalesce(
+        regexp_extract({{ column }}, r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]*)?[^?#]*/(\d+)(?:-[^/?#]*)?/*(?:[?#].*)?$'),
+        regexp_extract({{ column }}, r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?([^?#]*?)/*(?:[?#].*)?$')
+    )
+{%- endmacro %}
+
+{% macro default__listing_key(column) -%}
+    coalesce(
+        nullif(regexp_extract({{ column }}, '^(?:[a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]*)?[^?#]*/(\d+)(?:-[^/?#]*)?/*(?:[?#].*)?$', 1), ''),
+        regexp_extract({{ column }}, '^(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?([^?#]*?)/*(?:[?#].*)?$', 1)
+    )
+{%- endmacro %}
@@ -0,0 +1,31 @@
+{#
+    Fail with a hint to --full-refresh when the existing table of the current incremental model
+    lacks one of the columns, i.e. it was built by an earlier version of the model.
+#}
+{% macro require_loaded_columns(columns) %}
+    {%- if execute and is_incremental() -%}
+        {%- set existing = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list -%}
+        {%- for column in columns if column | lower not in existing -%}
+            {{ exceptions.raise_compiler_error(
+                this ~ " has no " ~ column ~ " column: it was built by an earlier version of the model."
+                ~ " Rebuild it once with dbt run --full-refresh (the dbt_transformation DAG's full_refresh param)."
+            ) }}
+        {%- endfor -%}
+    {%- endif -%}
+{% endmacro %}
+
+
+{#
+    The latest value of a date column already loaded into the current incremental model, as a DATE literal.
+
+    A literal rather than a subquery, so BigQuery can prune the partitions a filter on it skips.
+    Fails with a hint to --full-refresh when the existing table predates the column.
+#}
+{% macro latest_loaded(column) %}
+    {%- set latest = none -%}
+    {%- if execute and is_incremental() -%}
+        {{- require_loaded_columns([column]) -}}
+        {%- set latest = run_query("SELECT max(" ~ column ~ ") FROM " ~ this).columns[0].values()[0] -%}
+    {%- endif -%}
+    DATE '{{ latest if latest is not none else "1900-01-01" }}'
+{%- endmacro %}
@@ -1,11 +1,19 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'lga', 'bedrooms'],
+    partition_by=monthly_partition('scrape_month')
+) }}
 
 SELECT
+    scrape_month,
     lga,
     bedrooms,
     ROUND(AVG(CASE WHEN listing_type = 'rent' THEN avg_price ELSE NULL END), 2) AS avg_rent_price,
     ROUND(AVG(CASE WHEN listing_type = 'sale' THEN avg_price ELSE NULL END), 2) AS avg_sale_price,
     SUM(listing_count) AS num_listings,
 FROM {{ ref('int_bedroom_bathroom_analysis') }}
-GROUP BY 1,2
-ORDER BY bedrooms
+{% if is_incremental() %}
+WHERE scrape_month >= {{ latest_loaded("scrape_month") }}
+{% endif %}
+GROUP BY 1,2,3
@@ -1,9 +1,18 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'lga'],
+    partition_by=monthly_partition('scrape_month')
+) }}
 
 SELECT
+    scrape_month,
     lga,
     ROUND(AVG(CASE WHEN listing_type = 'rent' THEN avg_price ELSE NULL END), 2) AS avg_rent_price,
     ROUND(AVG(CASE WHEN listing_type = 'sale' THEN avg_price ELSE NULL END), 2) AS avg_sale_price,
     SUM(listing_count) as num_listings
 FROM {{ ref('int_property_metrics') }}
-GROUP BY 1
+{% if is_incremental() %}
+WHERE scrape_month >= {{ latest_loaded("scrape_month") }}
+{% endif %}
+GROUP BY 1,2
@@ -0,0 +1,35 @@
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'lga', 'property_type', 'listing_type'],
+    partition_by=monthly_partition('scrape_month')
+) }}
+
+-- median and p90 price per scrape month, merged at scrape time from the quantile sketches of
+-- every chunk (dags/scripts/quantile_sketch.py), so no listing is scanned here. Unlike
+-- int_property_metrics, listings are not filtered on price range or property type.
+WITH quantiles AS (
+    SELECT * FROM {{ source('raw', 'lagos_for_rent_price_quantiles_raw') }}
+    UNION ALL
+    SELECT * FROM {{ source('raw', 'lagos_for_sale_price_quantiles_raw') }}
+)
+
+SELECT
+    {{ month_of('scrape_date') }} AS scrape_month,
+    lga,
+    -- part of the unique key, which never matches NULLs on merge
+    coalesce(property_type, 'Unknown') AS property_type,
+    listing_type,
+    listing_count,
+    price_p50 AS median_price,
+    price_p90 AS p90_price,
+FROM quantiles
+WHERE lga is not null
+{% if is_incremental() %}
+    and {{ month_of('scrape_date') }} >= {{ latest_loaded("scrape_month") }}
+{% endif %}
+-- a month scraped twice keeps its latest run
+QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY {{ month_of('scrape_date') }}, lga, coalesce(property_type, 'Unknown'), listing_type
+    ORDER BY scrape_date DESC
+) = 1
@@ -1,10 +1,19 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'property_type'],
+    partition_by=monthly_partition('scrape_month')
+) }}
 
 SELECT
+    scrape_month,
     property_type,
     ROUND(AVG(CASE WHEN listing_type = 'rent' THEN avg_price ELSE NULL END), 2) AS avg_rent_price,
     ROUND(AVG(CASE WHEN listing_type = 'sale' THEN avg_price ELSE NULL END), 2) AS avg_sale_price,
     SUM(listing_count) AS num_listings,
     -- AVG(median_price) AS avg_price,
 FROM {{ ref('int_property_metrics') }}
-GROUP BY 1
+{% if is_incremental() %}
+WHERE scrape_month >= {{ latest_loaded("scrape_month") }}
+{% endif %}
+GROUP BY 1,2
@@ -1,7 +1,16 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'bedrooms'],
+    partition_by=monthly_partition('scrape_month')
+) }}
 
 SELECT
+    scrape_month,
     bedrooms,
     sum(listing_count) AS total_listings,
 FROM {{ ref('int_bedroom_bathroom_analysis') }}
-GROUP BY 1
\ No newline at end of file
+{% if is_incremental() %}
+WHERE scrape_month >= {{ latest_loaded("scrape_month") }}
+{% endif %}
+GROUP BY 1,2
\ No newline at end of file
@@ -1,22 +1,31 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['scrape_month', 'lga', 'bedrooms', 'listing_type'],
+    partition_by=monthly_partition('scrape_month')
+) }}
 
+-- aggregated per scrape month; each run only recomputes the months of the new snapshot
 WITH combined_listings AS (
-    SELECT * FROM {{ ref('stg_rental_listings') }}
+    SELECT * FROM {{ ref('int_listings') }}
     WHERE
     property_type in (
-    "Self Contain (Single Rooms)",
-    "Flat / Apartment",
-    "Mini Flat (Room and Parlour)",
-    "Semi-detached Duplex",
-    "Detached Bungalow",
-    "Semi-detached Bungalow",
-    "Detached Duplex",
-    "House",
-    "Terraced Duplex",
-    "Terraced Bungalow"
+    'Self Contain (Single Rooms)',
+    'Flat / Apartment',
+    'Mini Flat (Room and Parlour)',
+    'Semi-detached Duplex',
+    'Detached Bungalow',
+    'Semi-detached Bungalow',
+    'Detached Duplex',
+    'House',
+    'Terraced Duplex',
+    'Terraced Bungalow'
         )
-    and
-    price between 100000 and 150000000
+    and (
+        (listing_type = 'rent' and price between 100000 and 150000000)
+        or
+        (listing_type = 'sale' and price between 100000 and 50000000000)
+    )
     and 
     bedrooms is not null 
     and 
@@ -25,35 +34,14 @@ WITH combined_listings AS (
     toilets is not null
     and 
     lga is not null 
-    UNION ALL
-    SELECT * FROM {{ ref('stg_sale_listings') }}
-    WHERE
-    property_type in (
-    "Self Contain (Single Rooms)",
-    "Flat / Apartment",
-    "Mini Flat (Room and Parlour)",
-    "Semi-detached Duplex",
-    "Detached Bungalow",
-    "Semi-detached Bungalow",
-    "Detached Duplex",
-    "House",
-    "Terraced Duplex",
-    "Terraced Bungalow"
-        )
+    {% if is_incremental() %}
     and
-    price between 100000 and 50000000000
-    and 
-    bedrooms is not null 
-    and 
-    bathrooms is not null 
-    and 
-    toilets is not null
-    and 
-    lga is not null 
-    
+    scrape_month >= {{ latest_loaded("scrape_month") }}
+    {% endif %}
 )
 
 SELECT
+    scrape_month,
     lga,
     bedrooms,
     listing_type,
@@ -61,4 +49,4 @@ SELECT
     COUNT(*)  listing_count
 FROM combined_listings
 where bedrooms < 4 and lga not in ('Mushin','Apapa')
-GROUP BY 1, 2, 3
\ No newline at end of file
+GROUP BY 1, 2, 3, 4
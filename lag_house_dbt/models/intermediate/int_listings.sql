@@ -0,0 +1,27 @@
+{{ config(
+    materialized='incremental',
+    incremental_strategy=upsert_strategy(),
+    unique_key=['listing_id', 'scrape_month'],
+    partition_by=monthly_partition('scrape_month'),
+    cluster_by=['listing_type', 'lga'],
+    incremental_predicates=recent_months_predicates('scrape_month')
+) }}
+
+-- one row per listing per scrape month. Each run only reads the raw partitions from the latest
+-- loaded scrape date on, and merges them in; older months are kept as history.
+-- The merge only scans the last two months of this table: reloading an older snapshot needs --full-refresh.
+WITH snapshot AS (
+    SELECT * FROM {{ ref('stg_rental_listings') }}
+    UNION ALL
+    SELECT * FROM {{ ref('stg_sale_listings') }}
+)
+
+SELECT *
+FROM snapshot
+WHERE listing_url is not null
+{% if is_incremental() %}
+    and scrape_date >= {{ latest_loaded("scrape_date") }}
+    {{- require_loaded_columns(['listing_id', 'gazetteer_version']) }}
+{% endif %}
+-- a listing scraped twice in a month keeps its latest row, whatever its url
+QUALIFY ROW_NUMBER() OVER (PARTITION BY listing_id, scrape_month ORDER BY scrape_date DESC) = 1
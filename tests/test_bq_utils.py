@@ -0,0 +1,60 @@
+import json
+import pytest
+from unittest.mock import patch
+from dags.scripts import bq_utils
+from dags.scripts.bq_utils import clear_schema_cache, load_schema, split_gcs_uri
+from dags.scripts.gcp_manager import clear_storage_clients
+
+SCHEMA = [{"name": "title", "type": "STRING", "mode": "NULLABLE"}]
+
+@pytest.fixture(autouse=True)
+def schema_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(bq_utils, 'SCHEMA_CACHE_DIR', str(tmp_path / 'cache'))
+    clear_schema_cache()
+    clear_storage_clients()
+    yield
+    clear_schema_cache()
+    clear_storage_clients()
+
+@pytest.fixture
+def schema_blob():
+    with patch('dags.scripts.gcp_manager.storage.Client') as mock_client:
+        blob = mock_client.return_value.bucket.return_value.blob.return_value
+        blob.download_as_text.return_value = json.dumps(SCHEMA)
+        blob.generation = 1
+        yield blob
+
+def test_split_gcs_uri():
+    assert split_gcs_uri('gs://bucket/schemas/listings.json') == ('bucket', 'schemas/listings.json')
+
+def test_load_schema_reads_local_file(tmp_path):
+    path = tmp_path / 'schema.json'
+    path.write_text(json.dumps(SCHEMA))
+
+    assert load_schema(str(path)) == SCHEMA
+
+def test_load_schema_memoizes_gcs_schema(schema_blob):
+    assert load_schema('gs://bucket/schema.json') == SCHEMA
+    assert load_schema('gs://bucket/schema.json') == SCHEMA
+
+    schema_blob.download_as_text.assert_called_once()
+    schema_blob.reload.assert_not_called()
+
+def test_load_schema_uses_disk_cache_in_a_new_process(schema_blob):
+    load_schema('gs://bucket/schema.json')
+    clear_schema_cache()
+
+    assert load_schema('gs://bucket/schema.json') == SCHEMA
+    schema_blob.download_as_text.assert_called_once()
+
+def test_load_schema_checks_generation_once_stale(schema_blob):
+    load_schema('gs://bucket/schema.json')
+
+    assert load_schema('gs://bucket/schema.json', ttl=0) == SCHEMA
+    schema_blob.reload.assert_called_once()
+    schema_blob.download_as_text.assert_called_once()
+
+    schema_blob.generation = 2
+    schema_blob.download_as_text.return_value = json.dumps(SCHEMA * 2)
+    assert load_schema('gs://bucket/schema.json', ttl=0) == SCHEMA * 2
+    assert schema_blob.download_as_text.call_count == 2
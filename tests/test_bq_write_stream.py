@@ -0,0 +1,94 @@
+import pytest
+from concurrent.futures import Future
+from unittest.mock import patch
+from dags.scripts.bq_write_stream import LISTING_COLUMNS, BigQueryAppendStream, row_message_class
+from dags.scripts.gcp_manager import BigQueryManager
+
+class FakeTransport:
+    """Keeps appended rows per stream, and only shows committed-mode or committed pending rows in the table."""
+
+    def __init__(self):
+        self.streams = {}
+        self.table = []
+        self.requests = []
+
+    def create_stream(self, table_path, mode):
+        name = f'{table_path}/streams/{len(self.streams)}'
+        self.streams[name] = {'mode': mode, 'rows': [], 'finalized': False}
+        return name
+
+    def append(self, stream_name, descriptor_proto, serialized_rows, offset):
+        stream = self.streams[stream_name]
+        assert offset == len(stream['rows'])
+        message_class, _ = row_message_class(LISTING_COLUMNS)
+        rows = [message_class.FromString(data) for data in serialized_rows]
+        stream['rows'].extend(rows)
+        if stream['mode'] == 'committed':
+            self.table.extend(rows)
+        self.requests.append(len(serialized_rows))
+        future = Future()
+        future.set_result(None)
+        return future
+
+    def finalize(self, stream_name):
+        self.streams[stream_name]['finalized'] = True
+        return len(self.streams[stream_name]['rows'])
+
+    def commit(self, table_path, stream_names):
+        for name in stream_names:
+            assert self.streams[name]['finalized']
+            self.table.extend(self.streams[name]['rows'])
+
+def test_rows_are_typed_and_sent_in_batches():
+    transport = FakeTransport()
+
+    with BigQueryAppendStream(transport, 'projects/p/datasets/d/tables/t', max_batch_rows=2) as stream:
+        stream.write_rows([
+            {'location': 'Ikoyi, Lagos', 'bedrooms': '4', 'price': '120,000,000', 'total_area': '600 sqm',
+             'scrape_date': '1970-01-31'},
+            {'location': 'Yaba, Lagos', 'bedrooms': 'N/A', 'price': 'N/A'},
+            {'location': 'Ajah, Lagos', 'bedrooms': '2', 'price': '50000000', 'currency': 'NGN'},
+        ])
+
+    assert transport.requests == [2, 1]
+    first, second, third = transport.table
+    assert (first.location, first.bedrooms, first.price, first.total_area) == ('Ikoyi, Lagos', 4, 120000000.0, 600.0)
+    assert first.scrape_date == 30
+    assert not second.HasField('bedrooms') and not second.HasField('price')
+    assert third.currency == 'NGN'
+
+def test_pending_rows_only_appear_on_commit():
+    transport = FakeTransport()
+    stream = BigQueryAppendStream(transport, 'projects/p/datasets/d/tables/t', mode='pending', max_batch_rows=1)
+
+    stream.write_rows([{'location': 'a'}, {'location': 'b'}])
+    stream.flush()
+    assert transport.table == []
+
+    assert stream.close() == 2
+    assert [row.location for row in transport.table] == ['a', 'b']
+
+def test_failed_pending_stream_is_aborted_without_commit():
+    transport = FakeTransport()
+
+    with pytest.raises(RuntimeError):
+        with BigQueryAppendStream(transport, 'projects/p/datasets/d/tables/t', mode='pending') as stream:
+            stream.write_rows([{'location': 'a'}])
+            raise RuntimeError('scrape failed')
+
+    assert transport.table == []
+    assert all(stream['finalized'] for stream in transport.streams.values())
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        BigQueryAppendStream(FakeTransport(), 'projects/p/datasets/d/tables/t', mode='buffered')
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_open_append_stream_targets_table_path(mock_client):
+    mock_client.return_value.project = 'test-project'
+    transport = FakeTransport()
+
+    stream = BigQueryManager('test-project').open_append_stream('raw', 'sale_listings', transport=transport)
+
+    assert stream.table_path == 'projects/test-project/datasets/raw/tables/sale_listings'
+    assert stream.stream_name in transport.streams
@@ -0,0 +1,74 @@
+import json
+from unittest.mock import Mock
+from google.api_core.exceptions import PreconditionFailed
+from google.cloud.exceptions import NotFound
+from dags.scripts.chunk_manifest import ChunkManifest
+
+class FakeBlob:
+    """In-memory blob with generation preconditions, shared by every handle on the same name."""
+
+    def __init__(self, store):
+        self.store = store
+        self.generation = None
+        self.conflicts = 0
+
+    def download_as_bytes(self):
+        if 'data' not in self.store:
+            raise NotFound('missing')
+        self.generation = self.store['generation']
+        return self.store['data']
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        if self.conflicts:
+            self.conflicts -= 1
+            raise PreconditionFailed('generation mismatch')
+        if if_generation_match != self.store.get('generation', 0):
+            raise PreconditionFailed('generation mismatch')
+        self.store['data'] = data.encode('utf-8')
+        self.store['generation'] = self.store.get('generation', 0) + 1
+
+def make_manifest(store, blob=None):
+    gcs_client = Mock()
+    gcs_client.get_bucket.return_value.blob.side_effect = lambda name: blob or FakeBlob(store)
+    return ChunkManifest(gcs_client, 'test-bucket', 'run_manifest.json', progress_interval=0)
+
+def test_load_missing_manifest():
+    manifest = make_manifest({}).load()
+
+    assert manifest.completed == {}
+    assert not manifest.is_complete(1, 20)
+
+def test_mark_page_and_complete():
+    store = {}
+    manifest = make_manifest(store).load()
+
+    manifest.mark_page(1, 20, 7)
+    assert json.loads(store['data'])['in_progress']['1_20']['page'] == 7
+
+    manifest.mark_complete(1, 20, 'run_1_20.csv')
+    state = json.loads(store['data'])
+    assert state['in_progress'] == {}
+    assert state['completed']['1_20']['object'] == 'run_1_20.csv'
+
+    resumed = make_manifest(store).load()
+    assert resumed.is_complete(1, 20)
+    assert resumed.completed_object(1, 20) == 'run_1_20.csv'
+
+def test_mark_complete_keeps_other_shards_updates():
+    store = {}
+    make_manifest(store).load().mark_complete(1, 20, 'run_1_20.csv')
+    stale = make_manifest(store)
+
+    stale.mark_complete(21, 40, 'run_21_40.csv')
+
+    assert set(json.loads(store['data'])['completed']) == {'1_20', '21_40'}
+
+def test_mark_complete_retries_on_generation_conflict():
+    store = {}
+    blob = FakeBlob(store)
+    blob.conflicts = 2
+    manifest = make_manifest(store, blob)
+
+    manifest.mark_complete(1, 20, 'run_1_20.csv')
+
+    assert manifest.is_complete(1, 20)
@@ -0,0 +1,92 @@
+import gzip
+import io
+from datetime import date
+from dags.scripts.chunk_writer import COLUMNS, CsvChunkWriter, ListingRecord, ParquetChunkWriter, open_text_stream, to_float, to_int
+
+def test_csv_chunk_writer():
+    output = io.StringIO()
+    writer = CsvChunkWriter(output)
+
+    writer.write_rows([{'location': 'Test', 'price': '1000'}])
+
+    assert output.getvalue().splitlines() == [','.join(COLUMNS), 'Test,,,,,,,,,,,1000,,,,,,']
+    assert writer.rows_written == 1
+
+def test_open_text_stream_leaves_raw_open():
+    raw = io.BytesIO()
+
+    with open_text_stream(raw) as stream:
+        CsvChunkWriter(stream).write_rows([{'location': 'Ikoyi, Lagos'}])
+
+    assert not raw.closed
+    assert raw.getvalue().decode('utf-8').splitlines()[1] == '"Ikoyi, Lagos",,,,,,,,,,,,,,,,,'
+
+def test_open_text_stream_compressed():
+    raw = io.BytesIO()
+
+    with open_text_stream(raw, compress=True) as stream:
+        CsvChunkWriter(stream).write_rows([{'location': 'Test', 'price': '1000'}] * 100)
+
+    lines = gzip.decompress(raw.getvalue()).decode('utf-8').splitlines()
+    assert len(lines) == 101
+    assert len(raw.getvalue()) < len('\n'.join(lines))
+
+def test_parquet_chunk_writer_types_columns():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    raw = io.BytesIO()
+    writer = ParquetChunkWriter(raw, row_group_size=2)
+    writer.write_rows([
+        {'location': 'Lekki, Lagos', 'bedrooms': '4', 'total_area': '1,200 sqm', 'price': '85000000', 'currency': 'NGN',
+         'scrape_date': '2024-10-31'},
+        {'location': 'Yaba, Lagos', 'bedrooms': '', 'price': 'N/A', 'is_serviced': 'yes'},
+        {'location': 'Lekki, Lagos', 'toilets': '3'},
+    ])
+    writer.close()
+
+    parquet_file = pq.ParquetFile(io.BytesIO(raw.getvalue()))
+    table = parquet_file.read()
+    assert parquet_file.metadata.num_row_groups == 2
+    assert table.schema.field('bedrooms').type == pa.int64()
+    assert table.schema.field('price').type == pa.float64()
+    assert table.column('bedrooms').to_pylist() == [4, None, None]
+    assert table.column('total_area').to_pylist() == [1200.0, None, None]
+    assert table.column('price').to_pylist() == [85000000.0, None, None]
+    assert table.column('is_serviced').to_pylist() == [None, 'yes', None]
+    assert table.schema.field('scrape_date').type == pa.date32()
+    assert table.column('scrape_date').to_pylist() == [date(2024, 10, 31), None, None]
+    assert writer.rows_written == 3
+    assert not raw.closed
+
+def test_parse_numbers():
+    assert to_float('1,200 sqm') == 1200.0
+    assert to_float('N/A') is None
+    assert to_int('3') == 3
+    assert to_int(None) is None
+
+def test_listing_record_types_columns_once():
+    record = ListingRecord.from_row({'location': 'Lekki, Lagos', 'bedrooms': '4', 'price': 'N/A'}, scrape_date='2024-10-31')
+
+    assert record.bedrooms == 4
+    assert record.price is None
+    assert record.scrape_date == date(2024, 10, 31)
+    assert record.get('toilets', '') == ''
+    assert len(record.values()) == len(COLUMNS)
+    assert not hasattr(record, '__dict__')
+
+def test_writers_take_listing_records():
+    import pyarrow.parquet as pq
+
+    row = {'location': 'Test', 'bedrooms': '4', 'price': '1000'}
+    output = io.StringIO()
+    CsvChunkWriter(output).write_rows([ListingRecord.from_row(row)])
+    assert output.getvalue().splitlines()[1] == 'Test,,4,,,,,,,,,1000.0,,,,,,'
+
+    raw = io.BytesIO()
+    writer = ParquetChunkWriter(raw)
+    writer.write_rows([ListingRecord.from_row(row), row])
+    writer.close()
+    table = pq.read_table(io.BytesIO(raw.getvalue()))
+    assert table.column('bedrooms').to_pylist() == [4, 4]
+    assert table.column('price').to_pylist() == [1000.0, 1000.0]
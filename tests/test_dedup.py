@@ -0,0 +1,40 @@
+from dags.scripts.dedup import BloomFilter, SeenListings, listing_key
+
+def test_listing_key():
+    assert listing_key('https://site.com/for-sale/flats/lagos/lekki/2076519-3-bedroom-flat') == '2076519'
+    assert listing_key('https://site.com/2076519-3-bedroom-flat/?utm=1#photos') == '2076519'
+    assert listing_key('https://site.com/for-sale/flats/lagos/lekki/') == 'site.com/for-sale/flats/lagos/lekki'
+
+def test_seen_listings_keeps_first_occurrence():
+    seen = SeenListings()
+
+    assert seen.filter_new(['http://s/1-a', 'http://s/2-b', 'http://s/1-a']) == ['http://s/1-a', 'http://s/2-b']
+    seen.record(['http://s/1-a', 'http://s/2-b'])
+    # the same listing under another slug, on a later page
+    assert seen.filter_new(['http://s/2-b-renamed', 'http://s/3-c']) == ['http://s/3-c']
+    assert seen.duplicates == 2
+
+def test_seen_listings_only_records_fetched_listings():
+    seen = SeenListings()
+
+    assert seen.filter_new(['http://s/1-a', 'http://s/2-b']) == ['http://s/1-a', 'http://s/2-b']
+    seen.record(['http://s/2-b']) # the fetch of 1-a failed
+
+    assert seen.filter_new(['http://s/1-a', 'http://s/2-b']) == ['http://s/1-a']
+    assert 'http://s/2-b' in seen and 'http://s/1-a' not in seen
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_memory():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [str(i) for i in range(1000)]
+
+    assert sum(bloom.add(key) for key in keys) < 30
+    assert all(key in bloom for key in keys)
+    false_positives = sum(str(i) in bloom for i in range(1000, 11000))
+    assert false_positives < 300
+    assert len(bloom.bits) < 1500
+
+def test_seen_listings_with_bloom_filter():
+    seen = SeenListings(capacity=100)
+
+    assert seen.filter_new(['http://s/1-a', 'http://s/1-a', 'http://s/2-b']) == ['http://s/1-a', 'http://s/2-b']
+    assert seen.duplicates == 1
@@ -0,0 +1,74 @@
+import csv
+import io
+from unittest.mock import patch
+from benchmarks.fake_site import FakeListingSite
+from dags.scripts.fetcher import ListingFetcher
+from dags.scripts.house_scrapper import HEADERS, create_session, discover_last_page, fetch_page, process_chunk
+from dags.scripts.parse_pool import ParsePool
+from dags.scripts.rate_limiter import AdaptiveRateLimiter
+
+def test_process_chunk_against_fake_site():
+    with FakeListingSite(pages=2, listings_per_page=5) as site:
+        session = create_session()
+        with ListingFetcher(fetch_page, session, HEADERS, max_workers=4) as fetcher:
+            content = process_chunk(session, HEADERS, site.base_url, 'for-sale', 'lagos', 1, 4, fetcher, max_empty_pages=1)
+
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == 10
+    assert rows[0]['location'] == 'Ikoyi, Lagos'
+    assert rows[0]['currency'] == 'NGN'
+    assert rows[0]['bedrooms'] == '2'
+    assert site.requests == 2 + 10 + 1
+
+def test_process_chunk_retries_throttled_fetches():
+    with FakeListingSite(pages=1, listings_per_page=5, throttle_rate=0.3, seed=1) as site:
+        session = create_session()
+        rate_limiter = AdaptiveRateLimiter(rate=100.0, max_rate=100.0, burst=10)
+        with ListingFetcher(fetch_page, session, HEADERS, rate_limiter=rate_limiter) as fetcher:
+            content = process_chunk(session, HEADERS, site.base_url, 'for-sale', 'lagos', 1, 1, fetcher)
+
+    assert content.count('\n') - 1 == 5
+    assert site.requests > 6
+
+def test_process_chunk_with_parse_pool_matches_inline_parsing():
+    with FakeListingSite(pages=3, listings_per_page=4) as site:
+        session = create_session()
+        with ListingFetcher(fetch_page, session, HEADERS, max_workers=4) as fetcher:
+            inline = process_chunk(session, HEADERS, site.base_url, 'for-sale', 'lagos', 1, 3, fetcher)
+            with ParsePool(workers=2, max_pending=1) as parse_pool:
+                pooled = process_chunk(session, HEADERS, site.base_url, 'for-sale', 'lagos', 1, 3, fetcher,
+                                       parse_pool=parse_pool)
+
+    assert pooled == inline
+    assert inline.count('\n') - 1 == 12
+
+def test_throttled_responses_reach_the_rate_limiter():
+    with FakeListingSite(pages=1, listings_per_page=1, throttle_rate=1.0) as site:
+        rate_limiter = AdaptiveRateLimiter(rate=100.0, max_rate=100.0, burst=10)
+        response = fetch_page(create_session(), site.base_url + '/for-sale/lagos', HEADERS, rate_limiter=rate_limiter)
+
+    assert response is None
+    assert site.requests == rate_limiter.throttled
+
+class WindowedPaginationSite(FakeListingSite):
+    """Fake site whose pagination bar links pages 1 to 3 only, whatever the number of pages."""
+
+    def index_page(self, path: str, page: int) -> str:
+        return super().index_page(path, page).replace(f'?page={self.pages}">{self.pages}<', '?page=3">3<')
+
+def test_discover_last_page_searches_past_a_pagination_window():
+    with WindowedPaginationSite(pages=12, listings_per_page=1) as site:
+        last_page = discover_last_page(create_session(), HEADERS, site.base_url, 'for-sale', 'lagos')
+
+    assert last_page == 12
+
+def test_discover_last_page_falls_back_to_the_hint_when_a_probe_fails():
+    def fetch_index_page(session, url, headers, rate_limiter=None):
+        return None if url.endswith('?page=10') else fetch_page(session, url, headers, rate_limiter)
+
+    with WindowedPaginationSite(pages=12, listings_per_page=1) as site:
+        with patch('dags.scripts.house_scrapper.fetch_page', side_effect=fetch_index_page):
+            last_page = discover_last_page(create_session(), HEADERS, site.base_url, 'for-sale', 'lagos', hint=20)
+
+    # page 10 is probed while galloping from 3; taking it for empty would stop the crawl at page 9
+    assert last_page == 20
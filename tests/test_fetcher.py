@@ -0,0 +1,37 @@
+import threading
+import time
+from unittest.mock import Mock
+from dags.scripts.fetcher import ListingFetcher
+
+def test_fetch_all_preserves_order():
+    def fake_fetch(session, url, headers):
+        time.sleep(0.01 * (5 - int(url.rsplit('/', 1)[-1])))
+        return url
+
+    urls = [f'http://test.com/{i}' for i in range(5)]
+    with ListingFetcher(fake_fetch, Mock(), {}, max_workers=5, per_host_limit=5) as fetcher:
+        assert fetcher.fetch_all(urls) == urls
+
+def test_fetch_all_respects_per_host_limit():
+    lock = threading.Lock()
+    in_flight = {'now': 0, 'max': 0}
+
+    def fake_fetch(session, url, headers):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        time.sleep(0.01)
+        with lock:
+            in_flight['now'] -= 1
+        return url
+
+    with ListingFetcher(fake_fetch, Mock(), {}, max_workers=8, per_host_limit=2) as fetcher:
+        fetcher.fetch_all(f'http://test.com/{i}' for i in range(16))
+
+    assert in_flight['max'] == 2
+
+def test_fetch_all_keeps_failed_fetches_as_none():
+    fake_fetch = Mock(side_effect=['first', None, 'third'])
+
+    with ListingFetcher(fake_fetch, Mock(), {}, max_workers=1) as fetcher:
+        assert fetcher.fetch_all(['a', 'b', 'c']) == ['first', None, 'third']
@@ -0,0 +1,226 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from google.cloud.exceptions import Conflict
+from dags.scripts.gcp_manager import BigQueryManager, GCSManager, clear_storage_clients, load_job_id
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    clear_storage_clients()
+    yield
+    clear_storage_clients()
+
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_managers_share_one_client_per_project(mock_client):
+    first = GCSManager(project_id='test-project')
+    second = GCSManager(project_id='test-project')
+    other = GCSManager(project_id='other-project')
+
+    assert first.storage_client is second.storage_client
+    assert mock_client.call_count == 2
+    assert other.project_id == 'other-project'
+
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_bucket_handles_are_cached_across_managers(mock_client):
+    GCSManager(project_id='test-project').get_bucket('test-bucket')
+    GCSManager(project_id='test-project').get_bucket('test-bucket')
+
+    mock_client.return_value.bucket.assert_called_once_with('test-bucket')
+
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_upload_file_from_string_skips_bucket_lookup(mock_client):
+    uri = GCSManager(project_id='test-project').upload_file_from_string('test-bucket', 'a,b', 'file.csv', 'text/csv')
+
+    assert uri == 'gs://test-bucket/file.csv'
+    mock_client.return_value.get_bucket.assert_not_called()
+    blob = mock_client.return_value.bucket.return_value.blob
+    blob.assert_called_once_with('file.csv')
+    blob.return_value.upload_from_string.assert_called_once_with(b'a,b', content_type='text/csv')
+
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_iter_files_streams_paginated_listing(mock_client):
+    blobs = [Mock(), Mock()]
+    blobs[0].name, blobs[1].name = 'chunks/a.csv', 'chunks/b.csv'
+    mock_client.return_value.list_blobs.return_value = iter(blobs)
+
+    names = GCSManager(project_id='test-project').iter_files('test-bucket', prefix='chunks/', page_size=2)
+
+    assert list(names) == ['chunks/a.csv', 'chunks/b.csv']
+    mock_client.return_value.list_blobs.assert_called_once_with('test-bucket', prefix='chunks/', page_size=2)
+
+@patch('dags.scripts.gcp_manager.transfer_manager')
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_upload_many_sends_large_files_in_parallel_parts(mock_client, mock_transfer_manager, tmp_path):
+    small, large = tmp_path / 'small.csv', tmp_path / 'large.csv'
+    small.write_bytes(b'x' * 10)
+    large.write_bytes(b'x' * 100)
+
+    uris = GCSManager(project_id='test-project').upload_many(
+        'test-bucket', [(str(small), 'a.csv'), (str(large), 'b.csv')], max_workers=4, large_file_threshold=50
+    )
+
+    assert uris == ['gs://test-bucket/a.csv', 'gs://test-bucket/b.csv']
+    pairs = mock_transfer_manager.upload_many.call_args.args[0]
+    assert [path for path, _ in pairs] == [str(small)]
+    assert mock_transfer_manager.upload_many.call_args.kwargs['max_workers'] == 4
+    assert mock_transfer_manager.upload_chunks_concurrently.call_args.args[0] == str(large)
+
+@patch('dags.scripts.gcp_manager.storage.Client')
+def test_copy_prefix_rewrites_every_blob_until_done(mock_client):
+    blobs = []
+    for name in ('raw/1.csv', 'raw/2.csv', 'raw/3.csv'):
+        blob = Mock()
+        blob.name = name
+        blobs.append(blob)
+    mock_client.return_value.list_blobs.return_value = iter(blobs)
+    rewritten = []
+
+    def bucket(name):
+        handle = Mock()
+
+        def blob(blob_name):
+            target = Mock()
+            tokens = iter(['more', None]) if blob_name.endswith('1.csv') else iter([None])
+            def rewrite(source, token=None):
+                rewritten.append((name, blob_name, token))
+                return next(tokens), 0, 0
+            target.rewrite.side_effect = rewrite
+            return target
+
+        handle.blob.side_effect = blob
+        return handle
+
+    mock_client.return_value.bucket.side_effect = bucket
+
+    copied = GCSManager(project_id='test-project').copy_prefix('src', 'raw/', 'dst', 'backup/', max_workers=2)
+
+    assert copied == 3
+    assert len(rewritten) == 4
+    assert set(rewritten) == {
+        ('dst', 'backup/1.csv', None), ('dst', 'backup/1.csv', 'more'), ('dst', 'backup/2.csv', None),
+        ('dst', 'backup/3.csv', None),
+    }
+
+def make_load_job(job_id, error=None):
+    job = Mock()
+    job.job_id = job_id
+    job.done.return_value = True
+    job.error_result = {'message': error} if error else None
+    job.state = 'DONE'
+    job.output_rows, job.output_bytes, job.input_file_bytes = 10, 1000, 800
+    job.started = datetime(2024, 9, 30, 12, 0, 0)
+    job.ended = datetime(2024, 9, 30, 12, 0, 5)
+    job.destination.project, job.destination.dataset_id, job.destination.table_id = 'p', 'raw', 'sale'
+    return job
+
+def test_load_job_id_is_deterministic_and_ignores_uri_order():
+    first = load_job_id('p.raw.sale', ['gs://b/a.csv', 'gs://b/b.csv'])
+    assert first == load_job_id('p.raw.sale', ['gs://b/b.csv', 'gs://b/a.csv'])
+    assert first != load_job_id('p.raw.rent', ['gs://b/a.csv', 'gs://b/b.csv'])
+    assert first != load_job_id('p.raw.sale', ['gs://b/a.csv', 'gs://b/b.csv'], 'WRITE_TRUNCATE')
+
+def test_load_job_id_of_a_partition_is_valid():
+    job_id = load_job_id('my-project.raw.sale$202410', ['gs://b/a.parquet'], 'WRITE_TRUNCATE')
+
+    assert job_id.startswith('load_my_project_raw_sale_202410_')
+    assert job_id != load_job_id('my-project.raw.sale$202411', ['gs://b/a.parquet'], 'WRITE_TRUNCATE')
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_create_table_partitioned_and_clustered(mock_client):
+    mock_client.return_value.project = 'p'
+
+    BigQueryManager('p').create_table('raw', 'sale', [], partition_field='scrape_date', partition_type='MONTH',
+                                      clustering_fields=['lga', 'property_type'])
+
+    table = mock_client.return_value.create_table.call_args[0][0]
+    assert table.time_partitioning.type_ == 'MONTH'
+    assert table.time_partitioning.field == 'scrape_date'
+    assert table.clustering_fields == ['lga', 'property_type']
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_load_into_partition_creates_partitioned_table(mock_client):
+    mock_client.return_value.project = 'p'
+    mock_client.return_value.load_table_from_uri.return_value = make_load_job('job')
+
+    BigQueryManager('p').load_from_gcs('raw', 'sale$202410', ['gs://b/sale.parquet'], 'PARQUET',
+                                       write_disposition='WRITE_TRUNCATE', partition_field='scrape_date',
+                                       partition_type='MONTH', clustering_fields=['lga'])
+
+    _, table = mock_client.return_value.load_table_from_uri.call_args[0]
+    job_config = mock_client.return_value.load_table_from_uri.call_args[1]['job_config']
+    assert table.table_id == 'sale$202410'
+    assert job_config.time_partitioning.field == 'scrape_date'
+    assert job_config.clustering_fields == ['lga']
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_load_many_submits_every_job_before_waiting(mock_client):
+    mock_client.return_value.project = 'p'
+    submitted = []
+
+    def load_table_from_uri(uris, table, job_id, job_config):
+        assert all(not job.done.called for job in submitted)
+        submitted.append(make_load_job(job_id))
+        return submitted[-1]
+
+    mock_client.return_value.load_table_from_uri.side_effect = load_table_from_uri
+
+    stats = BigQueryManager('p').load_many_from_gcs([
+        {'dataset_id': 'raw', 'table_id': 'sale', 'source_uris': ['gs://b/sale.parquet'], 'source_format': 'PARQUET'},
+        {'dataset_id': 'raw', 'table_id': 'rent', 'source_uris': ['gs://b/rent.parquet'], 'source_format': 'PARQUET'},
+    ])
+
+    assert len(submitted) == 2
+    assert [stat['job_id'] for stat in stats] == [job.job_id for job in submitted]
+    assert stats[0]['output_rows'] == 10 and stats[0]['duration_seconds'] == 5.0
+    assert not stats[0]['reused']
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_retried_load_reuses_existing_job(mock_client):
+    mock_client.return_value.project = 'p'
+    mock_client.return_value.load_table_from_uri.side_effect = Conflict('exists')
+    mock_client.return_value.get_job.side_effect = lambda job_id: make_load_job(job_id)
+
+    stats = BigQueryManager('p').load_from_gcs('raw', 'sale', ['gs://b/sale.csv'])
+
+    assert stats['reused']
+    assert mock_client.return_value.load_table_from_uri.call_count == 1
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_load_after_failed_job_uses_next_job_id(mock_client):
+    mock_client.return_value.project = 'p'
+    base_job_id = load_job_id('p.raw.sale', ['gs://b/sale.csv'])
+    new_job = make_load_job(f'{base_job_id}_1')
+    mock_client.return_value.load_table_from_uri.side_effect = [Conflict('exists'), new_job]
+    mock_client.return_value.get_job.return_value = make_load_job(base_job_id, error='bad row')
+
+    stats = BigQueryManager('p').load_from_gcs('raw', 'sale', ['gs://b/sale.csv'])
+
+    assert stats['job_id'] == f'{base_job_id}_1'
+    assert mock_client.return_value.load_table_from_uri.call_args.kwargs['job_id'] == f'{base_job_id}_1'
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_local_load_after_failed_job_uses_next_job_id(mock_client, tmp_path):
+    source_file = tmp_path / 'sale.csv'
+    source_file.write_text('title\nflat\n')
+    mock_client.return_value.project = 'p'
+    new_job = make_load_job('next')
+    mock_client.return_value.load_table_from_file.side_effect = [Conflict('exists'), new_job]
+    mock_client.return_value.get_job.return_value = make_load_job('failed', error='bad row')
+
+    BigQueryManager('p').load_from_local('raw', 'sale', str(source_file), 'csv', None, ',')
+
+    first_id, second_id = [call.kwargs['job_id'] for call in mock_client.return_value.load_table_from_file.call_args_list]
+    assert second_id == f'{first_id}_1'
+    new_job.result.assert_called_once()
+
+@patch('dags.scripts.gcp_manager.bigquery.Client')
+def test_local_load_reuses_successful_job(mock_client, tmp_path):
+    source_file = tmp_path / 'sale.csv'
+    source_file.write_text('title\nflat\n')
+    mock_client.return_value.project = 'p'
+    mock_client.return_value.load_table_from_file.side_effect = Conflict('exists')
+    mock_client.return_value.get_job.return_value = make_load_job('loaded')
+
+    BigQueryManager('p').load_from_local('raw', 'sale', str(source_file), 'csv', None, ',')
+
+    assert mock_client.return_value.load_table_from_file.call_count == 1
@@ -1,6 +1,12 @@
+import gzip
+import io
+import json
 import pytest
+import requests
 from unittest.mock import Mock, patch
-from dags.scripts.house_scrapper import create_session, fetch_page, extract_listing_data, upload_to_gcs, process_chunk, house_scrapper
+from dags.scripts.house_scrapper import create_session, fetch_page, extract_listing_data, upload_to_gcs, process_chunk, house_scrapper, chunk_ranges, plan_chunks, scrape_chunk_and_upload, extract_changed_listing_data, scrape_chunk, submit_listing_parse, merge_price_sketches
+from dags.scripts.metrics import PipelineMetrics
+from dags.scripts.quantile_sketch import PriceSketches
 
 def test_create_session():
     session = create_session()
@@ -53,14 +59,286 @@ def test_process_chunk(mock_extract_listing_data, mock_fetch_page):
     
     assert 'location,status,bedrooms' in result
     print(result)
-    assert 'Test,,,,,,,,,,,1000,' in result
+    assert 'Test,,,,,,,,,,,1000.0,' in result
 
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.listing_links')
+@patch('dags.scripts.house_scrapper.extract_listing_data')
+def test_process_chunk_adds_snapshot_columns(mock_extract_listing_data, mock_listing_links, mock_fetch_page):
+    mock_fetch_page.return_value = Mock(content='<html></html>')
+    mock_listing_links.return_value = ['/a', '/b']
+    mock_extract_listing_data.return_value = [{'location': 'Yaba, Lagos', 'price': '1000'}]
+    fetcher = Mock(metrics=None)
+    fetcher.fetch_all.return_value = [None, Mock()]
+
+    result = process_chunk(Mock(), {}, 'http://test.com', 'sale', 'testcity', 1, 1, fetcher, scrape_date='2024-10-31')
+
+    assert result.splitlines()[1] == '"Yaba, Lagos",,,,,,,,,,,1000.0,,Lagos Mainland,Yaba,1,http://test.com/b,2024-10-31'
+
+@patch('dags.scripts.house_scrapper.extract_listing_data', return_value=[])
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.listing_links')
+def test_process_chunk_skips_listings_seen_on_earlier_pages(mock_listing_links, mock_fetch_page, _):
+    mock_fetch_page.return_value = Mock(content='<html></html>')
+    mock_listing_links.side_effect = [['/1-a', '/2-b'], ['/2-b', '/3-c']]
+    fetcher = Mock(metrics=PipelineMetrics())
+    fetcher.fetch_all.side_effect = lambda urls, headers: [Mock() for _ in urls]
+
+    process_chunk(Mock(), {}, 'http://test.com', 'sale', 'testcity', 1, 2, fetcher)
+
+    fetched = [call[0][0] for call in fetcher.fetch_all.call_args_list]
+    assert fetched == [['http://test.com/1-a', 'http://test.com/2-b'], ['http://test.com/3-c']]
+    assert fetcher.metrics.summary()['counters']['duplicates_skipped'] == 1
+
+@patch('dags.scripts.house_scrapper.extract_listing_data', return_value=[])
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.listing_links')
+def test_process_chunk_retries_listings_whose_fetch_failed(mock_listing_links, mock_fetch_page, _):
+    mock_fetch_page.return_value = Mock(content='<html></html>')
+    mock_listing_links.side_effect = [['/1-a', '/2-b'], ['/1-a', '/3-c']]
+    fetcher = Mock(metrics=PipelineMetrics())
+    fetcher.fetch_all.side_effect = [[None, Mock()], [Mock(), Mock()]]
+
+    process_chunk(Mock(), {}, 'http://test.com', 'sale', 'testcity', 1, 2, fetcher)
+
+    fetched = [call[0][0] for call in fetcher.fetch_all.call_args_list]
+    assert fetched == [['http://test.com/1-a', 'http://test.com/2-b'], ['http://test.com/1-a', 'http://test.com/3-c']]
+
+@patch('dags.scripts.house_scrapper.ChunkManifest')
+@patch('dags.scripts.house_scrapper.GCSManager')
 @patch('dags.scripts.house_scrapper.process_chunk')
 @patch('dags.scripts.house_scrapper.upload_to_gcs')
-def test_house_scrapper(mock_upload_to_gcs, mock_process_chunk):
+def test_house_scrapper(mock_upload_to_gcs, mock_process_chunk, mock_gcs_manager, mock_manifest):
     mock_process_chunk.return_value = 'test,data'
+    mock_manifest.return_value.load.return_value.is_complete.return_value = False
     
     house_scrapper('test-bucket', 'test-file.csv', 'http://test.com', 'sale', 'testcity', 1, 2)
     
     mock_upload_to_gcs.assert_called()
     mock_process_chunk.assert_called()
+
+def test_chunk_ranges():
+    assert chunk_ranges(1, 45, 20) == [(1, 20), (21, 40), (41, 45)]
+    assert chunk_ranges(5, 5, 20) == [(5, 5)]
+
+def test_plan_chunks():
+    shards = plan_chunks(bucket_name='test-bucket', file_name='test-file', base_url='http://test.com',
+                         category='sale', city='testcity', start_page='1', end_page='30', chunk_size=20,
+                         ti=Mock())
+
+    assert shards == [
+        {'bucket_name': 'test-bucket', 'file_name': 'test-file', 'base_url': 'http://test.com',
+         'category': 'sale', 'city': 'testcity', 'chunk_start': 1, 'chunk_end': 20},
+        {'bucket_name': 'test-bucket', 'file_name': 'test-file', 'base_url': 'http://test.com',
+         'category': 'sale', 'city': 'testcity', 'chunk_start': 21, 'chunk_end': 30},
+    ]
+
+@patch('dags.scripts.house_scrapper.ChunkManifest')
+@patch('dags.scripts.house_scrapper.GCSManager')
+@patch('dags.scripts.house_scrapper.process_chunk')
+@patch('dags.scripts.house_scrapper.upload_to_gcs')
+def test_scrape_chunk_and_upload(mock_upload_to_gcs, mock_process_chunk, mock_gcs_manager, mock_manifest):
+    mock_process_chunk.return_value = 'test,data'
+    manifest = mock_manifest.return_value.load.return_value
+    manifest.is_complete.return_value = False
+
+    chunk_name = scrape_chunk_and_upload(bucket_name='test-bucket', file_name='test-file.csv', base_url='http://test.com',
+                                         category='sale', city='testcity', chunk_start=21, chunk_end=40)
+
+    assert chunk_name == 'test-file_21_40.csv'
+    assert mock_process_chunk.call_args.args[5:7] == (21, 40)
+    mock_upload_to_gcs.assert_called_once_with('test-bucket', 'test-file_21_40.csv', 'test,data')
+    mock_manifest.assert_called_once_with(mock_gcs_manager.return_value, 'test-bucket', 'test-file_manifest.json')
+    manifest.mark_complete.assert_called_once_with(21, 40, 'test-file_21_40.csv')
+
+@patch('dags.scripts.house_scrapper.ChunkManifest')
+@patch('dags.scripts.house_scrapper.GCSManager')
+@patch('dags.scripts.house_scrapper.process_chunk')
+@patch('dags.scripts.house_scrapper.upload_to_gcs')
+def test_scrape_chunk_and_upload_skips_completed_chunk(mock_upload_to_gcs, mock_process_chunk, mock_gcs_manager, mock_manifest):
+    manifest = mock_manifest.return_value.load.return_value
+    manifest.is_complete.return_value = True
+    manifest.completed_object.return_value = 'test-file_21_40.csv'
+
+    chunk_name = scrape_chunk_and_upload(bucket_name='test-bucket', file_name='test-file.csv', base_url='http://test.com',
+                                         category='sale', city='testcity', chunk_start=21, chunk_end=40)
+
+    assert chunk_name == 'test-file_21_40.csv'
+    mock_process_chunk.assert_not_called()
+    mock_upload_to_gcs.assert_not_called()
+
+@patch('dags.scripts.house_scrapper.parse_listing')
+def test_extract_changed_listing_data(mock_parse_listing):
+    index = Mock()
+    index.unchanged_row.side_effect = [{'location': 'Old'}, None]
+    mock_parse_listing.return_value = {'location': 'New'}
+    responses = [Mock(), None, Mock()]
+
+    properties = extract_changed_listing_data(['u1', 'u2', 'u3'], responses, index)
+
+    assert properties == [{'location': 'Old'}, {'location': 'New'}]
+    index.record.assert_called_once_with('u3', responses[2], {'location': 'New'})
+
+def test_submit_listing_parse_only_parses_changed_listings():
+    index = Mock()
+    index.unchanged_row.side_effect = [{'location': 'Old'}, None]
+    responses = [Mock(content=b'old'), None, Mock(content=b'new')]
+    parse_pool = Mock()
+    parse_pool.submit.return_value.result.return_value = [{'location': 'New'}]
+
+    _, collect = submit_listing_parse(parse_pool, ['u1', 'u2', 'u3'], responses, index)
+
+    parse_pool.submit.assert_called_once_with([b'new'])
+    assert collect() == [{'location': 'Old'}, {'location': 'New'}]
+    index.record.assert_called_once_with('u3', responses[2], {'location': 'New'})
+
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.listing_links')
+def test_process_chunk_stops_after_empty_pages(mock_listing_links, mock_fetch_page):
+    mock_listing_links.return_value = []
+    fetcher = Mock(metrics=None)
+    fetcher.fetch_all.return_value = []
+    pages = []
+
+    process_chunk(Mock(), {}, 'http://test.com', 'sale', 'testcity', 1, 20, fetcher,
+                  on_page=lambda page, listings: pages.append(page), max_empty_pages=2)
+
+    assert pages == [1, 2]
+
+@patch('dags.scripts.house_scrapper.GCSManager')
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.extract_listing_data')
+def test_scrape_chunk_streams_compressed_csv(mock_extract_listing_data, mock_fetch_page, mock_gcs_manager):
+    uploaded = io.BytesIO()
+    uploaded.close = Mock()
+    mock_gcs_manager.return_value.open_blob_writer.return_value.__enter__.return_value = uploaded
+    mock_response = Mock()
+    mock_response.content = '<html></html>'
+    mock_fetch_page.return_value = mock_response
+    mock_extract_listing_data.return_value = [{'location': 'Test', 'price': '1000'}]
+    fetcher = Mock(metrics=PipelineMetrics())
+    fetcher.fetch_all.return_value = []
+
+    chunk_name = scrape_chunk(Mock(), {}, fetcher, 'test-bucket', 'test-file', 'http://test.com', 'sale', 'testcity',
+                              1, 2, max_empty_pages=5, stream=True, compress=True)
+
+    assert chunk_name == 'test-file_1_2.csv.gz'
+    mock_gcs_manager.return_value.open_blob_writer.assert_called_once_with('test-bucket', 'test-file_1_2.csv.gz', content_type='text/csv')
+    assert 'Test,,,,,,,,,,,1000.0,' in gzip.decompress(uploaded.getvalue()).decode('utf-8')
+    summary = fetcher.metrics.summary()
+    assert summary['counters'] == {'chunks': 1, 'listings_parsed': 2, 'pages': 2, 'rows_written': 2}
+    assert set(summary['stages']) == {'parse', 'serialize', 'upload'}
+
+def make_response(status_code, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = b''
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(str(status_code))
+    return response
+
+def test_fetch_page_retries_throttled_requests_through_rate_limiter():
+    session = Mock()
+    ok = make_response(200)
+    session.get.side_effect = [make_response(429, {'Retry-After': '3'}), ok]
+    rate_limiter = Mock()
+
+    assert fetch_page(session, 'http://test.com', {}, rate_limiter) == ok
+    assert rate_limiter.acquire.call_count == 2
+    assert rate_limiter.record.call_args_list[0].args[0] == 429
+    assert rate_limiter.record.call_args_list[0].args[2] == 3.0
+    assert rate_limiter.record.call_args_list[1].args[0] == 200
+
+def test_fetch_page_gives_up_after_throttle_retries():
+    session = Mock()
+    session.get.return_value = make_response(503)
+
+    assert fetch_page(session, 'http://test.com', {}, Mock()) is None
+    assert session.get.call_count == 4
+
+def test_fetch_page_records_metrics():
+    session = Mock()
+    ok = make_response(200)
+    ok.content = b'<html></html>'
+    session.get.side_effect = [make_response(429), ok]
+    metrics = PipelineMetrics()
+
+    assert fetch_page(session, 'http://test.com', {}, Mock(), metrics=metrics) == ok
+    summary = metrics.summary()
+    assert summary['counters']['requests'] == 2
+    assert summary['counters']['retries'] == 1
+    assert summary['stages']['fetch']['count'] == 2
+
+@patch('dags.scripts.house_scrapper.BigQueryManager')
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.extract_listing_data')
+def test_scrape_chunk_streams_rows_to_bigquery(mock_extract_listing_data, mock_fetch_page, mock_bq_manager):
+    mock_fetch_page.return_value = Mock(content='<html></html>')
+    mock_extract_listing_data.return_value = [{'location': 'Test', 'price': '1000'}]
+    stream = mock_bq_manager.return_value.open_append_stream.return_value.__enter__.return_value
+    stream.write_rows = Mock()
+    fetcher = Mock(metrics=None)
+    fetcher.fetch_all.return_value = []
+    manifest = Mock()
+    manifest.is_complete.return_value = False
+
+    chunk_name = scrape_chunk(Mock(), {}, fetcher, 'test-bucket', 'test-file', 'http://test.com', 'sale', 'testcity',
+                              1, 2, manifest=manifest, bq_dataset='raw', bq_table='sale_listings')
+
+    assert chunk_name == 'raw.sale_listings/1_2'
+    mock_bq_manager.return_value.open_append_stream.assert_called_once_with('raw', 'sale_listings', mode='pending')
+    assert stream.write_rows.call_count == 2
+    manifest.mark_complete.assert_called_once_with(1, 2, 'raw.sale_listings/1_2')
+
+@patch('dags.scripts.house_scrapper.ChunkManifest')
+@patch('dags.scripts.house_scrapper.GCSManager')
+@patch('dags.scripts.house_scrapper.BigQueryManager')
+@patch('dags.scripts.house_scrapper.scrape_chunk')
+def test_house_scrapper_streams_every_chunk_through_one_bigquery_manager(mock_scrape_chunk, mock_bq_manager, *_):
+    house_scrapper('test-bucket', 'test-file', 'http://test.com', 'sale', 'testcity', 1, 40, chunk_size=20,
+                   bq_dataset='raw', bq_table='sale_listings')
+
+    assert mock_scrape_chunk.call_count == 2
+    mock_bq_manager.assert_called_once()
+    assert all(call.args[-1] is mock_bq_manager.return_value for call in mock_scrape_chunk.call_args_list)
+
+@patch('dags.scripts.house_scrapper.GCSManager')
+@patch('dags.scripts.house_scrapper.fetch_page')
+@patch('dags.scripts.house_scrapper.extract_listing_data')
+def test_scrape_chunk_uploads_price_sketches(mock_extract_listing_data, mock_fetch_page, mock_gcs_manager):
+    mock_fetch_page.return_value = Mock(content='<html></html>')
+    mock_extract_listing_data.return_value = [{'location': 'Yaba, Lagos', 'property_type': 'House', 'price': '1000'}]
+    fetcher = Mock(metrics=PipelineMetrics())
+    fetcher.fetch_all.return_value = []
+
+    with patch('dags.scripts.house_scrapper.upload_to_gcs'):
+        scrape_chunk(Mock(), {}, fetcher, 'test-bucket', 'test-file', 'http://test.com', 'sale', 'testcity',
+                     1, 2, max_empty_pages=5, sketch_prices=True)
+
+    bucket, data, blob_name = mock_gcs_manager.return_value.upload_bytes.call_args.args
+    assert (bucket, blob_name) == ('test-bucket', 'test-file_1_2_price_sketch.json.gz')
+    assert PriceSketches.loads(data).quantile_rows() == [
+        {'lga': 'Lagos Mainland', 'property_type': 'House', 'listing_count': 2, 'price_p50': 1000.0, 'price_p90': 1000.0}
+    ]
+
+@patch('dags.scripts.house_scrapper.GCSManager')
+def test_merge_price_sketches(mock_gcs_manager):
+    sketches = PriceSketches()
+    sketches.add_rows([{'lga': 'Ikeja', 'property_type': 'House', 'price': 100.0}])
+    gcs_client = mock_gcs_manager.return_value
+    gcs_client.list_blob_names.return_value = [
+        'test-file_1_20_price_sketch.json.gz', 'test-file_1_20.parquet', 'test-file_21_40_price_sketch.json.gz',
+    ]
+    gcs_client.download_as_bytes.return_value = sketches.dumps()
+
+    groups = merge_price_sketches(bucket_name='test-bucket', file_name='test-file', category='for_sale', scrape_date='2024-10-31')
+
+    assert groups == 1
+    assert gcs_client.download_as_bytes.call_count == 2
+    bucket, data, blob_name = gcs_client.upload_bytes.call_args.args
+    assert blob_name == 'test-file_price_quantiles.json'
+    assert json.loads(data) == {
+        'lga': 'Ikeja', 'property_type': 'House', 'listing_count': 2, 'price_p50': 100.0, 'price_p90': 100.0,
+        'listing_type': 'sale', 'scrape_date': '2024-10-31',
+    }
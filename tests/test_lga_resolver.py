@@ -0,0 +1,23 @@
+from dags.scripts.lga_resolver import KeywordMatcher, LGA_KEYWORDS, resolve_location
+
+def test_resolve_location():
+    assert resolve_location('Admiralty Way, Lekki Phase 1, Lekki, Lagos') == ('Eti-Osa', 'Lekki Phase 1')
+    assert resolve_location('Allen Avenue, Ikeja GRA, Ikeja, Lagos') == ('Ikeja', 'Ikeja')
+    assert resolve_location('Surulere, Lagos') == ('Surulere', None)
+    assert resolve_location('N/A') == (None, None)
+    assert resolve_location(None) == (None, None)
+
+def test_first_listed_keyword_wins_like_the_case_chain():
+    # "ojodu" contains the later keyword "ojo"; the earlier keyword wins wherever it appears in the text
+    assert resolve_location('Ojodu Berger, Lagos')[0] == 'Ikeja'
+    assert resolve_location('Oke Ira, Ogba, Lagos')[0] == 'Ifako-Ijaiye'
+    assert resolve_location('Ogba, off Ipaja Road')[0] == 'Alimosho'
+    assert resolve_location('Epe Road, Lekki')[0] == 'Eti-Osa'
+
+def test_matcher_agrees_with_substring_scan():
+    matcher = KeywordMatcher(LGA_KEYWORDS)
+    locations = ['Isolo, Oshodi', 'Bariga, Shomolu', 'Ijegun Ikotun', 'Apapa Road, Ebute Metta', 'IKORODU']
+
+    for location in locations:
+        expected = next((lga for keyword, lga in LGA_KEYWORDS if keyword in location.lower()), None)
+        assert matcher.match(location) == expected
@@ -0,0 +1,47 @@
+from unittest.mock import Mock
+from dags.scripts.listing_index import ListingIndex, content_hash
+
+def make_response(content=b'<html></html>', status_code=200, headers=None):
+    response = Mock()
+    response.content = content
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+def test_conditional_headers():
+    index = ListingIndex({'http://test.com/1': {'etag': '"abc"', 'last_modified': 'Mon, 02 Sep 2024 10:00:00 GMT'}})
+
+    assert index.conditional_headers('http://test.com/1') == {
+        'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 02 Sep 2024 10:00:00 GMT'
+    }
+    assert index.conditional_headers('http://test.com/2') == {}
+
+def test_unchanged_row_on_not_modified_and_same_hash():
+    row = {'location': 'Test', 'price': '1000'}
+    index = ListingIndex({'http://test.com/1': {'hash': content_hash(b'same'), 'last_seen': '2024-08-31', 'row': row}},
+                         today='2024-09-30')
+
+    assert index.unchanged_row('http://test.com/1', make_response(b'', status_code=304)) == row
+    assert index.unchanged_row('http://test.com/1', make_response(b'same')) == row
+    assert index.unchanged_row('http://test.com/1', make_response(b'changed')) is None
+    assert index.entries['http://test.com/1']['last_seen'] == '2024-09-30'
+    assert (index.hits, index.misses) == (2, 1)
+
+def test_record_and_round_trip():
+    index = ListingIndex(today='2024-09-30')
+    index.record('http://test.com/1', make_response(b'page', headers={'ETag': '"v1"'}), {'location': 'Test'})
+
+    entries = ListingIndex.loads(ListingIndex.dumps(index.updated))
+
+    assert entries['http://test.com/1']['etag'] == '"v1"'
+    assert entries['http://test.com/1']['row'] == {'location': 'Test'}
+    assert ListingIndex.loads(None) == {}
+
+def test_merge_and_prune():
+    index = ListingIndex({'a': {'last_seen': '2024-08-31', 'row': {'price': '1'}},
+                          'b': {'last_seen': '2024-01-31', 'row': {'price': '2'}}})
+    index.merge({'a': {'last_seen': '2024-09-30', 'row': {'price': '3'}}})
+
+    assert index.entries['a']['row'] == {'price': '3'}
+    assert index.prune('2024-06-01') == 1
+    assert list(index.entries) == ['a']
@@ -0,0 +1,53 @@
+from dags.scripts.listing_parser import listing_links, parse_listing
+
+DETAIL_PAGE = '''
+<html><body>
+<h4><address><i class="fa fa-map-marker"></i> Lekki Phase 1, Lekki, Lagos</address></h4>
+<span class="pull-sale price" itemprop="priceCurrency" content="NGN">&#8358;</span>
+<span class="price" itemprop="price" content="85000000">85,000,000</span>
+<table class="table table-bordered table-striped">
+<tr><td><strong>Property Ref:</strong> 1234567</td><td><strong>Added On:</strong> 01 Sep 2024</td></tr>
+<tr><td><strong>Market Status:</strong> Available</td><td><strong>Type:</strong> Detached Duplex</td></tr>
+<tr><td><strong>Bedrooms:</strong> 4</td><td><strong>Bathrooms:</strong> 4</td></tr>
+<tr><td><strong>Toilets:</strong> 5</td><td><strong>Servicing:</strong> Serviced</td></tr>
+<tr><td><strong>Total Area:</strong> 1,200 sqm</td><td><strong>Covered Area:</strong> 800 sqm</td></tr>
+</table>
+</body></html>
+'''
+
+def test_parse_listing_extracts_all_fields():
+    assert parse_listing(DETAIL_PAGE) == {
+        'location': 'Lekki Phase 1, Lekki, Lagos',
+        'price': '85000000',
+        'currency': 'NGN',
+        'status': 'Available',
+        'property_type': 'Detached Duplex',
+        'bedrooms': '4',
+        'bathrooms': '4',
+        'toilets': '5',
+        'is_serviced': 'yes',
+        'total_area': '1,200 sqm',
+        'covered_area': '800 sqm',
+    }
+
+def test_parse_listing_accepts_bytes():
+    assert parse_listing(DETAIL_PAGE.encode('utf-8'))['bedrooms'] == '4'
+
+def test_parse_listing_defaults_for_missing_fields():
+    assert parse_listing(b'') == {'location': 'N/A', 'price': 'N/A', 'currency': 'N/A'}
+    assert parse_listing('<html><body><p>gone</p></body></html>') == {
+        'location': 'N/A', 'price': 'N/A', 'currency': 'N/A'
+    }
+
+def test_listing_links_takes_last_description_link_of_every_card():
+    content = '''
+    <div class="row property-list">
+        <a href="/image-1">image</a>
+        <div class="description hidden-xs"><a href="/agent">agent</a><a href="/1-house">More details</a></div>
+    </div>
+    <div class="row property-list"><div class="description hidden-xs"><a href="/2-flat">More details</a></div></div>
+    <div class="row property-list featured"><div class="description hidden-xs"><a href="/3-ad">ad</a></div></div>
+    '''
+
+    assert listing_links(content) == ['/1-house', '/2-flat']
+    assert listing_links('') == []
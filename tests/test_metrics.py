@@ -0,0 +1,62 @@
+from unittest.mock import patch
+from dags.scripts.metrics import Histogram, PipelineMetrics
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 0]
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.summary()['max'] == 3.0
+
+def test_summary_holds_counters_and_stages():
+    metrics = PipelineMetrics(labels={'city': 'lagos'})
+    metrics.incr('requests')
+    metrics.incr('response_bytes', 512)
+    with metrics.timer('fetch'):
+        pass
+
+    summary = metrics.summary()
+
+    assert summary['labels'] == {'city': 'lagos'}
+    assert summary['counters'] == {'requests': 1, 'response_bytes': 512}
+    assert summary['stages']['fetch']['count'] == 1
+
+def test_to_prometheus_renders_counters_and_cumulative_buckets():
+    metrics = PipelineMetrics(labels={'city': 'lagos'}, buckets=(0.1, 1.0))
+    metrics.incr('rows_written', 3)
+    metrics.observe('upload', 0.5)
+    metrics.observe('upload', 2.0)
+
+    text = metrics.to_prometheus(prefix='scrape')
+
+    assert 'scrape_rows_written_total{city="lagos"} 3' in text
+    assert 'scrape_upload_seconds_bucket{city="lagos",le="0.1"} 0' in text
+    assert 'scrape_upload_seconds_bucket{city="lagos",le="1.0"} 1' in text
+    assert 'scrape_upload_seconds_bucket{city="lagos",le="+Inf"} 2' in text
+    assert 'scrape_upload_seconds_count{city="lagos"} 2' in text
+
+def test_write_textfile_replaces_file(tmp_path):
+    metrics = PipelineMetrics()
+    metrics.incr('pages', 2)
+    path = tmp_path / 'scrape.prom'
+
+    metrics.write_textfile(str(path))
+
+    assert 'lag_house_scrape_pages_total 2' in path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ['scrape.prom']
+
+@patch('dags.scripts.metrics.socket.socket')
+def test_send_statsd_packs_lines_into_packets(mock_socket):
+    metrics = PipelineMetrics()
+    for i in range(200):
+        metrics.incr(f'counter_{i}')
+
+    metrics.send_statsd('statsd.local', 8125)
+
+    sock = mock_socket.return_value.__enter__.return_value
+    packets = [call.args[0] for call in sock.sendto.call_args_list]
+    assert len(packets) > 1
+    assert all(len(packet) <= 1432 for packet in packets)
+    assert sum(packet.count(b'|c') for packet in packets) == 200
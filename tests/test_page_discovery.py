@@ -0,0 +1,50 @@
+import pytest
+from dags.scripts.page_discovery import PageProbeError, last_page_from_pagination, search_last_page
+
+def test_last_page_from_pagination():
+    content = '''<html><body><ul class="pagination">
+    <li><a href="/for-sale/lagos?page=2">2</a></li>
+    <li><a href="/for-sale/lagos?page=3">3</a></li>
+    <li><a href="/for-sale/lagos?bedrooms=2&page=2858">Last</a></li>
+    </ul></body></html>'''
+
+    assert last_page_from_pagination(content) == 2858
+
+def test_last_page_from_pagination_without_pagination():
+    assert last_page_from_pagination('<html><body></body></html>') is None
+    assert last_page_from_pagination(b'') is None
+
+def make_site(last_page):
+    probes = []
+
+    def has_listings(page):
+        probes.append(page)
+        return page <= last_page
+
+    return has_listings, probes
+
+def test_search_last_page_grows_past_hint():
+    has_listings, probes = make_site(3000)
+
+    assert search_last_page(has_listings, hint=2858) == 3000
+    assert len(probes) < 20
+
+def test_search_last_page_shrinks_below_hint():
+    has_listings, probes = make_site(1000)
+
+    assert search_last_page(has_listings, hint=2858) == 1000
+    assert len(probes) < 20
+
+def test_search_last_page_empty_site():
+    has_listings, _ = make_site(0)
+
+    assert search_last_page(has_listings, hint=10) == 0
+
+def test_search_last_page_raises_on_a_failed_probe():
+    def has_listings(page):
+        if page == 6:
+            raise PageProbeError(f"Could not fetch index page {page}")
+        return page <= 12
+
+    with pytest.raises(PageProbeError):
+        search_last_page(has_listings, hint=3)
@@ -0,0 +1,48 @@
+import threading
+from unittest.mock import patch
+from benchmarks.fake_site import FakeListingSite
+from dags.scripts.parse_pool import ParsePool, parse_listings
+
+def test_inline_pool_parses_in_calling_thread():
+    site = FakeListingSite()
+    pages = [site.detail_page(i).encode('utf-8') for i in (1, 2)]
+
+    with ParsePool(workers=0) as pool:
+        future = pool.submit(pages)
+
+    assert future.done()
+    assert future.result() == parse_listings(pages)
+    assert future.result()[0]['location'] == 'Ikoyi, Lagos'
+
+def test_process_pool_keeps_batch_order():
+    site = FakeListingSite()
+    batches = [[site.detail_page(i).encode('utf-8') for i in range(start, start + 3)] for start in (1, 4, 7)]
+
+    with ParsePool(workers=2) as pool:
+        futures = [pool.submit(batch) for batch in batches]
+        results = [future.result() for future in futures]
+
+    assert results == [parse_listings(batch) for batch in batches]
+
+def test_submit_blocks_when_max_pending_batches_are_queued():
+    pool = ParsePool(workers=1, max_pending=1)
+    release = threading.Event()
+    submitted = []
+
+    class SlowExecutor:
+        def submit(self, fn, contents):
+            from concurrent.futures import Future
+            future = Future()
+            threading.Thread(target=lambda: (release.wait(), future.set_result(fn(contents)))).start()
+            return future
+
+    with patch.object(ParsePool, '_start', return_value=SlowExecutor()):
+        pool.submit([b'<html></html>'])
+        second = threading.Thread(target=lambda: submitted.append(pool.submit([b'<html></html>'])))
+        second.start()
+        second.join(timeout=0.2)
+        assert not submitted
+        release.set()
+        second.join(timeout=5)
+
+    assert len(submitted) == 1
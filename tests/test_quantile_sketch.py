@@ -0,0 +1,55 @@
+import bisect
+import random
+from dags.scripts.chunk_writer import ListingRecord
+from dags.scripts.quantile_sketch import KLLSketch, PriceSketches
+
+def rank_of(sorted_values, value):
+    return bisect.bisect_left(sorted_values, value) / len(sorted_values)
+
+def test_kll_sketch_quantiles_within_error():
+    generator = random.Random(7)
+    values = [generator.lognormvariate(16, 1) for _ in range(50000)]
+    sketch = KLLSketch(seed=1)
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    median, p90 = sketch.quantiles((0.5, 0.9))
+    assert abs(rank_of(ordered, median) - 0.5) < 0.02
+    assert abs(rank_of(ordered, p90) - 0.9) < 0.02
+    assert sketch.quantiles((0, 1)) == [ordered[0], ordered[-1]]
+    assert sum(len(items) for items in sketch.compactors) < 1000
+
+def test_kll_sketch_merge_matches_union():
+    generator = random.Random(3)
+    values = [generator.uniform(0, 1000) for _ in range(20000)]
+    first, second = KLLSketch(seed=1), KLLSketch(seed=2)
+    for value in values[:5000]:
+        first.add(value)
+    for value in values[5000:]:
+        second.add(value)
+
+    merged = first.merge(KLLSketch.from_dict(second.to_dict()))
+
+    assert len(merged) == 20000
+    assert abs(rank_of(sorted(values), merged.quantiles((0.5,))[0]) - 0.5) < 0.02
+
+def test_kll_sketch_empty():
+    assert KLLSketch().quantiles((0.5,)) == [None]
+
+def test_price_sketches_group_and_round_trip():
+    sketches = PriceSketches()
+    sketches.add_rows([
+        ListingRecord.from_row({'price': '100', 'property_type': 'House'}, lga='Ikeja'),
+        ListingRecord.from_row({'price': '300', 'property_type': 'House'}, lga='Ikeja'),
+        ListingRecord.from_row({'price': 'N/A', 'property_type': 'House'}, lga='Ikeja'),
+        ListingRecord.from_row({'price': '50', 'property_type': 'Flat / Apartment'}, lga='Yaba'),
+    ])
+
+    merged = PriceSketches().merge(PriceSketches.loads(sketches.dumps())).merge(PriceSketches.loads(sketches.dumps()))
+
+    assert merged.quantile_rows() == [
+        {'lga': 'Ikeja', 'property_type': 'House', 'listing_count': 4, 'price_p50': 100.0, 'price_p90': 300.0},
+        {'lga': 'Yaba', 'property_type': 'Flat / Apartment', 'listing_count': 2, 'price_p50': 50.0, 'price_p90': 50.0},
+    ]
+    assert len(PriceSketches.loads(None)) == 0
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from dags.scripts.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def make_limiter(**kwargs):
+    clock = FakeClock()
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, **kwargs), clock
+
+def test_acquire_paces_requests_after_burst():
+    limiter, clock = make_limiter(rate=2.0, burst=2)
+
+    waits = [limiter.acquire() for _ in range(4)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == [0.5, 0.5]
+
+def test_rate_increases_on_fast_successes_up_to_max():
+    limiter, _ = make_limiter(rate=1.0, max_rate=1.25, increase=0.1)
+
+    for _ in range(5):
+        limiter.record(200, latency=0.1)
+
+    assert limiter.rate == 1.25
+
+def test_rate_halves_once_per_cooldown_on_errors():
+    limiter, clock = make_limiter(rate=8.0, cooldown=1.0)
+
+    limiter.record(429, latency=0.1)
+    limiter.record(503, latency=0.1)
+    assert limiter.rate == 4.0
+    clock.now += 1.0
+    limiter.record(None, latency=0.1)
+    assert limiter.rate == 2.0
+    assert (limiter.throttled, limiter.errors) == (1, 2)
+
+def test_slow_responses_slow_the_rate_down():
+    limiter, _ = make_limiter(rate=8.0, target_latency=1.0)
+
+    limiter.record(200, latency=5.0)
+
+    assert 4.0 < limiter.rate < 8.0
+
+def test_retry_after_pauses_every_caller():
+    limiter, clock = make_limiter(rate=100.0, burst=10)
+
+    limiter.record(429, latency=0.1, retry_after=3.0)
+
+    assert limiter.acquire() == 3.0
+
+def test_parse_retry_after():
+    now = datetime(2024, 9, 30, 12, 0, 0, tzinfo=timezone.utc)
+
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Mon, 30 Sep 2024 12:00:30 GMT', now=now) == 30.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+def test_starting_rate_is_clamped_to_bounds():
+    assert make_limiter(rate=100.0, max_rate=10.0)[0].rate == 10.0
+    assert make_limiter(rate=0.01, min_rate=0.2)[0].rate == 0.2